@@ -1,8 +1,11 @@
 import streamlit as st
-import pandas as pd
 import sys # Importar sys para manipular o caminho de busca (sys.path)
 import os  # Importar os para obter caminhos de arquivo
-import warnings
+import importlib
+import time
+
+# Início da execução do script (tempo até a primeira pintura da Home; ver medir_inicializacao.py)
+_INICIO_EXECUCAO = time.perf_counter()
 
 # --- Versão e Informações Globais ---
 APP_VERSION = "V1.0.0" 
@@ -19,17 +22,22 @@ except Exception:
 # ---------------------------------------------
 
 
-# --- Importa os módulos (Tratamento de Erro de Inicialização) ---
-try:
-    from m_release import render_release_app 
-    from m_permeation import render_permeation_app 
-    MODULES_LOADED = True
-except ImportError:
-    # Se a importação falhar, defina funções dummy e exiba um erro crítico
-    st.error("ERRO CRÍTICO: Não foi possível carregar 'm_release.py' ou 'm_permeation.py'. Verifique se todos os arquivos estão na raiz do repositório.")
-    def render_release_app(): pass
-    def render_permeation_app(): pass
-    MODULES_LOADED = False
+# --- Carregamento Preguiçoso dos Módulos (Tratamento de Erro de Inicialização) ---
+# m_release/m_permeation trazem Plotly, SciPy e o núcleo de cálculo, que a Home não usa: cada módulo só é
+# importado quando aberto pela primeira vez (depois disso o import fica em cache no processo do servidor).
+MODULOS_APP = {
+    'release': ('m_release', 'render_release_app'),
+    'permeation': ('m_permeation', 'render_permeation_app'),
+}
+
+def carregar_renderizador(app_mode):
+    """Importa o módulo do modo pedido e retorna sua função de renderização (None se a importação falhar)."""
+    nome_modulo, nome_funcao = MODULOS_APP[app_mode]
+    try:
+        return getattr(importlib.import_module(nome_modulo), nome_funcao)
+    except ImportError:
+        st.error("ERRO CRÍTICO: Não foi possível carregar 'm_release.py' ou 'm_permeation.py'. Verifique se todos os arquivos estão na raiz do repositório.")
+        return None
 
 
 # --- Dicionário de Tradução (i18n) - Apenas HOME/GLOBAL ---
@@ -142,10 +150,6 @@ def render_home(T):
 # --- Função Principal do App (Roteador) --- 
 def main():
     
-    # Se os módulos não carregaram, pare aqui e exiba a mensagem
-    if not MODULES_LOADED:
-        return
-
     # Inicializar estado da sessão (Deve ser o primeiro comando)
     if 'lang' not in st.session_state:
         st.session_state.lang = 'en'
@@ -153,16 +157,40 @@ def main():
         st.session_state.app_mode = 'home'
     
     # Estados de dados e configuração
+    if 'chave_processamento' not in st.session_state:
+        st.session_state.chave_processamento = None
+    if 'status_pipeline' not in st.session_state:
+        st.session_state.status_pipeline = None
+    if 'matriz_processada' not in st.session_state:
+        st.session_state.matriz_processada = None
     if 'df_long_processado' not in st.session_state:
         st.session_state.df_long_processado = None
     if 'df_agregado' not in st.session_state:
         st.session_state.df_agregado = None
+    if 'matriz_f2' not in st.session_state:
+        st.session_state.matriz_f2 = None
+    if 'metricas_replicas' not in st.session_state:
+        st.session_state.metricas_replicas = None
+    if 'param_replicas' not in st.session_state:
+        st.session_state.param_replicas = None
+    if 'somas_prefixo_perm' not in st.session_state:
+        st.session_state.somas_prefixo_perm = None
+    if 'janelas_steady_state' not in st.session_state:
+        st.session_state.janelas_steady_state = None
+    if 'ajuste_crank' not in st.session_state:
+        st.session_state.ajuste_crank = None
+    if 'ajuste_dose_finita' not in st.session_state:
+        st.session_state.ajuste_dose_finita = None
+    if 'perfis_fluxo' not in st.session_state:
+        st.session_state.perfis_fluxo = None
     if 'config' not in st.session_state:
         st.session_state.config = {}
     if 'fit_results' not in st.session_state:
         st.session_state.fit_results = None
     if 'perm_results' not in st.session_state:
         st.session_state.perm_results = {}
+    if 'n_workers_ajuste' not in st.session_state:
+        st.session_state.n_workers_ajuste = 1
     
     # V52: Garante que o estado seja True por padrão (Exclude t=0)
     if 'excluir_t_zero' not in st.session_state:
@@ -187,12 +215,17 @@ def main():
     
     if st.session_state.app_mode == 'home':
         render_home(T)
+        st.session_state.tempo_primeira_pintura = time.perf_counter() - _INICIO_EXECUCAO
     elif st.session_state.app_mode == 'release':
         st.title(f"FluxIQ - {T['home_release_button']}")
-        render_release_app() 
+        render_release_app = carregar_renderizador('release')
+        if render_release_app is not None:
+            render_release_app() 
     elif st.session_state.app_mode == 'permeation':
         st.title(f"FluxIQ - {T['home_permeation_button']}")
-        render_permeation_app()
+        render_permeation_app = carregar_renderizador('permeation')
+        if render_permeation_app is not None:
+            render_permeation_app()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,21 @@
+"""Núcleo de cálculo do FluxIQ (NumPy/SciPy/Pandas, sem Streamlit nem Plotly).
+
+Usado pelas páginas do app (m_release, m_permeation) e importável diretamente em scripts e processos de lote."""
+from .processamento import (calcular_liberacao_replica_v9, calcular_liberacao_vetorizada, etapa_matriz,
+                            etapa_concentracao, etapa_sink, etapa_percent, etapa_agregado, montar_matriz,
+                            processar_matriz_larga, montar_df_long_processado, montar_df_agregado, calcular_metricas_replicas,
+                            montar_metricas_replicas, matriz_y_replicas)
+from .cinetica import (MODELOS_V12, R2_THRESHOLD, CACHE_AJUSTES, CACHE_BOOTSTRAP, CacheAjustesLRU,
+                       model_zero_order, model_first_order, model_higuchi, model_korsmeyer_peppas,
+                       model_hixson_crowell, model_weibull, model_peppas_sahlin, verificar_jacobianos, coeficiente_r2,
+                       empilhar_curvas, r2_lote, levenberg_marquardt_lote, chave_ajuste, rodar_modelagem_v12, ajustar_lote_v12, executar_ajustes_lote,
+                       rodar_modelagem_lote_v12, rodar_modelagem_replicas_v12, resumir_parametros_replicas,
+                       matriz_replicas_grupo, bootstrap_parametros_v12)
+from .estatistica import (estatisticas_por_grupo, corrigir_p_valores, testar_todos_tempos, sf_amplitude_studentizada,
+                          comparacoes_post_hoc, calcular_f2, calcular_matriz_f2, calcular_f2_bootstrap)
+from .permeacao import (somas_prefixo, regressao_janelas, f_curvatura_janelas, detectar_janela_steady_state,
+                        curvas_medias_perm, detectar_janelas_grupos, pesos_derivada_local, perfis_fluxo,
+                        perfis_fluxo_perm, parametros_permeacao, regressao_linhas, parametros_perm_replicas,
+                        parametros_perm_grupos, model_crank, jac_crank, ajustar_crank_lote, ajustar_crank_perm,
+                        q_dose_finita, simular_dose_finita, ajustar_dose_finita, ajustar_dose_finita_perm)
+from .pipeline import ETAPAS_PIPELINE, PIPELINE_PROCESSAMENTO, PipelineProcessamento, impressao_planilha
@@ -0,0 +1,728 @@
+"""Modelos cinéticos de liberação: funções, Jacobianos, chutes iniciais, ajuste individual e em lote
+(Levenberg-Marquardt vetorizado), execução paralela, cache LRU e bootstrap dos parâmetros."""
+import numpy as np
+import pandas as pd
+from scipy.optimize import curve_fit, nnls
+from scipy import stats
+import warnings
+import copy
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# --- Funções dos Modelos Cinéticos ---
+def model_zero_order(t, k0): return k0 * t
+def model_first_order(t, Q_inf, k1): return Q_inf * (1 - np.exp(-k1 * t))
+def model_higuchi(t, kH): return kH * np.sqrt(t)
+def model_korsmeyer_peppas(t, kKP, n): return kKP * (t**n)
+def model_hixson_crowell(t, Q_inf, kHC):
+    termo = 1 - kHC * t
+    termo = np.where(termo < 0, 0, termo)
+    return Q_inf * (1 - (termo)**3)
+def model_weibull(t, Q_inf, a, b):
+    t_a = t / a
+    t_a = np.where(t_a <= 0, 1e-9, t_a)
+    return Q_inf * (1 - np.exp(-(t_a**b)))
+def model_peppas_sahlin(t, k_diff, k_relax):
+    return (k_diff * np.sqrt(t)) + (k_relax * t)
+
+# --- Jacobianos Analíticos dos Modelos (dQ/dp, formato n_pontos x n_parâmetros) ---
+def jac_zero_order(t, k0):
+    t = np.asarray(t, dtype=float)
+    return t[:, None]
+def jac_first_order(t, Q_inf, k1):
+    t = np.asarray(t, dtype=float)
+    e = np.exp(-k1 * t)
+    return np.column_stack([1 - e, Q_inf * t * e])
+def jac_higuchi(t, kH):
+    t = np.asarray(t, dtype=float)
+    return np.sqrt(t)[:, None]
+def jac_korsmeyer_peppas(t, kKP, n):
+    t = np.asarray(t, dtype=float)
+    t_n = t**n
+    log_t = np.log(np.where(t > 0, t, 1.0)) # t^n * ln(t) -> 0 em t = 0
+    return np.column_stack([t_n, kKP * t_n * log_t])
+def jac_hixson_crowell(t, Q_inf, kHC):
+    t = np.asarray(t, dtype=float)
+    termo = 1 - kHC * t
+    termo = np.where(termo < 0, 0, termo)
+    return np.column_stack([1 - termo**3, Q_inf * 3 * termo**2 * t])
+def jac_weibull(t, Q_inf, a, b):
+    t = np.asarray(t, dtype=float)
+    t_a = t / a
+    ativo = t_a > 0 # abaixo disso o modelo usa t_a constante (1e-9)
+    t_a = np.where(ativo, t_a, 1e-9)
+    u = t_a**b
+    e = np.exp(-u)
+    d_a = np.where(ativo, Q_inf * e * (-b * u / a), 0.0)
+    d_b = Q_inf * e * u * np.log(t_a)
+    return np.column_stack([1 - e, d_a, d_b])
+def jac_peppas_sahlin(t, k_diff, k_relax):
+    t = np.asarray(t, dtype=float)
+    return np.column_stack([np.sqrt(t), t])
+
+# --- Solvers Lineares e Chutes Iniciais Linearizados ---
+# Zero-Order, Higuchi e Peppas-Sahlin são lineares nos parâmetros: Q = X(t) @ p, com p >= 0
+def _matriz_zero_order(t): return t[:, None]
+def _matriz_higuchi(t): return np.sqrt(t)[:, None]
+def _matriz_peppas_sahlin(t): return np.column_stack([np.sqrt(t), t])
+
+def _q_inf_chute(q_max):
+    # Platô ligeiramente acima do máximo observado, para que 1 - Q/Q_inf > 0 em todos os pontos
+    return q_max * 1.05
+
+def _inclinacao_pela_origem(x, y):
+    denom = np.sum(x * x)
+    return np.sum(x * y) / denom if denom > 0 else np.nan
+
+def _chute_korsmeyer_peppas(t, q, q_max):
+    """log Q = log kKP + n log t (regressão nos pontos com t > 0 e Q > 0)."""
+    ok = (t > 0) & (q > 0)
+    if ok.sum() < 2:
+        return None
+    n, log_k = np.polyfit(np.log(t[ok]), np.log(q[ok]), 1)
+    return [np.exp(log_k), n]
+
+def _chute_first_order(t, q, q_max):
+    """-ln(1 - Q/Q_inf) = k1 t, com Q_inf fixo em _q_inf_chute."""
+    q_inf = _q_inf_chute(q_max)
+    frac = np.clip(q / q_inf, 0.0, 0.999)
+    return [q_inf, _inclinacao_pela_origem(t, -np.log1p(-frac))]
+
+def _chute_hixson_crowell(t, q, q_max):
+    """1 - (1 - Q/Q_inf)^(1/3) = kHC t, com Q_inf fixo em _q_inf_chute."""
+    q_inf = _q_inf_chute(q_max)
+    frac = np.clip(q / q_inf, 0.0, 0.999)
+    return [q_inf, _inclinacao_pela_origem(t, 1 - np.cbrt(1 - frac))]
+
+def _chute_weibull(t, q, q_max):
+    """ln(-ln(1 - Q/Q_inf)) = b ln t - b ln a, com Q_inf fixo em _q_inf_chute."""
+    q_inf = _q_inf_chute(q_max)
+    frac = np.clip(q / q_inf, 1e-6, 0.999)
+    ok = t > 0
+    if ok.sum() < 2:
+        return None
+    b, c = np.polyfit(np.log(t[ok]), np.log(-np.log1p(-frac[ok])), 1)
+    if b <= 0:
+        return None
+    return [q_inf, np.exp(-c / b), b]
+
+def _resolver_nnls(matriz, t_data, q_data):
+    """Solução exata de mínimos quadrados não negativos para os modelos lineares nos parâmetros."""
+    X = matriz(t_data)
+    if not (np.all(np.isfinite(X)) and np.all(np.isfinite(q_data))):
+        raise ValueError("Dados não finitos para o ajuste linear.")
+    popt, _ = nnls(X, q_data)
+    return popt
+
+def _chute_inicial(spec, t_data, q_data, q_max):
+    """p0 linearizado (quando disponível), projetado nos limites; cai no p0 fixo do modelo se falhar."""
+    p0_padrao = spec['p0'](q_max) if spec['p0'] is not None else None
+    if spec.get('chute') is None:
+        return p0_padrao
+    with np.errstate(all='ignore'):
+        try:
+            p0 = spec['chute'](t_data, q_data, q_max)
+        except (ValueError, np.linalg.LinAlgError):
+            p0 = None
+    if p0 is None or not np.all(np.isfinite(p0)):
+        return p0_padrao
+    lb, ub = spec['bounds']
+    return list(np.clip(p0, lb, ub))
+
+# --- Especificação dos Modelos Cinéticos (ajuste V12) ---
+# p0: chute fixo em função de q_max; chute: estimativa linearizada (preferida quando válida);
+# matriz: modelos lineares nos parâmetros, resolvidos exatamente por NNLS (sem curve_fit);
+# jac: Jacobiano analítico usado pelo curve_fit (evita diferenças finitas);
+# saida: nome do parâmetro reportado -> índice em popt
+MODELOS_V12 = {
+    "Korsmeyer-Peppas": {'func': model_korsmeyer_peppas, 'jac': jac_korsmeyer_peppas, 'p0': lambda q_max: [q_max*0.1, 0.5], 'maxfev': 5000,
+                         'chute': _chute_korsmeyer_peppas,
+                         'bounds': ([0, 0], [np.inf, 2.0]), 'saida': {'kKP': 0, 'n': 1}},
+    "Zero-Order": {'func': model_zero_order, 'jac': jac_zero_order, 'p0': None, 'maxfev': 10000, 'matriz': _matriz_zero_order,
+                   'bounds': ([0], [np.inf]), 'saida': {'k0': 0}},
+    "First-Order": {'func': model_first_order, 'jac': jac_first_order, 'p0': lambda q_max: [q_max, 0.1], 'maxfev': 10000,
+                    'chute': _chute_first_order,
+                    'bounds': ([0, 0], [np.inf, np.inf]), 'saida': {'k1': 1}},
+    "Higuchi": {'func': model_higuchi, 'jac': jac_higuchi, 'p0': None, 'maxfev': 10000, 'matriz': _matriz_higuchi,
+                'bounds': ([0], [np.inf]), 'saida': {'kH': 0}},
+    "Hixson-Crowell": {'func': model_hixson_crowell, 'jac': jac_hixson_crowell, 'p0': lambda q_max: [q_max, 0.01], 'maxfev': 10000,
+                       'chute': _chute_hixson_crowell,
+                       'bounds': ([0, 0], [np.inf, np.inf]), 'saida': {'kHC': 1}},
+    "Weibull": {'func': model_weibull, 'jac': jac_weibull, 'p0': lambda q_max: [q_max, 2, 1], 'maxfev': 10000,
+                'chute': _chute_weibull,
+                'bounds': ([0, 1e-9, 1e-9], [np.inf, np.inf, np.inf]), 'saida': {'a': 1, 'b': 2}},
+    "Peppas-Sahlin": {'func': model_peppas_sahlin, 'jac': jac_peppas_sahlin, 'p0': lambda q_max: [q_max*0.1, q_max*0.1], 'maxfev': 10000,
+                      'matriz': _matriz_peppas_sahlin,
+                      'bounds': ([0, 0], [np.inf, np.inf]), 'saida': {'k_diff': 0, 'k_relax': 1}},
+}
+
+# --- Verificação dos Jacobianos Analíticos ---
+# Parâmetros típicos usados para gerar curvas sintéticas (t em horas)
+PARAMS_TESTE_V12 = {
+    "Korsmeyer-Peppas": [12.0, 0.55], "Zero-Order": [4.0], "First-Order": [95.0, 0.35],
+    "Higuchi": [18.0], "Hixson-Crowell": [90.0, 0.03], "Weibull": [92.0, 3.5, 0.8],
+    "Peppas-Sahlin": [14.0, 2.5],
+}
+
+def verificar_jacobianos(t=None, passo_rel=1e-6, ruido_rel=0.02, seed=0):
+    """Compara cada Jacobiano analítico com diferenças finitas centrais e conta as avaliações do modelo
+    por ajuste (curve_fit com e sem 'jac'). Retorna um DataFrame indexado por modelo."""
+    t = np.linspace(0.25, 24, 16) if t is None else np.asarray(t, dtype=float)
+    rng = np.random.default_rng(seed)
+    linhas = []
+    for modelo, spec in MODELOS_V12.items():
+        p = np.asarray(PARAMS_TESTE_V12[modelo], dtype=float)
+
+        # 1. Jacobiano analítico x diferenças finitas centrais
+        J = spec['jac'](t, *p)
+        J_fd = np.empty_like(J)
+        for j in range(len(p)):
+            h = passo_rel * max(abs(p[j]), 1.0)
+            p_mais, p_menos = p.copy(), p.copy()
+            p_mais[j] += h
+            p_menos[j] -= h
+            J_fd[:, j] = (spec['func'](t, *p_mais) - spec['func'](t, *p_menos)) / (2 * h)
+        erro_rel = np.max(np.abs(J - J_fd)) / max(np.max(np.abs(J_fd)), 1e-12)
+
+        # 2. Avaliações do modelo por ajuste, partindo do mesmo p0 fixo
+        q = spec['func'](t, *p) * (1 + ruido_rel * rng.standard_normal(len(t)))
+        q_max = q.max()
+        p0 = spec['p0'](q_max) if spec['p0'] is not None else np.ones(len(p))
+        avaliacoes = {}
+        for rotulo, jac in [('sem_jac', None), ('com_jac', spec['jac'])]:
+            contador = [0]
+            def f_contada(tt, *pp, _f=spec['func'], _c=contador):
+                _c[0] += 1
+                return _f(tt, *pp)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                try:
+                    curve_fit(f_contada, t, q, p0=p0, bounds=spec['bounds'], maxfev=spec['maxfev'],
+                              **({'jac': jac} if jac is not None else {}))
+                except (RuntimeError, ValueError):
+                    pass
+            avaliacoes[rotulo] = contador[0]
+
+        linhas.append({"Modelo": modelo, "Erro_Rel_Max": erro_rel,
+                       "Avaliacoes_Sem_Jac": avaliacoes['sem_jac'], "Avaliacoes_Com_Jac": avaliacoes['com_jac']})
+    return pd.DataFrame(linhas).set_index("Modelo")
+
+R2_THRESHOLD = 0.05
+
+def coeficiente_r2(q, q_pred):
+    """R² de uma curva em NumPy (mesma convenção do r2_score do scikit-learn)."""
+    q = np.asarray(q, dtype=float)
+    return float(r2_lote(q, np.asarray(q_pred, dtype=float), np.zeros(len(q), dtype=int), 1)[0])
+
+# --- Cache de Ajustes Cinéticos (LRU) ---
+class CacheAjustesLRU:
+    """Cache LRU de tamanho limitado para resultados de ajuste, com contagem de acertos/falhas."""
+
+    def __init__(self, max_itens=2048):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chave):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.hits += 1
+                return copy.deepcopy(self._itens[chave])
+            self.misses += 1
+            return None
+
+    def put(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = copy.deepcopy(valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'itens': len(self._itens), 'max_itens': self.max_itens}
+
+# Compartilhado pelas Etapas 4, 5 e 6 (e entre reruns do Streamlit)
+CACHE_AJUSTES = CacheAjustesLRU(max_itens=2048)
+
+def chave_ajuste(t_data, q_data, modelo, excluir_t_zero, has_dose_info):
+    """Chave do cache de ajustes: hash dos dados (t, q) do grupo + modelo + opções de modelagem."""
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(t_data, dtype=float).tobytes())
+    h.update(np.ascontiguousarray(q_data, dtype=float).tobytes())
+    h.update(f"|{modelo}|{bool(excluir_t_zero)}|{bool(has_dose_info)}".encode('utf-8'))
+    return h.hexdigest()
+
+def _ajustar_modelo_v12(modelo, t_data, q_data, q_max):
+    """Ajusta um único modelo de MODELOS_V12 e devolve a linha de resultados (R2 + parâmetros reportados)."""
+    spec = MODELOS_V12[modelo]
+    linha_falha = {"Modelo": modelo, "R2": np.nan, **{nome: np.nan for nome in spec['saida']}}
+    try:
+        if spec.get('matriz') is not None:
+            popt = _resolver_nnls(spec['matriz'], t_data, q_data)
+        else:
+            p0 = _chute_inicial(spec, t_data, q_data, q_max)
+            popt, _ = curve_fit(spec['func'], t_data, q_data, p0=p0, bounds=spec['bounds'], maxfev=spec['maxfev'], jac=spec['jac'])
+        r2 = coeficiente_r2(q_data, spec['func'](t_data, *popt))
+        if r2 >= R2_THRESHOLD:
+            return {"Modelo": modelo, "R2": r2, **{nome: popt[i] for nome, i in spec['saida'].items()}}
+        return linha_falha
+    except (RuntimeError, ValueError) as e:
+        return linha_falha
+
+def _ajustar_modelo_cache(modelo, t_fit, q_fit, q_max, chave):
+    """_ajustar_modelo_v12 com memoização em CACHE_AJUSTES."""
+    linha = CACHE_AJUSTES.get(chave)
+    if linha is None:
+        linha = _ajustar_modelo_v12(modelo, t_fit, q_fit, q_max)
+        CACHE_AJUSTES.put(chave, linha)
+    return linha
+
+# --- Função de Modelagem V12 ---
+def rodar_modelagem_v12(t_data, q_data, df_model, y_axis_mean, has_dose_info, excluir_t_zero=None):
+    resultados_df_list = []
+    modeling_messages = []
+    
+    q_max = q_data.max()
+    if q_max == 0: q_max = 1.0
+    t_data = np.array(t_data, dtype=float)
+    q_data = np.array(q_data, dtype=float)
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        
+        limite_kp = 60.0 if has_dose_info else q_max * 0.6
+        df_kp = df_model[df_model[y_axis_mean] <= limite_kp]
+        t_data_kp = df_kp["Tempo"].to_numpy(dtype=float)
+        q_data_kp = df_kp[y_axis_mean].to_numpy(dtype=float)
+
+        for modelo in MODELOS_V12:
+            # A chave usa sempre os dados completos do grupo (o subconjunto do K-P e q_max derivam deles)
+            chave = chave_ajuste(t_data, q_data, modelo, excluir_t_zero, has_dose_info)
+            if modelo == "Korsmeyer-Peppas":
+                # Modelo 4: Korsmeyer-Peppas (apenas a porção inicial da curva)
+                if len(t_data_kp) < 3:
+                    continue # Pular silenciosamente
+                linha = _ajustar_modelo_cache(modelo, t_data_kp, q_data_kp, q_max, chave)
+            else:
+                linha = _ajustar_modelo_cache(modelo, t_data, q_data, q_max, chave)
+            resultados_df_list.append(linha)
+
+
+    if not resultados_df_list:
+        return pd.DataFrame(), modeling_messages
+        
+    df_resultados = pd.DataFrame(resultados_df_list).set_index("Modelo").fillna(np.nan)
+    
+    return df_resultados, modeling_messages
+
+# --- Motor de Ajuste em Lote (N curvas, mesmo modelo, um único problema) ---
+# Curvas que não convergem nessas iterações (ex.: Weibull degenerado) são refeitas individualmente
+MAX_ITER_LOTE = 300
+
+def empilhar_curvas(curvas):
+    """Concatena [(t, q), ...] e devolve t, q, índice da curva de cada ponto e o início de cada curva."""
+    tamanhos = np.array([len(t) for t, _ in curvas], dtype=int)
+    t = np.concatenate([np.asarray(t, dtype=float) for t, _ in curvas])
+    q = np.concatenate([np.asarray(q, dtype=float) for _, q in curvas])
+    idx = np.repeat(np.arange(len(curvas)), tamanhos)
+    inicios = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+    return t, q, idx, inicios
+
+def r2_lote(q, q_pred, idx, n_curvas):
+    """R² de cada curva (mesma convenção do r2_score: 1.0 se perfeito e SS_tot = 0, senão 0.0)."""
+    n = np.bincount(idx, minlength=n_curvas)
+    media = np.bincount(idx, weights=q, minlength=n_curvas) / n
+    ss_tot = np.bincount(idx, weights=(q - media[idx])**2, minlength=n_curvas)
+    ss_res = np.bincount(idx, weights=(q - q_pred)**2, minlength=n_curvas)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = 1 - ss_res / ss_tot
+    return np.where(ss_tot > 0, r2, np.where(ss_res == 0, 1.0, 0.0))
+
+def _nnls_lote(matriz, t, q, inicios, n_curvas):
+    """NNLS exato de todas as curvas de uma vez, por enumeração dos conjuntos ativos
+    (os modelos lineares têm no máximo 2 parâmetros)."""
+    X = matriz(t)
+    if not (np.all(np.isfinite(X)) and np.all(np.isfinite(q))):
+        raise ValueError("Dados não finitos para o ajuste linear.")
+    n_p = X.shape[1]
+    G = np.add.reduceat(X[:, :, None] * X[:, None, :], inicios, axis=0) # X'X de cada curva
+    b = np.add.reduceat(X * q[:, None], inicios, axis=0)               # X'q de cada curva
+
+    melhor = np.zeros((n_curvas, n_p))
+    melhor_obj = np.zeros(n_curvas) # objetivo de p = 0 (relativo a ||q||²)
+    for mascara in range(1, 2**n_p):
+        livres = [j for j in range(n_p) if mascara >> j & 1]
+        G_s = G[:, livres][:, :, livres]
+        b_s = b[:, livres]
+        with np.errstate(all='ignore'):
+            det_ok = np.abs(np.linalg.det(G_s)) > 1e-300
+            p_s = np.linalg.solve(np.where(det_ok[:, None, None], G_s, np.eye(len(livres))), b_s[:, :, None])[:, :, 0]
+        # ||q - Xp||² - ||q||² = p'Gp - 2p'b = -p'b na solução das equações normais
+        obj = -np.sum(p_s * b_s, axis=1)
+        viavel = det_ok & np.all(p_s >= 0, axis=1) & (obj < melhor_obj)
+        candidato = np.zeros((n_curvas, n_p))
+        candidato[:, livres] = p_s
+        melhor = np.where(viavel[:, None], candidato, melhor)
+        melhor_obj = np.where(viavel, obj, melhor_obj)
+    return melhor
+
+def levenberg_marquardt_lote(spec, t, q, idx, tamanhos, x0, max_iter, ftol=1e-10, xtol=1e-10):
+    """Levenberg-Marquardt vetorizado sobre N curvas empilhadas. O Jacobiano do problema é bloco-diagonal
+    (cada curva só depende dos próprios parâmetros), então cada iteração resolve N sistemas p x p de uma vez,
+    com amortecimento e critério de parada próprios de cada curva. Limites tratados por projeção
+    (parâmetro no limite com gradiente apontando para fora fica fixo). spec = {'func', 'jac', 'bounds'} (como em
+    MODELOS_V12); t, q, idx vêm de empilhar_curvas, tamanhos = pontos por curva e x0 = chutes N x p.
+    Retorna (P, convergiu), P = N x p."""
+    lb = np.asarray(spec['bounds'][0], dtype=float)
+    ub = np.asarray(spec['bounds'][1], dtype=float)
+    n_curvas, n_par = x0.shape
+    P = np.clip(x0, lb, ub)
+    lam = np.full(n_curvas, 1e-3)
+    convergiu = np.zeros(n_curvas, dtype=bool)
+    ativo = np.ones(n_curvas, dtype=bool)
+    eye = np.eye(n_par)
+    # Ajuste exato (resíduo RMS ~1e-8 do sinal, ex.: curva saturada): o custo cai sem parar e o critério relativo
+    # nunca é atingido; os parâmetros restantes não são identificáveis
+    custo_exato = 1e-16 * np.bincount(idx, weights=q * q, minlength=n_curvas)
+
+    def custo_de(P_sub, t_sub, q_sub, idx_sub, n_sub):
+        r = spec['func'](t_sub, *P_sub[idx_sub].T) - q_sub
+        return r, np.bincount(idx_sub, weights=r * r, minlength=n_sub)
+
+    for _ in range(max_iter):
+        sel = np.flatnonzero(ativo)
+        if len(sel) == 0:
+            break
+        # Subproblema só com as curvas ainda ativas (as curvas são contíguas no vetor empilhado)
+        pontos = ativo[idx]
+        t_s, q_s = t[pontos], q[pontos]
+        tam_s = tamanhos[sel]
+        idx_s = np.repeat(np.arange(len(sel)), tam_s)
+        ini_s = np.concatenate([[0], np.cumsum(tam_s)[:-1]])
+        P_s = P[sel]
+
+        r, custo = custo_de(P_s, t_s, q_s, idx_s, len(sel))
+        J = spec['jac'](t_s, *P_s[idx_s].T)
+        JtJ = np.add.reduceat(J[:, :, None] * J[:, None, :], ini_s, axis=0)
+        g = np.add.reduceat(J * r[:, None], ini_s, axis=0)
+
+        livre = ~(((P_s <= lb) & (g > 0)) | ((P_s >= ub) & (g < 0)))
+        mascara = livre[:, :, None] & livre[:, None, :]
+        diag = np.maximum(np.einsum('nii->ni', JtJ), 1e-12 * np.max(np.abs(JtJ), axis=(1, 2))[:, None] + 1e-300)
+        A = np.where(mascara, JtJ + lam[sel][:, None, None] * diag[:, :, None] * eye, eye)
+        with np.errstate(all='ignore'):
+            delta = np.linalg.solve(A, -(g * livre)[:, :, None])[:, :, 0]
+        P_novo = np.clip(P_s + delta, lb, ub)
+        _, custo_novo = custo_de(P_novo, t_s, q_s, idx_s, len(sel))
+
+        melhora = np.isfinite(custo_novo) & np.all(np.isfinite(P_novo), axis=1) & (custo_novo <= custo)
+        passo = np.linalg.norm(P_novo - P_s, axis=1)
+        parou = (melhora & (((custo - custo_novo) <= ftol * custo) | (passo <= xtol * (xtol + np.linalg.norm(P_s, axis=1))))) \
+                | (custo <= custo_exato[sel]) | (lam[sel] > 1e16) # sem descida possível: mínimo atingido na precisão numérica
+
+        P[sel] = np.where(melhora[:, None], P_novo, P_s)
+        lam[sel] = np.where(melhora, np.maximum(lam[sel] / 3, 1e-12), lam[sel] * 4)
+        convergiu[sel] = parou
+        ativo[sel] = ~parou
+    return P, convergiu
+
+def ajustar_lote_v12(modelo, curvas, q_max=None):
+    """Ajusta o mesmo modelo a N curvas [(t, q), ...] como um único problema empilhado e devolve um
+    DataFrame com uma linha por curva (R2 + parâmetros reportados), na ordem de entrada."""
+    spec = MODELOS_V12[modelo]
+    n_curvas = len(curvas)
+    colunas = ["R2"] + list(spec['saida'])
+    if n_curvas == 0:
+        return pd.DataFrame(columns=colunas)
+    if q_max is None:
+        q_max = [np.max(q) if len(q) else 1.0 for _, q in curvas]
+    t, q, idx, inicios = empilhar_curvas(curvas)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if spec.get('matriz') is not None:
+            P = _nnls_lote(spec['matriz'], t, q, inicios, n_curvas)
+            convergiu = np.ones(n_curvas, dtype=bool)
+        else:
+            x0 = np.array([_chute_inicial(spec, np.asarray(tc, dtype=float), np.asarray(qc, dtype=float), qm)
+                           for (tc, qc), qm in zip(curvas, q_max)], dtype=float)
+            tamanhos = np.array([len(tc) for tc, _ in curvas], dtype=int)
+            P, convergiu = levenberg_marquardt_lote(spec, t, q, idx, tamanhos, x0, max_iter=MAX_ITER_LOTE)
+
+        r2 = r2_lote(q, spec['func'](t, *P[idx].T), idx, n_curvas)
+
+    valido = np.isfinite(r2) & np.all(np.isfinite(P), axis=1) & (r2 >= R2_THRESHOLD)
+    df = pd.DataFrame({"R2": r2, **{nome: P[:, i] for nome, i in spec['saida'].items()}})
+    df.loc[~valido, :] = np.nan
+    # Curvas que não convergiram no lote caem no ajuste individual (mesmo critério de falha do curve_fit)
+    for i in np.flatnonzero(~convergiu):
+        tc, qc = curvas[i]
+        linha = _ajustar_modelo_v12(modelo, np.asarray(tc, dtype=float), np.asarray(qc, dtype=float), q_max[i])
+        df.loc[i, colunas] = [linha[c] for c in colunas]
+    return df[colunas]
+
+# --- Execução Paralela dos Lotes (pool de processos opcional) ---
+_POOL_AJUSTES = {'executor': None, 'n_workers': 0}
+_POOL_LOCK = threading.Lock()
+# O servidor do Streamlit tem várias threads vivas: fork nesse processo pode travar os filhos em locks herdados.
+# forkserver (ou spawn, onde não existe) parte de um processo limpo; as tarefas só trafegam arrays NumPy.
+_CONTEXTO_POOL = multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+def _obter_pool_ajustes(n_workers):
+    """Pool de processos reaproveitado entre reruns; recriado apenas se o número de workers mudar."""
+    with _POOL_LOCK:
+        if _POOL_AJUSTES['executor'] is None or _POOL_AJUSTES['n_workers'] != n_workers:
+            if _POOL_AJUSTES['executor'] is not None:
+                _POOL_AJUSTES['executor'].shutdown(wait=False, cancel_futures=True)
+            _POOL_AJUSTES['executor'] = ProcessPoolExecutor(max_workers=n_workers, mp_context=_CONTEXTO_POOL)
+            _POOL_AJUSTES['n_workers'] = n_workers
+        return _POOL_AJUSTES['executor']
+
+def _descartar_pool_ajustes():
+    with _POOL_LOCK:
+        if _POOL_AJUSTES['executor'] is not None:
+            _POOL_AJUSTES['executor'].shutdown(wait=False, cancel_futures=True)
+        _POOL_AJUSTES['executor'] = None
+        _POOL_AJUSTES['n_workers'] = 0
+
+def _tarefa_lote(modelo, ts, qs, q_max):
+    """Executada no processo filho: recebe e devolve apenas arrays NumPy (nada de DataFrames)."""
+    return ajustar_lote_v12(modelo, list(zip(ts, qs)), q_max=q_max).to_numpy(dtype=float)
+
+def executar_ajustes_lote(tarefas, n_workers=1):
+    """Executa tarefas [(modelo, curvas, q_max), ...] e devolve um DataFrame de ajustar_lote_v12 por tarefa,
+    na ordem de entrada. Com n_workers > 1 cada tarefa é dividida em blocos de curvas (tarefas grupo x modelo)
+    distribuídos num pool de processos. Cada curva do lote converge de forma independente das demais,
+    então o resultado é idêntico ao serial, qualquer que seja o número de workers."""
+    if n_workers <= 1:
+        return [ajustar_lote_v12(modelo, curvas, q_max=q_max) for modelo, curvas, q_max in tarefas]
+
+    blocos = [] # (índice da tarefa, modelo, ts, qs, q_max)
+    for i, (modelo, curvas, q_max) in enumerate(tarefas):
+        for parte in np.array_split(np.arange(len(curvas)), min(n_workers, len(curvas))):
+            blocos.append((i, modelo, [np.asarray(curvas[j][0], dtype=float) for j in parte],
+                           [np.asarray(curvas[j][1], dtype=float) for j in parte], [q_max[j] for j in parte]))
+    try:
+        executor = _obter_pool_ajustes(n_workers)
+        partes = list(executor.map(_tarefa_lote, *zip(*[b[1:] for b in blocos])))
+    except (BrokenProcessPool, OSError):
+        # Pool indisponível (ex.: processo filho encerrado): descarta e executa em série
+        _descartar_pool_ajustes()
+        return executar_ajustes_lote(tarefas, n_workers=1)
+
+    resultados = []
+    for i, (modelo, _, _) in enumerate(tarefas):
+        colunas = ["R2"] + list(MODELOS_V12[modelo]['saida'])
+        valores = [p for (j, *_), p in zip(blocos, partes) if j == i]
+        resultados.append(pd.DataFrame(np.vstack(valores), columns=colunas))
+    return resultados
+
+def rodar_modelagem_lote_v12(dados_grupos, has_dose_info, excluir_t_zero=None, n_workers=1, cache=CACHE_AJUSTES):
+    """Versão em lote de rodar_modelagem_v12 para vários grupos: dados_grupos = {grupo: (t, q)} já filtrados.
+    Consulta o cache (CACHE_AJUSTES; None = sem cache) por (grupo, modelo) e ajusta as faltas de cada modelo num
+    único lote (distribuído em n_workers processos quando n_workers > 1).
+    Retorna um DataFrame indexado por (grupo, Modelo), com as colunas de rodar_modelagem_v12."""
+    preparados = {}
+    for grupo, (t_data, q_data) in dados_grupos.items():
+        t_data = np.asarray(t_data, dtype=float)
+        q_data = np.asarray(q_data, dtype=float)
+        q_max = q_data.max()
+        if q_max == 0: q_max = 1.0
+        limite_kp = 60.0 if has_dose_info else q_max * 0.6
+        mascara_kp = q_data <= limite_kp
+        preparados[grupo] = (t_data, q_data, q_max, t_data[mascara_kp], q_data[mascara_kp])
+
+    linhas = {grupo: {} for grupo in preparados}
+    pendentes_por_modelo = {}
+    for modelo in MODELOS_V12:
+        pendentes = [] # (grupo, chave, t_fit, q_fit, q_max)
+        for grupo, (t_data, q_data, q_max, t_kp, q_kp) in preparados.items():
+            if modelo == "Korsmeyer-Peppas":
+                if len(t_kp) < 3:
+                    continue # Pular silenciosamente, como em rodar_modelagem_v12
+                t_fit, q_fit = t_kp, q_kp
+            else:
+                t_fit, q_fit = t_data, q_data
+            chave = chave_ajuste(t_data, q_data, modelo, excluir_t_zero, has_dose_info)
+            linha = cache.get(chave) if cache is not None else None
+            if linha is None:
+                pendentes.append((grupo, chave, t_fit, q_fit, q_max))
+            else:
+                linhas[grupo][modelo] = linha
+        if pendentes:
+            pendentes_por_modelo[modelo] = pendentes
+
+    tarefas = [(modelo, [(p[2], p[3]) for p in pendentes], [p[4] for p in pendentes])
+               for modelo, pendentes in pendentes_por_modelo.items()]
+    for (modelo, pendentes), df_lote in zip(pendentes_por_modelo.items(), executar_ajustes_lote(tarefas, n_workers)):
+        for (grupo, chave, *_), valores in zip(pendentes, df_lote.to_dict('records')):
+            linha = {"Modelo": modelo, **valores}
+            if cache is not None:
+                cache.put(chave, linha)
+            linhas[grupo][modelo] = linha
+
+    registros = [{"Grupo": grupo, **linhas[grupo][modelo]}
+                 for grupo in preparados for modelo in MODELOS_V12 if modelo in linhas[grupo]]
+    if not registros:
+        return pd.DataFrame()
+    colunas = ["Grupo", "Modelo", "R2"] + list(dict.fromkeys(nome for spec in MODELOS_V12.values() for nome in spec['saida']))
+    df_resultados = pd.DataFrame(registros)
+    return df_resultados[[c for c in colunas if c in df_resultados.columns]].set_index(["Grupo", "Modelo"]).fillna(np.nan)
+
+# --- Modelagem por Réplica (distribuição dos parâmetros cinéticos) ---
+def rodar_modelagem_replicas_v12(df_long, col_amostra, col_grupo, y_col, has_dose_info, excluir_t_zero=None, n_workers=1,
+                                 cache=None):
+    """Ajusta todos os modelos a cada réplica de df_long (um lote por modelo, via rodar_modelagem_lote_v12).
+    Por padrão não passa pelo CACHE_AJUSTES: 7 x N réplicas expulsariam os ajustes das curvas médias do LRU
+    (o app guarda a tabela inteira uma vez por processamento). Retorna uma tabela longa: uma linha por (réplica, modelo) com grupo, R2 e parâmetros reportados."""
+    df = df_long[[col_amostra, col_grupo, "Tempo", y_col]].dropna(subset=["Tempo", y_col])
+    if excluir_t_zero:
+        df = df[df["Tempo"] > 0]
+    df = df.sort_values([col_amostra, "Tempo"], kind="mergesort")
+
+    amostras = df[col_amostra].to_numpy()
+    t = df["Tempo"].to_numpy(dtype=float)
+    q = df[y_col].to_numpy(dtype=float)
+    # Fronteiras das réplicas no vetor ordenado (sem groupby.apply)
+    inicios = np.flatnonzero(np.r_[True, amostras[1:] != amostras[:-1]]) if len(amostras) else np.array([], dtype=int)
+    fins = np.r_[inicios[1:], len(amostras)]
+    grupo_da_replica = dict(zip(amostras[inicios], df[col_grupo].to_numpy()[inicios]))
+    dados_replicas = {amostras[i]: (t[i:j], q[i:j]) for i, j in zip(inicios, fins) if j - i >= 3}
+
+    df_resultados = rodar_modelagem_lote_v12(dados_replicas, has_dose_info, excluir_t_zero, n_workers=n_workers, cache=cache)
+    if df_resultados.empty:
+        return pd.DataFrame(columns=[col_grupo, col_amostra, "Modelo", "R2"])
+    df_resultados = df_resultados.reset_index().rename(columns={"Grupo": col_amostra})
+    df_resultados.insert(0, col_grupo, df_resultados[col_amostra].map(grupo_da_replica))
+    return df_resultados
+
+def resumir_parametros_replicas(df_parametros, col_grupo, nivel_confianca=0.95):
+    """Média, DP e IC (t de Student) de cada parâmetro por grupo e modelo, a partir da tabela de
+    rodar_modelagem_replicas_v12. Ajustes que falharam (NaN) não entram na estatística."""
+    colunas_param = ["R2"] + [nome for spec in MODELOS_V12.values() for nome in spec['saida']]
+    colunas_param = [c for c in dict.fromkeys(colunas_param) if c in df_parametros.columns]
+    df_melt = df_parametros.melt(id_vars=[col_grupo, "Modelo"], value_vars=colunas_param,
+                                 var_name="Parametro", value_name="Valor").dropna(subset=["Valor"])
+    if df_melt.empty:
+        return pd.DataFrame(columns=[col_grupo, "Modelo", "Parametro", "N", "Media", "DP", "IC_Inf", "IC_Sup"])
+
+    resumo = df_melt.groupby([col_grupo, "Modelo", "Parametro"], sort=False)["Valor"].agg(N="count", Media="mean", DP="std").reset_index()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        meia_largura = stats.t.ppf(0.5 + nivel_confianca / 2, resumo["N"] - 1) * resumo["DP"] / np.sqrt(resumo["N"])
+    resumo["IC_Inf"] = resumo["Media"] - meia_largura
+    resumo["IC_Sup"] = resumo["Media"] + meia_largura
+    return resumo
+
+# --- Bootstrap dos Parâmetros Cinéticos (reamostragem de réplicas) ---
+# Resultados completos de bootstrap (um item por grupo/opções), reaproveitados entre reruns
+CACHE_BOOTSTRAP = CacheAjustesLRU(max_itens=128)
+
+def matriz_replicas_grupo(df_long, col_amostra, col_grupo, y_col, grupo):
+    """Curvas das réplicas de um grupo como (tempos, matriz R x T), com NaN onde a réplica não tem o ponto."""
+    df = df_long[df_long[col_grupo] == grupo]
+    pivot = df.pivot(index=col_amostra, columns="Tempo", values=y_col).sort_index(axis=1)
+    return pivot.columns.to_numpy(dtype=float), pivot.to_numpy(dtype=float)
+
+def _curvas_validas(t, medias):
+    """Uma curva (t, q) por linha de medias, descartando pontos NaN; None para curvas com menos de 3 pontos."""
+    curvas = []
+    for linha in medias:
+        ok = np.isfinite(linha)
+        curvas.append((t[ok], linha[ok]) if ok.sum() >= 3 else None)
+    return curvas
+
+def bootstrap_parametros_v12(t, Y, has_dose_info, excluir_t_zero, n_boot=2000, nivel_confianca=0.95, seed=0,
+                             n_workers=1, tamanho_bloco=500, progresso=None):
+    """IC bootstrap (percentil) dos parâmetros de todos os modelos de um grupo. Reamostra as réplicas (linhas
+    de Y, R x T) com reposição, ajusta as n_boot curvas médias em lote (um lote por modelo e bloco) e devolve
+    um DataFrame com Modelo, Parametro, Estimativa (curva média original), IC_Inf, IC_Sup e N_Validos.
+    progresso(fração) é chamado a cada bloco."""
+    t = np.asarray(t, dtype=float)
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    if excluir_t_zero:
+        manter = t > 0
+        t, Y = t[manter], Y[:, manter]
+
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(t).tobytes())
+    h.update(np.ascontiguousarray(Y).tobytes())
+    h.update(f"|{Y.shape}|{bool(has_dose_info)}|{n_boot}|{nivel_confianca}|{seed}".encode('utf-8'))
+    chave = h.hexdigest()
+    resultado = CACHE_BOOTSTRAP.get(chave)
+    if resultado is not None:
+        if progresso is not None: progresso(1.0)
+        return resultado
+
+    n_rep = Y.shape[0]
+    indices = np.random.default_rng(seed).integers(0, n_rep, size=(n_boot, n_rep))
+    parametros = {modelo: np.full((n_boot, len(spec['saida'])), np.nan) for modelo, spec in MODELOS_V12.items()}
+
+    for inicio in range(0, n_boot, tamanho_bloco):
+        bloco = indices[inicio:inicio + tamanho_bloco]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            medias = np.nanmean(Y[bloco], axis=1) # (bloco x T): curva média de cada reamostragem
+        curvas = _curvas_validas(t, medias)
+
+        tarefas, destinos = [], []
+        for modelo in MODELOS_V12:
+            linhas, curvas_modelo, q_max = [], [], []
+            for i, curva in enumerate(curvas):
+                if curva is None:
+                    continue
+                t_c, q_c = curva
+                q_max_c = q_c.max()
+                if q_max_c == 0: q_max_c = 1.0
+                if modelo == "Korsmeyer-Peppas":
+                    # Mesma porção inicial usada em rodar_modelagem_v12
+                    limite_kp = 60.0 if has_dose_info else q_max_c * 0.6
+                    mascara_kp = q_c <= limite_kp
+                    if mascara_kp.sum() < 3:
+                        continue
+                    t_c, q_c = t_c[mascara_kp], q_c[mascara_kp]
+                linhas.append(inicio + i)
+                curvas_modelo.append((t_c, q_c))
+                q_max.append(q_max_c)
+            if curvas_modelo:
+                tarefas.append((modelo, curvas_modelo, q_max))
+                destinos.append((modelo, np.array(linhas)))
+
+        for (modelo, linhas), df_lote in zip(destinos, executar_ajustes_lote(tarefas, n_workers)):
+            parametros[modelo][linhas] = df_lote[list(MODELOS_V12[modelo]['saida'])].to_numpy(dtype=float)
+        if progresso is not None:
+            progresso(min(inicio + tamanho_bloco, n_boot) / n_boot)
+
+    # Estimativa pontual: ajuste da curva média de todas as réplicas (mesmo caminho das Etapas 4 e 5)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        media = np.nanmean(Y, axis=0)
+    ok = np.isfinite(media)
+    df_pontual = rodar_modelagem_lote_v12({0: (t[ok], media[ok])}, has_dose_info, excluir_t_zero) if ok.sum() >= 3 else pd.DataFrame()
+
+    alfa = (1 - nivel_confianca) / 2
+    linhas_resultado = []
+    for modelo, spec in MODELOS_V12.items():
+        for j, nome in enumerate(spec['saida']):
+            valores = parametros[modelo][:, j]
+            valores = valores[np.isfinite(valores)]
+            estimativa = df_pontual.loc[(0, modelo), nome] if (0, modelo) in df_pontual.index else np.nan
+            ic_inf, ic_sup = np.quantile(valores, [alfa, 1 - alfa]) if len(valores) else (np.nan, np.nan)
+            linhas_resultado.append({"Modelo": modelo, "Parametro": nome, "Estimativa": estimativa,
+                                     "IC_Inf": ic_inf, "IC_Sup": ic_sup, "N_Validos": len(valores)})
+    resultado = pd.DataFrame(linhas_resultado)
+    CACHE_BOOTSTRAP.put(chave, resultado)
+    return resultado
@@ -0,0 +1,270 @@
+"""Comparação de grupos: testes em todos os tempos com correção para múltiplos testes, post-hoc
+(Tukey HSD e Games-Howell) e fator de similaridade f2 (direto, matriz de pares e bootstrap)."""
+import numpy as np
+import pandas as pd
+from scipy import stats, special
+import warnings
+import hashlib
+
+from .cinetica import CACHE_BOOTSTRAP
+
+# --- Testes de Hipótese em Todos os Tempos (vetorizados, com correção para múltiplos testes) ---
+def estatisticas_por_grupo(Y, grupos, selecionados):
+    """N, média e variância amostral (G x T) de cada grupo selecionado, a partir da matriz réplicas x tempos
+    (NaN = ponto ausente). As somas por grupo são produtos com a matriz indicadora grupos x réplicas."""
+    indicador = (np.asarray(grupos, dtype=object)[None, :] == np.asarray(selecionados, dtype=object)[:, None]).astype(float)
+    presente = np.isfinite(Y)
+    n = indicador @ presente
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = (indicador @ np.where(presente, Y, 0.0)) / n
+        desvio = np.where(presente, Y - indicador.T @ np.nan_to_num(media), 0.0)
+        variancia = (indicador @ desvio**2) / (n - 1)
+    return n, media, variancia
+
+def corrigir_p_valores(p_valores, metodo="holm"):
+    """Valores-p ajustados por Holm (FWER) ou Benjamini-Hochberg (FDR); NaN fica de fora da contagem de testes."""
+    p_valores = np.asarray(p_valores, dtype=float)
+    ajustados = np.full(p_valores.shape, np.nan)
+    finitos = np.isfinite(p_valores)
+    m = int(finitos.sum())
+    if m == 0:
+        return ajustados
+    ordem = np.argsort(p_valores[finitos], kind='stable')
+    p_ordenados = p_valores[finitos][ordem]
+    if metodo == "holm":
+        p_ordenados = np.maximum.accumulate((m - np.arange(m)) * p_ordenados)
+    elif metodo == "bh":
+        p_ordenados = np.minimum.accumulate((p_ordenados * m / np.arange(1, m + 1))[::-1])[::-1]
+    else:
+        raise ValueError(f"Método de correção desconhecido: {metodo}")
+    corrigidos = np.empty(m)
+    corrigidos[ordem] = np.minimum(p_ordenados, 1.0)
+    ajustados[finitos] = corrigidos
+    return ajustados
+
+def testar_todos_tempos(tempos, Y, grupos, selecionados, metodo="holm", alfa=0.05):
+    """Welch (2 grupos) ou ANOVA de um fator (>2 grupos) em todos os tempos > 0 de uma só vez, com os mesmos
+    resultados de stats.ttest_ind(equal_var=False) / stats.f_oneway por tempo. Tempos em que algum grupo tem
+    menos de 2 réplicas ou a variância dentro dos grupos é nula ficam sem teste (p = NaN)."""
+    tempos = np.asarray(tempos, dtype=float)
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    colunas = tempos > 0
+    tempos, Y = tempos[colunas], Y[:, colunas]
+    n, media, variancia = estatisticas_por_grupo(Y, grupos, selecionados)
+    k = len(selecionados)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        soma_quad_dentro = np.nansum((n - 1) * variancia, axis=0)
+        testavel = np.all(n >= 2, axis=0) & (soma_quad_dentro > 0)
+        if k == 2:
+            erro_quad = variancia / n
+            se2 = erro_quad.sum(axis=0)
+            estatistica = (media[0] - media[1]) / np.sqrt(se2)
+            gl_num = np.ones(len(tempos))
+            gl_den = se2**2 / np.sum(erro_quad**2 / (n - 1), axis=0)
+            p = 2 * stats.t.sf(np.abs(estatistica), gl_den)
+            teste = "Welch t"
+        else:
+            n_total = n.sum(axis=0)
+            media_geral = (n * media).sum(axis=0) / n_total
+            soma_quad_entre = (n * (media - media_geral)**2).sum(axis=0)
+            gl_num = np.full(len(tempos), k - 1.0)
+            gl_den = n_total - k
+            estatistica = (soma_quad_entre / gl_num) / (soma_quad_dentro / gl_den)
+            p = stats.f.sf(estatistica, gl_num, gl_den)
+            teste = "ANOVA"
+
+    p = np.where(testavel, p, np.nan)
+    p_ajustado = corrigir_p_valores(p, metodo)
+    return pd.DataFrame({
+        "Tempo": tempos,
+        "Teste": teste,
+        "N_Min": n.min(axis=0).astype(int) if k else np.zeros(len(tempos), dtype=int),
+        "Estatistica": np.where(testavel, estatistica, np.nan),
+        "GL_Num": np.where(testavel, gl_num, np.nan),
+        "GL_Den": np.where(testavel, gl_den, np.nan),
+        "p": p,
+        "p_Ajustado": p_ajustado,
+        "Significante": p_ajustado < alfa,
+    })
+
+# --- Comparações Post-Hoc de Todos os Pares (Tukey HSD e Games-Howell) ---
+# stats.studentized_range.sf integra numericamente um valor por vez (~10 ms cada), o que inviabiliza os G(G-1)/2 pares
+# com dezenas de grupos. Aqui a CDF da amplitude de k normais é tabelada uma vez numa grade fina de w (quadratura de
+# Gauss-Legendre em z) e a integral na densidade de s é feita para todos os pares de uma vez.
+_NOS_Z, _PESOS_Z = np.polynomial.legendre.leggauss(96)
+_NOS_S, _PESOS_S = np.polynomial.legendre.leggauss(64)
+_W_MAX = 16.0  # P(W > 16) < 1e-20 até para 1000 grupos
+_N_GRADE_W = 8193
+
+def _cdf_amplitude_normal(k):
+    """Grade (w, P(W <= w)) da amplitude W de k normais padrão independentes."""
+    z = 8.5 * _NOS_Z
+    peso_z = 8.5 * _PESOS_Z * stats.norm.pdf(z)
+    w = np.linspace(0.0, _W_MAX, _N_GRADE_W)
+    cdf = k * np.sum(peso_z * (special.ndtr(z) - special.ndtr(z - w[:, None]))**(k - 1), axis=1)
+    return w, np.clip(cdf, 0.0, 1.0)
+
+def sf_amplitude_studentizada(q, k, gl):
+    """P(Q > q) da amplitude studentizada com k grupos e gl graus de liberdade (gl escalar ou vetor do tamanho de q).
+    Q = W / s, com s = sqrt(qui²(gl) / gl): integra-se P(W > q·s) na densidade de s, entre os quantis 1e-12 e 1 - 1e-12."""
+    q = np.atleast_1d(np.asarray(q, dtype=float))
+    gl = np.broadcast_to(np.asarray(gl, dtype=float), q.shape)
+    sf = np.full(q.shape, np.nan)
+    validos = np.isfinite(q) & (q >= 0) & (gl > 0)
+    if not validos.any():
+        return sf
+    
+    grade_w, grade_cdf = _cdf_amplitude_normal(k)
+    g = np.minimum(gl[validos], 1e7)[:, None]
+    s_min = np.sqrt(stats.chi2.ppf(1e-12, g) / g)
+    s_max = np.sqrt(stats.chi2.isf(1e-12, g) / g)
+    meio, raio = (s_max + s_min) / 2, (s_max - s_min) / 2
+    s = meio + raio * _NOS_S
+    peso_s = raio * _PESOS_S * np.exp(stats.chi.logpdf(s * np.sqrt(g), g) + 0.5 * np.log(g))
+    cdf_w = np.interp(q[validos, None] * s, grade_w, grade_cdf)
+    sf[validos] = np.clip(np.sum(peso_s * (1.0 - cdf_w), axis=1), 0.0, 1.0)
+    return sf
+
+def comparacoes_post_hoc(amostras, nomes, metodo="tukey", alfa=0.05):
+    """Tukey HSD (variância combinada, gl = N - k) ou Games-Howell (variâncias separadas, gl de Welch) para
+    todos os pares de grupos numa única passada. amostras: lista de arrays (réplicas de cada grupo, NaN ignorado).
+    Retorna (tabela longa dos pares, matriz G x G dos valores-p)."""
+    amostras = [np.asarray(a, dtype=float)[np.isfinite(np.asarray(a, dtype=float))] for a in amostras]
+    nomes = [str(nome) for nome in nomes]
+    k = len(amostras)
+    n = np.array([len(a) for a in amostras], dtype=float)
+    media = np.array([a.mean() if len(a) else np.nan for a in amostras])
+    variancia = np.array([a.var(ddof=1) if len(a) > 1 else np.nan for a in amostras])
+    i, j = np.triu_indices(k, 1)
+    diferenca = media[i] - media[j]
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if metodo == "tukey":
+            gl = np.full(len(i), n.sum() - k)
+            quadrado_medio = np.nansum((n - 1) * variancia) / gl
+            erro_padrao = np.sqrt(quadrado_medio / 2 * (1 / n[i] + 1 / n[j]))
+        elif metodo == "games-howell":
+            a = variancia / n
+            erro_padrao = np.sqrt((a[i] + a[j]) / 2)
+            gl = (a[i] + a[j])**2 / (a[i]**2 / (n[i] - 1) + a[j]**2 / (n[j] - 1))
+        else:
+            raise ValueError(f"Método post-hoc desconhecido: {metodo}")
+        q = np.abs(diferenca) / erro_padrao
+    
+    p = sf_amplitude_studentizada(q, k, gl)
+    df_pares = pd.DataFrame({
+        "Grupo_A": np.array(nomes, dtype=object)[i],
+        "Grupo_B": np.array(nomes, dtype=object)[j],
+        "Diferenca": diferenca,
+        "EP": erro_padrao,
+        "q": q,
+        "GL": gl,
+        "p": p,
+        "Significante": p < alfa,
+    })
+    matriz_p = np.full((k, k), np.nan)
+    matriz_p[i, j] = p
+    matriz_p[j, i] = p
+    return df_pares, pd.DataFrame(matriz_p, index=nomes, columns=nomes)
+
+# --- Função de Cálculo f2 ---
+def calcular_f2(df_agg, grupo_R, grupo_T, col_grupo, y_axis_mean):
+    """Calcula o Fator de Similaridade f2 entre dois grupos."""
+    
+    df_R = df_agg[df_agg[col_grupo] == grupo_R][['Tempo', y_axis_mean]].rename(columns={y_axis_mean: 'R'})
+    df_T = df_agg[df_agg[col_grupo] == grupo_T][['Tempo', y_axis_mean]].rename(columns={y_axis_mean: 'T'})
+    
+    df_merged = pd.merge(df_R, df_T, on='Tempo')
+    df_merged = df_merged[df_merged['Tempo'] > 0]
+    
+    if df_merged.empty:
+        return None
+        
+    n = len(df_merged)
+    sum_sq_diff = np.sum((df_merged['R'] - df_merged['T'])**2)
+    
+    f2_termo_interno = 1 + (1 / n) * sum_sq_diff
+    f2 = 50 * np.log10(100 / np.sqrt(f2_termo_interno))
+    
+    return f2
+
+# --- Matriz f2 de Todos os Pares ---
+def calcular_matriz_f2(df_agg, col_grupo, y_axis_mean):
+    """f2 de todos os pares de grupos de uma vez (pivot G x T, tempos > 0). Cada par usa os tempos em comum,
+    como calcular_f2; NaN quando não há tempos em comum. Retorna um DataFrame G x G (linha = R, coluna = T)."""
+    df = df_agg[df_agg['Tempo'] > 0]
+    pivot = df.pivot_table(index=col_grupo, columns='Tempo', values=y_axis_mean, aggfunc='first', sort=False, dropna=False)
+    X = pivot.to_numpy(dtype=float)
+    presente = np.isfinite(X)
+    comum = presente[:, None, :] & presente[None, :, :]               # (G, G, T)
+    dif = np.where(comum, X[:, None, :] - X[None, :, :], 0.0)
+    n_comuns = comum.sum(axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f2 = 50 * np.log10(100 / np.sqrt(1 + np.sum(dif**2, axis=2) / n_comuns))
+    f2 = np.where(n_comuns > 0, f2, np.nan)
+    return pd.DataFrame(f2, index=pivot.index, columns=pivot.index)
+
+# --- f2 Bootstrap (variantes esperada e com correção de viés) ---
+def _f2_de_soma(soma_quadrados, n_pontos):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 50 * np.log10(100 / np.sqrt(1 + soma_quadrados / n_pontos))
+
+def _variantes_f2(R, T):
+    """f2, f2 esperado e f2 com correção de viés a partir de réplicas R (..., nR, P) e T (..., nT, P).
+    Correção de viés só definida quando o termo de variância é menor que a soma das diferenças ao quadrado."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        media_R, media_T = np.nanmean(R, axis=-2), np.nanmean(T, axis=-2)
+        var_R, var_T = np.nanvar(R, axis=-2, ddof=1), np.nanvar(T, axis=-2, ddof=1)
+    n_R, n_T = np.sum(np.isfinite(R), axis=-2), np.sum(np.isfinite(T), axis=-2)
+    n_pontos = R.shape[-1]
+    soma_dif = np.sum((media_R - media_T)**2, axis=-1)
+    termo_var = np.sum(var_R / n_R + var_T / n_T, axis=-1)
+    return {
+        "f2": _f2_de_soma(soma_dif, n_pontos),
+        "f2_esperado": _f2_de_soma(soma_dif + termo_var, n_pontos),
+        "f2_corrigido": np.where(termo_var < soma_dif, _f2_de_soma(soma_dif - termo_var, n_pontos), np.nan),
+    }
+
+def calcular_f2_bootstrap(t_R, Y_R, t_T, Y_T, n_boot=10000, seed=0, tamanho_bloco=5000):
+    """f2 bootstrap: reamostra os perfis de réplica de R e T (independentes, com reposição) e calcula as três
+    variantes de f2 para todas as reamostragens de uma vez. Usa os tempos comuns com t > 0.
+    Retorna None se não houver tempos comuns; senão um dict com 'observado' (f2 dos dados originais),
+    'resumo' (DataFrame com média, mediana, P5 e P95 por variante) e 'amostras' (arrays do bootstrap)."""
+    t_R, t_T = np.asarray(t_R, dtype=float), np.asarray(t_T, dtype=float)
+    comuns = np.intersect1d(t_R[t_R > 0], t_T[t_T > 0])
+    if len(comuns) == 0:
+        return None
+    Y_R = np.asarray(Y_R, dtype=float)[:, np.searchsorted(t_R, comuns)]
+    Y_T = np.asarray(Y_T, dtype=float)[:, np.searchsorted(t_T, comuns)]
+
+    h = hashlib.sha1()
+    for arr in (comuns, Y_R, Y_T):
+        h.update(np.ascontiguousarray(arr).tobytes())
+    h.update(f"|f2|{Y_R.shape}|{Y_T.shape}|{n_boot}|{seed}".encode('utf-8'))
+    chave = h.hexdigest()
+    resultado = CACHE_BOOTSTRAP.get(chave)
+    if resultado is not None:
+        return resultado
+
+    rng = np.random.default_rng(seed)
+    n_R, n_T = Y_R.shape[0], Y_T.shape[0]
+    amostras = {"f2": [], "f2_esperado": [], "f2_corrigido": []}
+    for inicio in range(0, n_boot, tamanho_bloco):
+        b = min(tamanho_bloco, n_boot - inicio)
+        variantes = _variantes_f2(Y_R[rng.integers(0, n_R, size=(b, n_R))], Y_T[rng.integers(0, n_T, size=(b, n_T))])
+        for nome, valores in variantes.items():
+            amostras[nome].append(valores)
+    amostras = {nome: np.concatenate(partes) for nome, partes in amostras.items()}
+
+    observado = {nome: float(valor) for nome, valor in _variantes_f2(Y_R, Y_T).items()}
+    linhas = []
+    for nome, valores in amostras.items():
+        validos = valores[np.isfinite(valores)]
+        p5, mediana, p95 = np.percentile(validos, [5, 50, 95]) if len(validos) else (np.nan, np.nan, np.nan)
+        linhas.append({"Variante": nome, "Observado": observado[nome], "Media_Boot": validos.mean() if len(validos) else np.nan,
+                       "Mediana_Boot": mediana, "P5": p5, "P95": p95, "N_Validos": len(validos)})
+    resultado = {"observado": observado, "resumo": pd.DataFrame(linhas), "amostras": amostras, "n_pontos": len(comuns)}
+    CACHE_BOOTSTRAP.put(chave, resultado)
+    return resultado
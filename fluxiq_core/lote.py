@@ -0,0 +1,193 @@
+"""Execução em lote, sem interface: lê exportações de células de Franz em formato largo, roda o pipeline de
+liberação ou de permeação em cada arquivo (pool de processos) e consolida os resultados. Usado pelo fluxiq_lote.py."""
+import os
+import time
+import warnings
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from .processamento import processar_matriz_larga, montar_df_agregado, montar_metricas_replicas
+from .cinetica import rodar_modelagem_lote_v12
+from .permeacao import (somas_prefixo, curvas_medias_perm, detectar_janelas_grupos, parametros_perm_grupos,
+                        parametros_perm_replicas, ajustar_crank_perm, ajustar_dose_finita_perm, perfis_fluxo_perm)
+
+EXTENSOES_LOTE = ('.csv', '.txt', '.xlsx', '.xls')
+
+# Parâmetros do arquivo JSON; doses, C0 e volume doador aceitam um valor por grupo ({grupo: valor}) com padrão
+PARAMETROS_PADRAO = {
+    'modulo': 'release',            # 'release' ou 'permeation'
+    'sep': ',', 'decimal': '.',     # Leitura de CSV/TXT
+    'vol_celula': 12.0, 'vol_amostra': 1.0,
+    'cal_a': 1.0, 'cal_b': 0.0,     # Sinal = a·C + b
+    'tempo_em_minutos': False,
+    'unidade_massa': 'mg',
+    # Liberação: dose total por grupo (0 = sem dose; ajuste em quantidade acumulada)
+    'dose': {}, 'dose_padrao': 0.0,
+    'excluir_t_zero': True,
+    # Permeação
+    'area': 1.77, 'espessura': 0.05,
+    'c0': {}, 'c0_padrao': 10.0,
+    'dose_finita': False, 'vol_doador': {}, 'vol_doador_padrao': 1.0,
+    'ajuste_perfil': True,          # Crank (dose infinita) ou modelo doador/membrana/receptor (dose finita)
+}
+
+def ler_arquivo_largo(caminho, sep=',', decimal='.'):
+    """Lê um arquivo em formato largo (CSV/TXT ou Excel), com a mesma tentativa de codificação do app."""
+    if caminho.lower().endswith(('.xlsx', '.xls')):
+        return pd.read_excel(caminho)
+    try:
+        return pd.read_csv(caminho, sep=sep, decimal=decimal, encoding='utf-8')
+    except UnicodeDecodeError:
+        return pd.read_csv(caminho, sep=sep, decimal=decimal, encoding='latin-1')
+
+def _por_grupo(parametros, chave, grupos):
+    """{grupo: valor} a partir de parametros[chave] (dict por grupo) e de parametros[chave + '_padrao']."""
+    valores = parametros.get(chave) or {}
+    return {g: float(valores.get(str(g), parametros[f'{chave}_padrao'])) for g in grupos}
+
+def configuracao_lote(df_wide, parametros):
+    """doses_dict e config equivalentes aos montados na Etapa 1 do app para os parâmetros do lote."""
+    col_amostra, col_grupo = df_wide.columns[0], df_wide.columns[1]
+    grupos = df_wide[col_grupo].unique()
+    config = {
+        'col_amostra_nome': col_amostra, 'col_grupo': col_grupo,
+        'col_conc': 'Conc', 'col_q_acumulada': 'Q_Acumulada', 'col_percent': 'Percent',
+        'unidade_massa': parametros['unidade_massa'],
+        'vol_celula': parametros['vol_celula'], 'vol_amostra': parametros['vol_amostra'],
+    }
+    if parametros['modulo'] == 'permeation':
+        c0_dict = _por_grupo(parametros, 'c0', grupos)
+        vol_doador = _por_grupo(parametros, 'vol_doador', grupos) if parametros['dose_finita'] else {}
+        # Dose infinita: dose total fictícia (> 0), como no app; dose finita: C0 x volume aplicado
+        doses_dict = {g: {'dose_total': c0_dict[g] * vol_doador[g] if parametros['dose_finita'] else 1.0} for g in grupos}
+        config.update({'membrane_area': parametros['area'], 'membrane_thickness': parametros['espessura'],
+                       'c0_dict': c0_dict, 'vol_doador_dict': vol_doador,
+                       'y_axis_mean': 'Média_Q_Acumulada', 'y_axis_col': config['col_q_acumulada']})
+    else:
+        doses_dict = {g: {'dose_total': dose} for g, dose in _por_grupo(parametros, 'dose', grupos).items()}
+        has_dose_info = any(d['dose_total'] > 0 for d in doses_dict.values())
+        config.update({'has_dose_info': has_dose_info, 'doses_dict': doses_dict,
+                       'y_axis_mean': 'Média_Percent' if has_dose_info else 'Média_Q_Acumulada',
+                       'y_axis_col': config['col_percent'] if has_dose_info else config['col_q_acumulada']})
+    return doses_dict, config
+
+def analisar_liberacao(matriz, config, parametros):
+    """Tabelas da liberação: agregada, métricas por réplica e ajuste dos 7 modelos à curva média de cada grupo."""
+    df_agg = montar_df_agregado(matriz, config)
+    dados_modelagem = {}
+    for grupo, df_grupo in df_agg.groupby(config['col_grupo'], sort=False):
+        if parametros['excluir_t_zero']:
+            df_grupo = df_grupo[df_grupo['Tempo'] > 0]
+        if len(df_grupo) >= 3:
+            dados_modelagem[grupo] = (df_grupo['Tempo'].to_numpy(dtype=float), df_grupo[config['y_axis_mean']].to_numpy(dtype=float))
+    df_modelos = rodar_modelagem_lote_v12(dados_modelagem, config['has_dose_info'], parametros['excluir_t_zero'])
+    return {
+        'agregado': df_agg,
+        'metricas_replicas': montar_metricas_replicas(matriz, config),
+        'modelos': df_modelos.reset_index(),
+    }, df_modelos.reset_index()
+
+def analisar_permeacao(matriz, config, parametros):
+    """Tabelas da permeação: agregada, parâmetros na janela de steady-state detectada (grupos e réplicas),
+    picos de fluxo e, opcionalmente, o ajuste do perfil completo (Crank ou dose finita)."""
+    df_agg = montar_df_agregado(matriz, config)
+    curvas = curvas_medias_perm(df_agg, config['col_grupo'], config['y_axis_mean'])
+    janelas = {g: j[:2] for g, j in detectar_janelas_grupos({g: somas_prefixo(t, q) for g, (t, q) in curvas.items()}).items()
+               if j is not None}
+    df_grupos = parametros_perm_grupos(matriz, config, janelas)
+    tabelas = {
+        'agregado': df_agg,
+        'parametros_grupos': df_grupos,
+        'parametros_replicas': parametros_perm_replicas(matriz, config, janelas),
+        'fluxo_picos': perfis_fluxo_perm(matriz, config)[1],
+    }
+    if parametros['ajuste_perfil']:
+        ajuste = ajustar_dose_finita_perm if parametros['dose_finita'] else ajustar_crank_perm
+        tabelas['ajuste_perfil_replicas'], tabelas['ajuste_perfil_grupos'] = ajuste(matriz, config)
+    return tabelas, df_grupos
+
+def destinos_saida(caminhos):
+    """(rótulo, pasta) de cada arquivo, únicos no lote: rótulo = caminho relativo à raiz comum das entradas (com
+    extensão, vai na coluna Arquivo) e pasta = esse caminho sem extensão. Arquivos que só diferem na extensão (ou na
+    caixa, em sistemas que não a distinguem) recebem a extensão e, se preciso, um sufixo numérico na pasta."""
+    absolutos = [os.path.abspath(c) for c in caminhos]
+    if len(set(absolutos)) != len(absolutos):
+        raise ValueError("Arquivo repetido na lista de entradas.")
+    if not absolutos:
+        return []
+    raiz = os.path.commonpath([os.path.dirname(c) for c in absolutos])
+    rotulos = [os.path.relpath(c, raiz).replace(os.sep, '/') for c in absolutos]
+    pastas = [os.path.splitext(r)[0] for r in rotulos]
+
+    contagem = {}
+    for pasta in pastas:
+        contagem[pasta.lower()] = contagem.get(pasta.lower(), 0) + 1
+    pastas = [f"{pasta}_{os.path.splitext(r)[1].lstrip('.')}" if contagem[pasta.lower()] > 1 else pasta
+              for pasta, r in zip(pastas, rotulos)]
+    usadas, unicas = set(), []
+    for pasta in pastas:
+        candidata, n = pasta, 2
+        while candidata.lower() in usadas:
+            candidata, n = f"{pasta}_{n}", n + 1
+        usadas.add(candidata.lower())
+        unicas.append(candidata)
+    return list(zip(rotulos, unicas))
+
+def analisar_arquivo(caminho, parametros, pasta_saida=None, destino=None):
+    """Pipeline completo de um arquivo. Grava as tabelas em pasta_saida/<pasta>/ (quando informada) e retorna
+    (linhas do resumo consolidado, erro). destino = (rótulo, pasta) de destinos_saida; sem ele, usa o nome do
+    arquivo e o nome sem extensão. Erros de leitura ou de cálculo não interrompem o lote."""
+    parametros = {**PARAMETROS_PADRAO, **parametros}
+    rotulo, pasta_relativa = destino or (os.path.basename(caminho), os.path.splitext(os.path.basename(caminho))[0])
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            df_wide = ler_arquivo_largo(caminho, parametros['sep'], parametros['decimal'])
+            doses_dict, config = configuracao_lote(df_wide, parametros)
+            matriz = processar_matriz_larga(df_wide, parametros['vol_celula'], parametros['vol_amostra'], parametros['cal_a'],
+                                            parametros['cal_b'], doses_dict, tempo_em_minutos=parametros['tempo_em_minutos'])
+            analisar = analisar_permeacao if parametros['modulo'] == 'permeation' else analisar_liberacao
+            tabelas, resumo = analisar(matriz, config, parametros)
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+    if pasta_saida is not None:
+        pasta = os.path.join(pasta_saida, *pasta_relativa.split('/'))
+        os.makedirs(pasta, exist_ok=True)
+        for nome, df in tabelas.items():
+            df.to_csv(os.path.join(pasta, f"{nome}.csv"), index=False)
+    resumo = resumo.rename(columns={config['col_grupo']: 'Grupo'})
+    resumo.insert(0, 'Arquivo', rotulo)
+    return resumo, None
+
+def _tarefa_arquivo(argumentos):
+    caminho, parametros, pasta_saida, destino = argumentos
+    return (caminho, *analisar_arquivo(caminho, parametros, pasta_saida, destino))
+
+def executar_lote(caminhos, parametros, pasta_saida=None, n_workers=1, ao_concluir=None):
+    """Roda analisar_arquivo em todos os caminhos (n_workers processos quando > 1, em blocos para amortizar a
+    comunicação). Cada arquivo grava numa pasta própria (destinos_saida), definida antes de abrir o pool.
+    Retorna (df_consolidado, df_erros, segundos); ao_concluir(i, caminho, erro) acompanha o progresso."""
+    tarefas = [(caminho, parametros, pasta_saida, destino) for caminho, destino in zip(caminhos, destinos_saida(caminhos))]
+    inicio = time.perf_counter()
+    if n_workers > 1 and len(tarefas) > 1:
+        executor = ProcessPoolExecutor(max_workers=n_workers)
+        resultados = executor.map(_tarefa_arquivo, tarefas, chunksize=max(1, len(tarefas) // (4 * n_workers)))
+    else:
+        executor = None
+        resultados = map(_tarefa_arquivo, tarefas)
+    resumos, erros = [], []
+    try:
+        for i, (caminho, resumo, erro) in enumerate(resultados, 1):
+            if erro is None:
+                resumos.append(resumo)
+            else:
+                erros.append({'Arquivo': caminho, 'Erro': erro})
+            if ao_concluir is not None:
+                ao_concluir(i, caminho, erro)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    segundos = time.perf_counter() - inicio
+    df_consolidado = pd.concat(resumos, ignore_index=True) if resumos else pd.DataFrame()
+    return df_consolidado, pd.DataFrame(erros, columns=['Arquivo', 'Erro']), segundos
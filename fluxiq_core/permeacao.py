@@ -0,0 +1,441 @@
+"""Permeação: regressão por somas de prefixo e detecção do steady-state, parâmetros (Jss, T_lag, Kp, D),
+ajuste de Crank (dose infinita), modelo doador/membrana/receptor (dose finita) e perfis de fluxo."""
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scipy.optimize import curve_fit
+from scipy.linalg import eigh_tridiagonal
+from functools import lru_cache
+import warnings
+
+from .processamento import matriz_y_replicas
+from .cinetica import empilhar_curvas, r2_lote, levenberg_marquardt_lote
+
+# --- Regressão por Somas de Prefixo e Detecção Automática do Steady-State ---
+ALFA_CURVATURA_STEADY_STATE = 0.05  # Janela aceita como linear se o termo quadrático não é significante (p >= alfa)
+N_MIN_STEADY_STATE = 4  # Mínimo para testar a curvatura (ajuste quadrático com 1 grau de liberdade no resíduo)
+
+def somas_prefixo(t, q):
+    """Somas acumuladas (com zero inicial) de 1, t, q, t², t·q, q², t³, t⁴ e t²·q de uma curva ordenada no tempo.
+    t e q são centrados na média para reduzir o cancelamento numérico nas diferenças de somas."""
+    t = np.asarray(t, dtype=float)
+    q = np.asarray(q, dtype=float)
+    t0, q0 = (t.mean(), q.mean()) if len(t) else (0.0, 0.0)
+    tc, qc = t - t0, q - q0
+    termos = np.column_stack([np.ones_like(tc), tc, qc, tc**2, tc * qc, qc**2, tc**3, tc**4, tc**2 * qc])
+    return {
+        'tempos': t, 'valores': q, 't0': t0, 'q0': q0,
+        'somas': np.vstack([np.zeros((1, termos.shape[1])), np.cumsum(termos, axis=0)]),
+    }
+
+def _somas_janela(prefixo, i, j):
+    """Somas da janela i..j (inclusive), uma linha por janela, na ordem das colunas de somas_prefixo."""
+    return np.moveaxis(prefixo['somas'][np.asarray(j) + 1] - prefixo['somas'][np.asarray(i)], -1, 0)
+
+def regressao_janelas(prefixo, i, j):
+    """Inclinação, intercepto e R² da regressão linear nos pontos i..j (inclusive), em O(1) por janela a partir
+    das somas de prefixo; i e j podem ser arrays (todas as janelas de uma vez). R² = 0 sem variação, como no linregress."""
+    n, st_, sq, stt, stq, sqq = _somas_janela(prefixo, i, j)[:6]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sxx = stt - st_**2 / n
+        sxy = stq - st_ * sq / n
+        syy = sqq - sq**2 / n
+        inclinacao = sxy / sxx
+        intercepto = (sq - inclinacao * st_) / n + prefixo['q0'] - inclinacao * prefixo['t0']
+        r2 = np.where((sxx > 0) & (syy > 0), sxy**2 / (sxx * syy), 0.0)
+    return inclinacao, intercepto, np.clip(r2, 0.0, 1.0)
+
+def f_curvatura_janelas(prefixo, i, j):
+    """Estatística F (1 e n - 3 graus de liberdade) do termo quadrático (Q = a + b·t + c·t²) em cada janela i..j,
+    também em O(1) por janela: a redução da soma de quadrados pelo t² é a regressão parcial de Q em t² descontada
+    a parte já explicada por t."""
+    n, st_, sq, stt, stq, sqq, sttt, stttt, sttq = _somas_janela(prefixo, i, j)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s_tt = stt - st_**2 / n
+        s_tq = stq - st_ * sq / n
+        s_qq = sqq - sq**2 / n
+        s_ut = sttt - stt * st_ / n
+        s_uu = stttt - stt**2 / n
+        s_uq = sttq - stt * sq / n
+        sse_linear = s_qq - s_tq**2 / s_tt
+        reducao = (s_uq - s_ut * s_tq / s_tt)**2 / (s_uu - s_ut**2 / s_tt)
+        sse_quadratico = np.maximum(sse_linear - reducao, 0.0)
+        f = reducao / (sse_quadratico / (n - 3))
+    # Ajuste exato (sem resíduo): linear se o termo quadrático nada reduz
+    exato = sse_quadratico <= 1e-12 * np.maximum(s_qq, np.finfo(float).tiny)
+    return np.where(exato, np.where(reducao <= 1e-12 * s_qq, 0.0, np.inf), f)
+
+def detectar_janela_steady_state(prefixo, alfa=ALFA_CURVATURA_STEADY_STATE, n_min=N_MIN_STEADY_STATE):
+    """Índices (i, j) e R² da janela contígua de steady-state: a mais longa com inclinação positiva e sem curvatura
+    significante (p >= alfa no teste do termo quadrático), com empate decidido pelo maior R²; sem nenhuma assim, a de
+    maior R². Varre os comprimentos do maior para o menor, todas as janelas de um comprimento numa operação vetorizada
+    (o F crítico é o mesmo para todas elas)."""
+    n = len(prefixo['tempos'])
+    if n < 2:
+        return None
+    if n < n_min:
+        inclinacao, _, r2 = regressao_janelas(prefixo, 0, n - 1)
+        return (0, n - 1, float(r2)) if inclinacao > 0 else None
+    melhor = None
+    for tamanho in range(n, n_min - 1, -1):
+        i = np.arange(n - tamanho + 1)
+        j = i + tamanho - 1
+        inclinacao, _, r2 = regressao_janelas(prefixo, i, j)
+        r2 = np.where(inclinacao > 0, r2, -1.0)
+        lineares = (r2 >= 0) & (f_curvatura_janelas(prefixo, i, j) <= stats.f.isf(alfa, 1, tamanho - 3))
+        if lineares.any():
+            k = int(np.argmax(np.where(lineares, r2, -1.0)))
+            return int(i[k]), int(j[k]), float(r2[k])
+        k = int(np.argmax(r2))
+        if r2[k] >= 0 and (melhor is None or r2[k] > melhor[2]):
+            melhor = (int(i[k]), int(j[k]), float(r2[k]))
+    return melhor
+
+def curvas_medias_perm(df_agg, col_grupo, y_axis_mean):
+    """Curva média (t, Q) de cada grupo usada no ajuste do steady-state (pontos com Q >= 0, ordenados no tempo)."""
+    curvas = {}
+    for grupo, df_grupo in df_agg[df_agg[y_axis_mean] >= 0].groupby(col_grupo, sort=False):
+        df_grupo = df_grupo.sort_values('Tempo')
+        curvas[grupo] = (df_grupo['Tempo'].to_numpy(dtype=float), df_grupo[y_axis_mean].to_numpy(dtype=float))
+    return curvas
+
+def detectar_janelas_grupos(prefixos):
+    """Janela de steady-state detectada para cada grupo: {grupo: (t_inicial, t_final, R², n_pontos)} ou None."""
+    janelas = {}
+    for grupo, prefixo in prefixos.items():
+        janela = detectar_janela_steady_state(prefixo)
+        t = prefixo['tempos']
+        janelas[grupo] = None if janela is None else (t[janela[0]], t[janela[1]], janela[2], janela[1] - janela[0] + 1)
+    return janelas
+
+# --- Perfis de Fluxo Instantâneo (dQ/dt/A por réplica) ---
+# Derivada por regressão polinomial local (Savitzky-Golay para tempos não uniformes): os pesos dependem só da grade
+# de tempos, então uma única matriz n_tempos x n_tempos deriva todas as réplicas num produto matricial.
+PONTOS_FLUXO_PADRAO = 5
+GRAU_FLUXO = 2
+
+def pesos_derivada_local(tempos, n_pontos=PONTOS_FLUXO_PADRAO, grau=GRAU_FLUXO):
+    """Matriz W com dQ/dt(t_i) = Σ_j W[i, j]·Q(t_j): polinômio de grau 'grau' ajustado aos n_pontos vizinhos de
+    cada tempo (janela centrada, deslocada nas bordas). Todas as janelas são resolvidas numa pseudo-inversa em lote."""
+    n_t = len(tempos)
+    n_pontos = min(n_pontos, n_t)
+    grau = min(grau, n_pontos - 1)
+    inicio = np.clip(np.arange(n_t) - n_pontos // 2, 0, n_t - n_pontos)
+    indices = inicio[:, None] + np.arange(n_pontos)
+    dt = tempos[indices] - tempos[:, None]
+    vandermonde = dt[:, :, None] ** np.arange(grau + 1)
+    # Linha 1 da pseudo-inversa: coeficiente linear do polinômio centrado em t_i (= derivada em t_i)
+    derivada = np.linalg.pinv(vandermonde)[:, 1, :]
+    W = np.zeros((n_t, n_t))
+    np.put_along_axis(W, indices, derivada, axis=1)
+    return W
+
+def perfis_fluxo(tempos, Y, area, n_pontos=PONTOS_FLUXO_PADRAO):
+    """Fluxo instantâneo (dQ/dt/A; dQ/dt sem área) de todas as linhas de Y, com o pico e o tempo do pico de cada uma.
+    Tempos cuja janela contém valores ausentes ficam NaN."""
+    W = pesos_derivada_local(tempos, n_pontos)
+    presente = np.isfinite(Y)
+    fluxo = np.where(presente, Y, 0.0) @ W.T
+    fluxo[(~presente).astype(float) @ (W != 0).T > 0] = np.nan
+    if area > 0:
+        fluxo = fluxo / area
+    validas = np.isfinite(fluxo).any(axis=1)
+    i_pico = np.argmax(np.where(np.isfinite(fluxo), fluxo, -np.inf), axis=1)
+    pico = np.where(validas, fluxo[np.arange(len(fluxo)), i_pico], np.nan)
+    t_pico = np.where(validas, tempos[i_pico], np.nan)
+    return fluxo, pico, t_pico
+
+def perfis_fluxo_perm(matriz, config, n_pontos=PONTOS_FLUXO_PADRAO):
+    """Perfis de fluxo das réplicas a partir da matriz processada. Retorna (df_fluxo, df_picos): df_fluxo com média
+    e SD por grupo e tempo; df_picos com o pico de fluxo e o tempo do pico de cada réplica."""
+    tempos, grupos = matriz['tempos'], matriz['grupos']
+    fluxo, pico, t_pico = perfis_fluxo(tempos, matriz['q_acumulada'], config.get('membrane_area', 0.0), n_pontos)
+    col_grupo = config['col_grupo']
+    linhas = []
+    for grupo in matriz['grupos_unicos']:
+        bloco = fluxo[grupos == grupo]
+        n = np.isfinite(bloco).sum(axis=0)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            media = np.nanmean(bloco, axis=0)
+            sd = np.where(n > 1, np.nanstd(bloco, axis=0, ddof=1), np.nan)
+        linhas.append(pd.DataFrame({col_grupo: grupo, 'Tempo': tempos, 'Média_Fluxo': media, 'SD_Fluxo': sd, 'N': n}))
+    df_fluxo = pd.concat(linhas, ignore_index=True)
+    df_picos = pd.DataFrame({col_grupo: grupos, config['col_amostra_nome']: matriz['amostras'], 'Fluxo_Pico': pico, 'T_Pico': t_pico})
+    return df_fluxo, df_picos
+
+# --- Motor de Parâmetros de Permeação (todos os grupos e réplicas de uma vez) ---
+def parametros_permeacao(inclinacao, intercepto, area, espessura, c0):
+    """Jss, T_lag, Kp e D a partir da reta do steady-state (escalares ou arrays; c0 pode variar por linha).
+    Jss = inclinação / área, T_lag = -intercepto / inclinação (>= 0), Kp = Jss / C0 e D = h² / (6·T_lag)."""
+    inclinacao = np.asarray(inclinacao, dtype=float)
+    intercepto = np.asarray(intercepto, dtype=float)
+    c0 = np.asarray(c0, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jss = inclinacao / area if area > 0 else np.zeros_like(inclinacao)
+        t_lag = np.maximum(np.where(inclinacao != 0, -intercepto / inclinacao, 0.0), 0)
+        kp = np.where((c0 > 0) & (jss != 0), jss / c0, 0.0)
+        d_coeff = np.where((t_lag > 0) & (espessura > 0), espessura**2 / (6 * t_lag), 0.0)
+    return {'Jss': jss, 'T_lag': t_lag, 'Kp': kp, 'D': d_coeff}
+
+def regressao_linhas(tempos, Y, t_inicial, t_final):
+    """Regressão linear de cada linha de Y (N x T, NaN = ausente) nos pontos com t_inicial <= t <= t_final da linha,
+    todas as linhas numa passada (somas mascaradas, centradas na média de cada janela). Retorna (n, inclinação,
+    intercepto, R²); linhas com menos de 2 pontos ficam NaN e R² = 0 sem variação, como no linregress."""
+    tempos = np.asarray(tempos, dtype=float)
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    na_janela = np.isfinite(Y) & (tempos >= np.asarray(t_inicial, dtype=float)[:, None]) & (tempos <= np.asarray(t_final, dtype=float)[:, None])
+    n = na_janela.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_medio = np.where(na_janela, tempos, 0.0).sum(axis=1) / n
+        q_medio = np.where(na_janela, Y, 0.0).sum(axis=1) / n
+        dt = np.where(na_janela, tempos - t_medio[:, None], 0.0)
+        dq = np.where(na_janela, Y - q_medio[:, None], 0.0)
+        sxx, sxy, syy = (dt**2).sum(axis=1), (dt * dq).sum(axis=1), (dq**2).sum(axis=1)
+        inclinacao = sxy / sxx
+        intercepto = q_medio - inclinacao * t_medio
+        r2 = np.where((sxx > 0) & (syy > 0), sxy**2 / (sxx * syy), 0.0)
+    validas = n >= 2
+    return n, np.where(validas, inclinacao, np.nan), np.where(validas, intercepto, np.nan), np.where(validas, r2, np.nan)
+
+def _parametros_janelas(tempos, Y, grupos_linhas, janelas, config):
+    """Tabela (uma linha por linha de Y) com a janela do grupo da linha, a regressão e os quatro parâmetros."""
+    janela_linhas = np.array([janelas.get(g, (np.nan, np.nan))[:2] for g in grupos_linhas], dtype=float).reshape(-1, 2)
+    n, inclinacao, intercepto, r2 = regressao_linhas(tempos, Y, janela_linhas[:, 0], janela_linhas[:, 1])
+    c0 = np.array([config.get('c0_dict', {}).get(g, 0.0) for g in grupos_linhas], dtype=float)
+    parametros = parametros_permeacao(inclinacao, intercepto, config.get('membrane_area', 0.0), config.get('membrane_thickness', 0.0), c0)
+    validas = n >= 2
+    return pd.DataFrame({
+        'T_Inicial': janela_linhas[:, 0], 'T_Final': janela_linhas[:, 1], 'N': n,
+        **{nome: np.where(validas, valores, np.nan) for nome, valores in parametros.items()},
+        'R2': r2,
+    })
+
+def parametros_perm_replicas(matriz, config, janelas):
+    """Jss, T_lag, Kp, D e R² de todas as réplicas de todos os grupos numa chamada, cada réplica na janela
+    {grupo: (t_inicial, t_final)} do seu grupo (réplicas de grupos sem janela ficam NaN)."""
+    Y, _ = matriz_y_replicas(matriz, config)
+    df = _parametros_janelas(matriz['tempos'], Y, matriz['grupos'], janelas, config)
+    df.insert(0, config['col_amostra_nome'], matriz['amostras'])
+    df.insert(0, config['col_grupo'], matriz['grupos'])
+    return df
+
+def parametros_perm_grupos(matriz, config, janelas):
+    """Os mesmos parâmetros para a curva média de cada grupo (pontos com média >= 0, como na P-Etapa 4)."""
+    _, usar_percent = matriz_y_replicas(matriz, config)
+    medias = matriz['media_pct'] if usar_percent else matriz['media_q']
+    medias = np.where((matriz['n_replicas'] > 0) & (medias >= 0), medias, np.nan)
+    df = _parametros_janelas(matriz['tempos'], medias, matriz['grupos_unicos'], janelas, config)
+    df.insert(0, config['col_grupo'], matriz['grupos_unicos'])
+    return df
+
+# --- Ajuste do Perfil Completo pela Solução de Crank (dose infinita) ---
+# Q(t) / (A·C0) = K·h·[D·t/h² - 1/6 - (2/π²)·Σ (-1)^n/n²·exp(-D·n²·π²·t/h²)]. Com s = K·D/h (= Kp, inclinação
+# do steady-state) e L = h²/(6·D) (= T_lag): y = s·(t - L) - (12·s·L/π²)·Σ (-1)^n/n²·exp(-n²·π²·t/(6·L)).
+# Nessa forma o caso sem latência (L -> 0, D -> infinito) é um limite finito do parâmetro, tratado pela projeção do LM.
+N_TERMOS_CRANK = 100
+_N_CRANK = np.arange(1, N_TERMOS_CRANK + 1, dtype=float)
+_EXPOENTES_CRANK = (_N_CRANK * np.pi)**2 / 6
+_SINAIS_CRANK = (-1.0)**_N_CRANK
+MAX_ITER_CRANK = 200
+
+def _exponenciais_crank(t, t_lag):
+    """exp(-n²·π²·t/(6·L)) para todos os pontos x termos (zero quando L = 0)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        razao = np.where(t_lag > 0, t / t_lag, np.inf)
+    return np.exp(-np.multiply.outer(razao, _EXPOENTES_CRANK))
+
+def model_crank(t, s, t_lag):
+    """Série truncada de Crank (termos x pontos numa única exponencial matricial)."""
+    serie = _exponenciais_crank(t, t_lag) @ (_SINAIS_CRANK / _N_CRANK**2)
+    return s * (t - t_lag) - 12 * s * t_lag / np.pi**2 * serie
+
+def jac_crank(t, s, t_lag):
+    """Jacobiano analítico (dy/ds, dy/dL) da série de Crank, formato n_pontos x 2."""
+    exponenciais = _exponenciais_crank(t, t_lag)
+    serie = exponenciais @ (_SINAIS_CRANK / _N_CRANK**2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        razao = np.where(t_lag > 0, t / t_lag, 0.0)
+    d_s = (t - t_lag) - 12 * t_lag / np.pi**2 * serie
+    d_lag = -s - 12 * s / np.pi**2 * serie - 2 * s * razao * (exponenciais @ _SINAIS_CRANK)
+    # Em t = 0 a série vale zero para qualquer L (o limite L -> 0 não é uniforme nesse ponto)
+    d_lag = np.where(t > 0, d_lag, 0.0)
+    return np.column_stack([d_s, d_lag])
+
+SPEC_CRANK = {'func': model_crank, 'jac': jac_crank, 'bounds': ([0, 0], [np.inf, np.inf])}
+
+def ajustar_crank_lote(curvas, chutes):
+    """Ajusta a série de Crank a N curvas [(t, y), ...] com o Levenberg-Marquardt em lote de fluxiq_core.cinetica.
+    chutes: N x 2 (s, L). Retorna DataFrame com s, L, R2 e Convergiu, uma linha por curva."""
+    if len(curvas) == 0:
+        return pd.DataFrame(columns=['s', 'L', 'R2', 'Convergiu'])
+    t, y, idx, _ = empilhar_curvas(curvas)
+    tamanhos = np.array([len(tc) for tc, _ in curvas], dtype=int)
+    P, convergiu = levenberg_marquardt_lote(SPEC_CRANK, t, y, idx, tamanhos, np.asarray(chutes, dtype=float), max_iter=MAX_ITER_CRANK)
+    r2 = r2_lote(y, model_crank(t, *P[idx].T), idx, len(curvas))
+    return pd.DataFrame({'s': P[:, 0], 'L': P[:, 1], 'R2': r2, 'Convergiu': convergiu})
+
+def _curvas_crank(tempos, Y, escala):
+    """Curvas (t, Q/escala) das linhas de Y e chutes iniciais (s, L) pela reta da segunda metade de cada curva."""
+    curvas, chutes = [], []
+    for linha, esc in zip(Y, escala):
+        presente = np.isfinite(linha)
+        t, y = tempos[presente], linha[presente] / esc
+        if len(t) < 3:
+            curvas.append((t[:0], y[:0]))
+            chutes.append((np.nan, np.nan))
+            continue
+        inclinacao, intercepto, _ = regressao_janelas(somas_prefixo(t, y), len(t) // 2, len(t) - 1)
+        t_lag = -intercepto / inclinacao if inclinacao > 0 else 0.0
+        curvas.append((t, y))
+        chutes.append((max(inclinacao, 1e-12), max(t_lag, 0.05 * t[-1])))
+    return curvas, np.array(chutes, dtype=float).reshape(-1, 2)
+
+def ajustar_crank_perm(matriz, config):
+    """Ajuste de Crank de todas as réplicas e de todas as curvas médias numa única chamada ao motor em lote.
+    Retorna (df_replicas, df_grupos) com T_lag = L, Kp = s, Jss = s·C0, D = h²/(6·L), K = 6·s·L/h e R²
+    (sem C0 ou área, s fica na escala de Q/A ou de Q; D e K ficam indefinidos quando L = 0). Convergiu fica <NA>
+    nas curvas com menos de 3 pontos, que não são ajustadas."""
+    Y, usar_percent = matriz_y_replicas(matriz, config)
+    medias = matriz['media_pct'] if usar_percent else matriz['media_q']
+    medias = np.where(matriz['n_replicas'] > 0, medias, np.nan)
+    grupos_linhas = np.concatenate([matriz['grupos'], matriz['grupos_unicos']])
+    area = config.get('membrane_area', 0.0)
+    espessura = config.get('membrane_thickness', 0.0)
+    c0 = np.array([config.get('c0_dict', {}).get(g, 0.0) for g in grupos_linhas], dtype=float)
+    escala = (area if area > 0 else 1.0) * np.where(c0 > 0, c0, 1.0)
+
+    curvas, chutes = _curvas_crank(matriz['tempos'], np.vstack([Y, medias]), escala)
+    validas = np.array([len(t) >= 3 for t, _ in curvas])
+    df = pd.DataFrame(np.nan, index=range(len(curvas)), columns=['s', 'L', 'R2'])
+    # Convergiu = <NA> nas curvas puladas (menos de 3 pontos): não são falhas do otimizador
+    df['Convergiu'] = pd.array([pd.NA] * len(curvas), dtype='boolean')
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        ajuste = ajustar_crank_lote([c for c, v in zip(curvas, validas) if v], chutes[validas])
+    df.loc[validas, ['s', 'L', 'R2']] = ajuste[['s', 'L', 'R2']].to_numpy(dtype=float)
+    df.loc[validas, 'Convergiu'] = ajuste['Convergiu'].to_numpy(dtype=bool)
+    s, t_lag = df['s'].to_numpy(dtype=float), df['L'].to_numpy(dtype=float)
+
+    com_c0 = (c0 > 0) & (area > 0)
+    com_lag = (t_lag > 0) & (espessura > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultado = pd.DataFrame({
+            'D': np.where(com_lag, espessura**2 / (6 * t_lag), np.nan),
+            'K': np.where(com_lag & com_c0, 6 * s * t_lag / espessura, np.nan),
+            'Kp': np.where(com_c0, s, np.nan),
+            'Jss': s * np.where(c0 > 0, c0, 1.0) if area > 0 else np.full(len(s), np.nan),
+            'T_lag': t_lag,
+            'R2': df['R2'].to_numpy(dtype=float),
+            'Convergiu': df['Convergiu'].array,
+            # Parâmetros do modelo, usados para redesenhar a curva ajustada
+            's': s, 'L': t_lag, 'Escala': escala,
+        })
+    n_rep = len(matriz['amostras'])
+    df_replicas = resultado.iloc[:n_rep].reset_index(drop=True)
+    df_replicas.insert(0, config['col_amostra_nome'], matriz['amostras'])
+    df_replicas.insert(0, config['col_grupo'], matriz['grupos'])
+    df_grupos = resultado.iloc[n_rep:].reset_index(drop=True)
+    df_grupos.insert(0, config['col_grupo'], matriz['grupos_unicos'])
+    return df_replicas, df_grupos
+
+# --- Dose Finita: Difusão Doador/Membrana/Receptor por Diferenças Finitas ---
+# Adimensionais: x/h, τ = D·t/h² e w = C_membrana/(K·C0). O doador bem misturado está em equilíbrio com a face x = 0
+# (C_doador = C_membrana(0)/K) e o receptor é sumidouro (w = 0 em x = h). A forma adimensional depende só de
+# β = K·A·h/V_doador (capacidade da membrana frente ao doador), e Q(t) = A·h·K·C0·q(D·t/h²; β).
+N_NOS_DOSE_FINITA = 60
+LOG_TAU_DOSE_FINITA = (-3.0, 4.0)    # faixa de log10(D·t_max/h²) explorada no ajuste
+LOG_K_DOSE_FINITA = (-6.0, 6.0)      # faixa de log10(K)
+_GRADE_LOG_TAU = np.linspace(*LOG_TAU_DOSE_FINITA, 15)
+_GRADE_LOG_K = np.linspace(-4.0, 4.0, 17)
+
+@lru_cache(maxsize=1024)
+def _modos_dose_finita(beta):
+    """Autovalores λ e pesos c de q(τ; β) = 1/β - Σ c·exp(-λ·τ).
+    O operador de volumes finitos é tridiagonal e fica simétrico após a escala pela massa dos nós; sua decomposição
+    é feita uma vez por β e serve a todos os D e a todos os tempos (integração exata no tempo, sem passo temporal)."""
+    dx = 1.0 / N_NOS_DOSE_FINITA
+    massa = np.full(N_NOS_DOSE_FINITA, dx)
+    massa[0] = 1.0 / beta + dx / 2   # Nó da interface: doador + meia célula da membrana
+    rigidez = np.full(N_NOS_DOSE_FINITA, 2.0 / dx)
+    rigidez[0] = 1.0 / dx
+    raiz = np.sqrt(massa)
+    lam, V = eigh_tridiagonal(rigidez / massa, -1.0 / (dx * raiz[:-1] * raiz[1:]))
+    # Toda a dose (1/β em unidades adimensionais) começa no nó da interface
+    pesos = (raiz @ V) * V[0] * (1.0 / beta) / raiz[0]
+    return lam, pesos
+
+def q_dose_finita(tau, beta):
+    """Quantidade acumulada no receptor, Q/(A·h·K·C0), nos tempos adimensionais tau."""
+    lam, pesos = _modos_dose_finita(float(beta))
+    return 1.0 / beta - np.exp(-np.multiply.outer(np.asarray(tau, dtype=float), lam)) @ pesos
+
+def simular_dose_finita(t, D, K, espessura, area, vol_doador, c0):
+    """Perfil Q(t) de dose finita para D e K dados (Q nas unidades de A·h·C0; V_doador em unidades de A·h)."""
+    beta = K * area * espessura / vol_doador
+    return area * espessura * K * c0 * q_dose_finita(D * np.asarray(t, dtype=float) / espessura**2, beta)
+
+def ajustar_dose_finita(t, q, espessura, area, vol_doador, c0):
+    """Ajusta D e K a uma curva acumulada de dose finita: grade grossa em (τ_max, K), com um autoproblema por K
+    reaproveitado em todos os D, seguida de mínimos quadrados em log10(D) e log10(K). Retorna (D, K, R², convergiu)."""
+    log_escala = np.log10(t[-1] / espessura**2)   # log10(τ_max) = log10(D) + log_escala
+
+    def modelo(t_, log_d, log_k):
+        return simular_dose_finita(t_, 10**log_d, 10**log_k, espessura, area, vol_doador, c0)
+
+    fracoes = t / t[-1]
+    melhor = (np.inf, 0.0, 0.0)
+    for log_k in _GRADE_LOG_K:
+        K = 10**log_k
+        curvas = area * espessura * K * c0 * q_dose_finita(np.multiply.outer(10**_GRADE_LOG_TAU, fracoes), K * area * espessura / vol_doador)
+        sse = ((curvas - q)**2).sum(axis=1)
+        i = int(np.argmin(sse))
+        if sse[i] < melhor[0]:
+            melhor = (sse[i], _GRADE_LOG_TAU[i] - log_escala, log_k)
+
+    limites = ([LOG_TAU_DOSE_FINITA[0] - log_escala, LOG_K_DOSE_FINITA[0]], [LOG_TAU_DOSE_FINITA[1] - log_escala, LOG_K_DOSE_FINITA[1]])
+    try:
+        popt, _ = curve_fit(modelo, t, q, p0=melhor[1:], bounds=limites, maxfev=2000)
+        convergiu = True
+    except (RuntimeError, ValueError):
+        popt, convergiu = np.array(melhor[1:]), False
+    ss_tot = ((q - q.mean())**2).sum()
+    r2 = 1 - ((q - modelo(t, *popt))**2).sum() / ss_tot if ss_tot > 0 else np.nan
+    return 10**popt[0], 10**popt[1], r2, convergiu
+
+def ajustar_dose_finita_perm(matriz, config):
+    """Ajuste de dose finita (D, K) de todas as réplicas e curvas médias. Retorna (df_replicas, df_grupos) com
+    D, K, Kp = K·D/h, T_lag = h²/(6·D) (equivalente de dose infinita), R², Convergiu (<NA> para curvas puladas
+    por falta de C0, volume doador ou pontos) e o volume doador usado."""
+    Y = matriz['q_acumulada']
+    medias = np.where(matriz['n_replicas'] > 0, matriz['media_q'], np.nan)
+    grupos_linhas = np.concatenate([matriz['grupos'], matriz['grupos_unicos']])
+    area = config.get('membrane_area', 0.0)
+    espessura = config.get('membrane_thickness', 0.0)
+    c0_dict, vol_dict = config.get('c0_dict', {}), config.get('vol_doador_dict', {})
+
+    linhas = []
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for linha, grupo in zip(np.vstack([Y, medias]), grupos_linhas):
+            presente = np.isfinite(linha)
+            t, q = matriz['tempos'][presente], linha[presente]
+            c0, vol_doador = c0_dict.get(grupo, 0.0), vol_dict.get(grupo, 0.0)
+            if len(t) < 3 or min(area, espessura, c0, vol_doador) <= 0 or t[-1] <= 0:
+                # Curva pulada por falta de dados (Convergiu = <NA>), distinta de uma falha do otimizador
+                linhas.append((np.nan, np.nan, np.nan, pd.NA, vol_doador))
+                continue
+            D, K, r2, convergiu = ajustar_dose_finita(t, q, espessura, area, vol_doador, c0)
+            linhas.append((D, K, r2, convergiu, vol_doador))
+
+    df = pd.DataFrame(linhas, columns=['D', 'K', 'R2', 'Convergiu', 'V_Doador'])
+    df['Convergiu'] = df['Convergiu'].astype('boolean')
+    df.insert(2, 'Kp', df['K'] * df['D'] / espessura if espessura > 0 else np.nan)
+    df.insert(3, 'T_lag', espessura**2 / (6 * df['D']) if espessura > 0 else np.nan)
+    n_rep = len(matriz['amostras'])
+    df_replicas = df.iloc[:n_rep].reset_index(drop=True)
+    df_replicas.insert(0, config['col_amostra_nome'], matriz['amostras'])
+    df_replicas.insert(0, config['col_grupo'], matriz['grupos'])
+    df_grupos = df.iloc[n_rep:].reset_index(drop=True)
+    df_grupos.insert(0, config['col_grupo'], matriz['grupos_unicos'])
+    return df_replicas, df_grupos
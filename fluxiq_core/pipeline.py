@@ -0,0 +1,86 @@
+"""Pipeline incremental do processamento: as etapas de processar_matriz_larga como um grafo com entradas rastreadas.
+
+    matriz ("melt") -> concentração -> sink -> % da dose (por grupo) -> agregado (por grupo)
+
+Cada etapa é guardada sob a impressão digital das suas entradas (a da etapa anterior + os próprios parâmetros), então
+só o que mudou é recalculado: mudar a calibração recalcula a partir da concentração, sem reler a planilha; mudar a
+dose de um grupo recalcula só o % e o agregado desse grupo."""
+import hashlib
+import time
+import numpy as np
+import pandas as pd
+
+from .cinetica import CacheAjustesLRU
+from .processamento import etapa_matriz, etapa_concentracao, etapa_sink, etapa_percent, etapa_agregado, montar_matriz
+
+ETAPAS_PIPELINE = ('matriz', 'concentracao', 'sink', 'percent', 'agregado')
+
+def _impressao(*entradas):
+    """Impressão digital (SHA-1) das entradas de uma etapa."""
+    return hashlib.sha1(repr(entradas).encode('utf-8')).hexdigest()
+
+def impressao_planilha(df_wide):
+    """Impressão digital do conteúdo da planilha larga (usada quando não há hash do arquivo de origem)."""
+    h = hashlib.sha1(pd.util.hash_pandas_object(df_wide, index=False).to_numpy().tobytes())
+    h.update(repr(list(df_wide.columns)).encode('utf-8'))
+    return h.hexdigest()
+
+class PipelineProcessamento:
+    """Etapas do processamento em um cache LRU limitado (compartilhado entre sessões, como CACHE_AJUSTES).
+    processar() retorna a mesma matriz de processar_matriz_larga e o estado de cada etapa nesta execução."""
+
+    def __init__(self, max_itens=256):
+        self.cache = CacheAjustesLRU(max_itens=max_itens)
+
+    def _etapa(self, nome, impressao, calcular, estado):
+        """Valor da etapa a partir do cache ou recalculado; acumula recalculadas/total/segundos em estado[nome]."""
+        inicio = time.perf_counter()
+        valor = self.cache.get((nome, impressao))
+        recalculada = valor is None
+        if recalculada:
+            valor = calcular()
+            self.cache.put((nome, impressao), valor)
+        registro = estado.setdefault(nome, {'etapa': nome, 'recalculadas': 0, 'total': 0, 'segundos': 0.0})
+        registro['recalculadas'] += int(recalculada)
+        registro['total'] += 1
+        registro['segundos'] += time.perf_counter() - inicio
+        return valor
+
+    def processar(self, df_wide, vol_celula, vol_amostra, cal_a, cal_b, doses_dict, tempo_em_minutos=False,
+                  chave_arquivo=None):
+        """Equivalente a processar_matriz_larga, reaproveitando as etapas cujas entradas não mudaram.
+        chave_arquivo identifica a planilha (ex.: hash do arquivo + opções de leitura); sem ela, o conteúdo é hasheado.
+        Retorna (matriz, estado), estado = lista de {'etapa', 'recalculadas', 'total', 'segundos'} na ordem das etapas."""
+        estado = {}
+        imp_matriz = _impressao(chave_arquivo or impressao_planilha(df_wide), bool(tempo_em_minutos))
+        base = self._etapa('matriz', imp_matriz, lambda: etapa_matriz(df_wide, tempo_em_minutos), estado)
+        presente, grupos = base['presente'], base['grupos']
+
+        imp_conc = _impressao(imp_matriz, float(cal_a), float(cal_b))
+        conc = self._etapa('concentracao', imp_conc, lambda: etapa_concentracao(base['area'], presente, cal_a, cal_b), estado)
+        imp_sink = _impressao(imp_conc, float(vol_celula), float(vol_amostra))
+        q_acumulada = self._etapa('sink', imp_sink, lambda: etapa_sink(conc, vol_celula, vol_amostra), estado)
+        q_presente = np.where(presente, q_acumulada, np.nan)
+
+        # % e agregado por grupo: a entrada de cada grupo é o sink (todas as réplicas) + a dose do próprio grupo
+        percent = np.full(q_acumulada.shape, np.nan)
+        partes_agregado = []
+        for grupo in pd.factorize(grupos, sort=True)[1]:
+            linhas = np.flatnonzero(grupos == grupo)
+            dose = float(doses_dict.get(grupo, {}).get('dose_total', 0.0))
+            imp_percent = _impressao(imp_sink, grupo, dose)
+            percent[linhas] = self._etapa('percent', imp_percent, lambda: etapa_percent(
+                q_acumulada[linhas], presente[linhas], np.full(len(linhas), dose)), estado)
+            partes_agregado.append(self._etapa('agregado', imp_percent, lambda: etapa_agregado(
+                grupos[linhas], presente[linhas], q_presente[linhas], percent[linhas]), estado))
+
+        if partes_agregado:
+            agregado = (np.concatenate([parte[0] for parte in partes_agregado]),
+                        *(np.vstack([parte[i] for parte in partes_agregado]) for i in range(1, 6)))
+        else:
+            agregado = etapa_agregado(grupos, presente, q_presente, percent)
+        matriz = montar_matriz(base, conc, q_acumulada, percent, agregado)
+        return matriz, [estado[nome] for nome in ETAPAS_PIPELINE if nome in estado]
+
+# Compartilhado pelas Etapas 1 dos módulos de Liberação e Permeação (e entre reruns do Streamlit)
+PIPELINE_PROCESSAMENTO = PipelineProcessamento(max_itens=256)
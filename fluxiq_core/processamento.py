@@ -0,0 +1,260 @@
+"""Processamento dos dados de células de Franz: correção de sink, matriz réplicas x tempos, tabelas
+longa/agregada e métricas independentes de modelo por réplica."""
+import numpy as np
+import pandas as pd
+
+# --- Núcleo Vetorizado da Correção de Sink ---
+def _soma_acumulada_deslocada(valores, chave_replica):
+    """Soma acumulada exclusiva (deslocada de uma posição) dentro de cada réplica, para dados contíguos por réplica."""
+    n = len(valores)
+    if n == 0:
+        return np.zeros(0)
+    # Posição de cada linha dentro da sua réplica (os dados chegam ordenados e contíguos por réplica)
+    inicio_bloco = np.r_[True, chave_replica[1:] != chave_replica[:-1]]
+    id_bloco = np.cumsum(inicio_bloco) - 1
+    inicios = np.flatnonzero(inicio_bloco)
+    posicao = np.arange(n) - inicios[id_bloco]
+
+    # Matriz réplicas x pontos: np.cumsum ao longo do eixo 1 soma na mesma ordem do laço original
+    matriz = np.zeros((len(inicios), posicao.max() + 2))
+    matriz[id_bloco, posicao + 1] = valores
+    return np.cumsum(matriz, axis=1)[id_bloco, posicao]
+
+def _corrigir_sink(df, chave_replica, col_grupo, vol_celula, vol_amostra, cal_a, cal_b, doses_dict, col_conc, col_q_acumulada, col_percent):
+    """Calcula Conc., Q acumulada corrigida e % liberada para um DataFrame já ordenado por (réplica, Tempo)."""
+    df[col_conc] = ((df['Area'] - cal_b) / cal_a).fillna(0)
+    conc = df[col_conc]
+
+    # Correção de sink: massa retirada em todas as coletas ANTERIORES da mesma réplica
+    # (soma acumulada deslocada de uma posição, em vez do laço linha a linha da V9)
+    correcao_acumulada = _soma_acumulada_deslocada(conc.to_numpy(dtype=float) * vol_amostra, chave_replica)
+    df[col_q_acumulada] = (conc * vol_celula) + correcao_acumulada
+
+    # Dose do grupo da réplica (primeira linha de cada réplica, como na V9)
+    grupo_da_replica = df[col_grupo].groupby(chave_replica, sort=False).transform('first')
+    dose_total = grupo_da_replica.map(lambda g: doses_dict.get(g, {}).get('dose_total', 0.0)).astype(float)
+    com_dose = dose_total > 0
+
+    percent = (df[col_q_acumulada] / dose_total.where(com_dose)) * 100
+    percent = percent.clip(lower=0)
+    # A partir do primeiro ponto >= 100%, a réplica permanece travada em 100%
+    saturado = (percent > 99.9999).groupby(chave_replica, sort=False).cummax()
+    percent = percent.mask(saturado, 100.0)
+    df[col_percent] = percent.where(com_dose, 0.0)
+
+    return df
+
+# --- Função de Cálculo V9 (Liberação/Permeação) ---
+def calcular_liberacao_replica_v9(df_group, col_grupo, vol_celula, vol_amostra, cal_a, cal_b, doses_dict, col_conc, col_q_acumulada, col_percent):
+    """Processa uma única réplica (mantida por compatibilidade com groupby.apply)."""
+    df_group = df_group.sort_values(by='Tempo')
+    chave_unica = np.zeros(len(df_group), dtype=int)
+    return _corrigir_sink(df_group, chave_unica, col_grupo, vol_celula, vol_amostra, cal_a, cal_b,
+                          doses_dict, col_conc, col_q_acumulada, col_percent)
+
+# --- Função de Cálculo Vetorizada (Todas as Réplicas) ---
+def calcular_liberacao_vetorizada(df_long, col_amostra, col_grupo, vol_celula, vol_amostra, cal_a, cal_b, doses_dict, col_conc, col_q_acumulada, col_percent):
+    """Equivalente a groupby(col_amostra).apply(calcular_liberacao_replica_v9), em uma única operação vetorizada."""
+    df = df_long.sort_values(by=[col_amostra, 'Tempo'], kind='mergesort').reset_index(drop=True)
+    chave_replica = df[col_amostra].to_numpy()
+    return _corrigir_sink(df, chave_replica, col_grupo, vol_celula, vol_amostra, cal_a, cal_b,
+                          doses_dict, col_conc, col_q_acumulada, col_percent)
+
+# --- Processamento Matricial (Formato Largo, sem melt/groupby.apply) ---
+def etapa_matriz(df_wide, tempo_em_minutos=False):
+    """Etapa "melt": planilha larga -> matriz réplicas x tempos do sinal bruto (NaN = ponto ausente).
+    Réplicas em ordem alfabética (mesma ordem do groupby por réplica) e tempos numéricos em ordem crescente."""
+    col_amostra = df_wide.columns[0]
+    col_grupo = df_wide.columns[1]
+    cols_tempo = df_wide.columns[2:]
+
+    # Linhas sem nome de réplica ou grupo seriam descartadas pelo groupby da versão em formato longo
+    df_wide = df_wide.dropna(subset=[col_amostra, col_grupo])
+
+    # Colunas de tempo: cabeçalhos numéricos, em ordem crescente
+    tempos = pd.to_numeric(pd.Series(list(cols_tempo), dtype=object), errors='coerce').to_numpy(dtype=float)
+    cols_validas = ~np.isnan(tempos)
+    ordem_t = np.argsort(tempos[cols_validas], kind='stable')
+    cols_tempo = [cols_tempo[i] for i in np.flatnonzero(cols_validas)[ordem_t]]
+    tempos = tempos[cols_validas][ordem_t]
+    if tempo_em_minutos:
+        tempos = tempos / 60
+
+    ordem_r = np.argsort(df_wide[col_amostra].to_numpy(), kind='stable')
+    amostras = df_wide[col_amostra].to_numpy()[ordem_r]
+    grupos = df_wide[col_grupo].to_numpy()[ordem_r]
+    area = df_wide[cols_tempo].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)[ordem_r]
+    if area.ndim == 1:
+        area = area.reshape(len(amostras), -1)
+    return {'amostras': amostras, 'grupos': grupos, 'tempos': tempos, 'area': area, 'presente': ~np.isnan(area)}
+
+def etapa_concentracao(area, presente, cal_a, cal_b):
+    """Etapa de calibração: concentração no receptor (Sinal = a·C + b); 0 nos pontos ausentes."""
+    return np.where(presente, (area - cal_b) / cal_a, 0.0)
+
+def etapa_sink(conc, vol_celula, vol_amostra):
+    """Etapa de correção de sink: Q acumulada = C·V_célula + massa retirada em todas as coletas anteriores."""
+    retirada = conc * vol_amostra
+    correcao_acumulada = np.cumsum(np.hstack([np.zeros((len(conc), 1)), retirada[:, :-1]]), axis=1)
+    return (conc * vol_celula) + correcao_acumulada
+
+def etapa_percent(q_acumulada, presente, dose_total):
+    """Etapa de normalização: % da dose de cada réplica (dose_total por linha; sem dose = 0), travada em 100% a
+    partir do primeiro ponto que a atinge. Linhas independentes: pode ser aplicada só às réplicas de um grupo."""
+    com_dose = dose_total > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent = (q_acumulada / np.where(com_dose, dose_total, np.nan)[:, None]) * 100
+    percent = np.maximum(percent, 0)
+    saturado = np.maximum.accumulate((percent > 99.9999) & presente, axis=1)
+    percent = np.where(saturado, 100.0, percent)
+    percent = np.where(com_dose[:, None], percent, 0.0)
+    return np.where(presente, percent, np.nan)
+
+def etapa_agregado(grupos, presente, q_acumulada, percent):
+    """Etapa de agregação: Média e SD amostral por grupo e tempo (somas por blocos de réplicas do mesmo grupo).
+    Retorna (grupos_unicos, n_replicas, media_q, sd_q, media_pct, sd_pct); grupos em ordem alfabética."""
+    n_t = presente.shape[1]
+    codigos, grupos_unicos = pd.factorize(grupos, sort=True)
+    ordem_g = np.argsort(codigos, kind='stable')
+    codigos_ordenados = codigos[ordem_g]
+    inicios = np.flatnonzero(np.r_[True, codigos_ordenados[1:] != codigos_ordenados[:-1]])
+    presente_g = presente[ordem_g]
+    n_replicas = np.add.reduceat(presente_g.astype(int), inicios, axis=0) if len(inicios) else np.zeros((0, n_t), dtype=int)
+
+    def _media_sd(valores):
+        if not len(inicios):
+            vazio = np.zeros((0, n_t))
+            return vazio, vazio
+        valores_g = np.where(presente_g, valores[ordem_g], 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = np.add.reduceat(valores_g, inicios, axis=0) / n_replicas
+            desvio = np.where(presente_g, valores_g - media[codigos_ordenados], 0.0)
+            sd = np.sqrt(np.add.reduceat(desvio**2, inicios, axis=0) / (n_replicas - 1))
+        return media, sd
+
+    return (np.asarray(grupos_unicos), n_replicas, *_media_sd(q_acumulada), *_media_sd(percent))
+
+def montar_matriz(base, conc, q_acumulada, percent, agregado):
+    """Junta as saídas das etapas no dicionário retornado por processar_matriz_larga."""
+    presente = base['presente']
+    grupos_unicos, n_replicas, media_q, sd_q, media_pct, sd_pct = agregado
+    return {
+        'amostras': base['amostras'], 'grupos': base['grupos'], 'tempos': base['tempos'],
+        'area': base['area'], 'conc': np.where(presente, conc, np.nan),
+        'q_acumulada': np.where(presente, q_acumulada, np.nan), 'percent': percent, 'presente': presente,
+        'grupos_unicos': grupos_unicos, 'n_replicas': n_replicas,
+        'media_q': media_q, 'sd_q': sd_q, 'media_pct': media_pct, 'sd_pct': sd_pct,
+    }
+
+def processar_matriz_larga(df_wide, vol_celula, vol_amostra, cal_a, cal_b, doses_dict, tempo_em_minutos=False):
+    """Processa a planilha larga como uma matriz réplicas x tempos (calibração, sink, dose e agregação por grupo).
+    Encadeia as etapas de uma vez; fluxiq_core.pipeline recalcula só as etapas cujas entradas mudaram."""
+    base = etapa_matriz(df_wide, tempo_em_minutos)
+    conc = etapa_concentracao(base['area'], base['presente'], cal_a, cal_b)
+    q_acumulada = etapa_sink(conc, vol_celula, vol_amostra)
+    dose_total = np.array([doses_dict.get(g, {}).get('dose_total', 0.0) for g in base['grupos']], dtype=float)
+    percent = etapa_percent(q_acumulada, base['presente'], dose_total)
+    agregado = etapa_agregado(base['grupos'], base['presente'], np.where(base['presente'], q_acumulada, np.nan), percent)
+    return montar_matriz(base, conc, q_acumulada, percent, agregado)
+
+def montar_df_long_processado(matriz, config):
+    """Constrói a tabela por réplica (formato longo) a partir do resultado de processar_matriz_larga."""
+    idx_r, idx_t = np.nonzero(matriz['presente'])
+    return pd.DataFrame({
+        config['col_amostra_nome']: matriz['amostras'][idx_r],
+        config['col_grupo']: matriz['grupos'][idx_r],
+        'Tempo': matriz['tempos'][idx_t],
+        'Area': matriz['area'][idx_r, idx_t],
+        config['col_conc']: matriz['conc'][idx_r, idx_t],
+        config['col_q_acumulada']: matriz['q_acumulada'][idx_r, idx_t],
+        config['col_percent']: matriz['percent'][idx_r, idx_t],
+    })
+
+def montar_df_agregado(matriz, config):
+    """Constrói a tabela agregada (Média/SD por grupo e tempo) a partir do resultado de processar_matriz_larga."""
+    idx_g, idx_t = np.nonzero(matriz['n_replicas'] > 0)
+    df_agregado = pd.DataFrame({
+        config['col_grupo']: matriz['grupos_unicos'][idx_g],
+        'Tempo': matriz['tempos'][idx_t],
+        'Média_Q_Acumulada': matriz['media_q'][idx_g, idx_t],
+        'SD_Q_Acumulada': matriz['sd_q'][idx_g, idx_t],
+        'Média_Percent': matriz['media_pct'][idx_g, idx_t],
+        'SD_Percent': matriz['sd_pct'][idx_g, idx_t],
+    })
+    return df_agregado.fillna(0)
+
+# --- Métricas Independentes de Modelo por Réplica (AUC, ED, MDT, t50/t80) ---
+def _pares_consecutivos(tempos, Y):
+    """Para cada ponto presente de cada linha de Y (R x T, NaN = ausente), o ponto presente anterior.
+    Retorna (valido, t0, y0, t1, y1), todos R x T; valido marca os pares (anterior, atual) existentes."""
+    presente = np.isfinite(Y)
+    n_t = Y.shape[1]
+    posicoes = np.where(presente, np.arange(n_t), -1)
+    anterior = np.maximum.accumulate(posicoes, axis=1)
+    anterior = np.hstack([np.full((Y.shape[0], 1), -1), anterior[:, :-1]])
+    valido = presente & (anterior >= 0)
+    ant = np.maximum(anterior, 0)
+    t0 = tempos[ant]
+    y0 = np.take_along_axis(Y, ant, axis=1)
+    return valido, t0, np.where(valido, y0, 0.0), np.broadcast_to(tempos, Y.shape), np.where(valido, Y, 0.0)
+
+def calcular_metricas_replicas(tempos, Y, y_referencia=None):
+    """Métricas de cada réplica (linhas de Y, R x T, NaN = ponto ausente) numa única passada vetorizada:
+    AUC (trapézios entre os pontos observados), ED = AUC desde a origem / (referência x t_final) x 100,
+    MDT = sum(t_médio x dQ) / sum(dQ) e t50/t80 interpolados linearmente. A referência (100% da curva) é
+    y_referencia (ex.: 100 para % liberada) ou, se None, o máximo de cada réplica. Retorna um dict de arrays (R,)."""
+    tempos = np.asarray(tempos, dtype=float)
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    n_pontos = np.isfinite(Y).sum(axis=1)
+    with np.errstate(all='ignore'):
+        referencia = np.nanmax(Y, axis=1) if y_referencia is None else np.full(Y.shape[0], float(y_referencia))
+
+    # AUC apenas entre os pontos observados (mesmo resultado de np.trapezoid por réplica)
+    valido, t0, y0, t1, y1 = _pares_consecutivos(tempos, Y)
+    auc = np.sum(np.where(valido, (t1 - t0) * (y0 + y1) / 2, 0.0), axis=1)
+    auc = np.where(n_pontos > 1, auc, np.nan)
+
+    # ED, MDT e tX consideram a curva partindo da origem (t = 0, Q = 0)
+    tempos_o = np.r_[0.0, tempos]
+    Y_o = np.hstack([np.zeros((Y.shape[0], 1)), Y])
+    valido, t0, y0, t1, y1 = _pares_consecutivos(tempos_o, Y_o)
+    auc_origem = np.sum(np.where(valido, (t1 - t0) * (y0 + y1) / 2, 0.0), axis=1)
+    t_final = np.max(np.where(np.isfinite(Y_o), tempos_o, 0.0), axis=1)
+    dq = np.where(valido, y1 - y0, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ed = auc_origem / (referencia * t_final) * 100
+        mdt = np.sum(dq * (t0 + t1) / 2, axis=1) / np.sum(dq, axis=1)
+
+    def tempo_para(fracao):
+        nivel = (fracao * referencia)[:, None]
+        cruza = valido & (y0 < nivel) & (y1 >= nivel)
+        j = np.argmax(cruza, axis=1)
+        linhas = np.arange(Y.shape[0])
+        a, b = y0[linhas, j], y1[linhas, j]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = t0[linhas, j] + (nivel[:, 0] - a) * (t1[linhas, j] - t0[linhas, j]) / (b - a)
+        return np.where(cruza.any(axis=1), t, np.nan)
+
+    validas = n_pontos > 1
+    return {
+        'AUC': auc,
+        'ED': np.where(validas, ed, np.nan),
+        'MDT': np.where(validas, mdt, np.nan),
+        't50': tempo_para(0.5),
+        't80': tempo_para(0.8),
+    }
+
+def matriz_y_replicas(matriz, config):
+    """Matriz réplicas x tempos da coluna Y da configuração (% liberada ou quantidade acumulada) e se é percentual."""
+    usar_percent = config.get('y_axis_col') == config.get('col_percent')
+    return (matriz['percent'] if usar_percent else matriz['q_acumulada']), usar_percent
+
+def montar_metricas_replicas(matriz, config):
+    """Tabela de métricas por réplica a partir da matriz processada (coluna Y conforme o eixo da configuração)."""
+    Y, usar_percent = matriz_y_replicas(matriz, config)
+    metricas = calcular_metricas_replicas(matriz['tempos'], Y, y_referencia=100.0 if usar_percent else None)
+    return pd.DataFrame({
+        config['col_amostra_nome']: matriz['amostras'],
+        config['col_grupo']: matriz['grupos'],
+        **metricas,
+    })
@@ -0,0 +1,74 @@
+"""FluxIQ em lote (linha de comando): processa diretórios ou padrões glob de exportações em formato largo.
+
+Exemplo:
+    python fluxiq_lote.py dados/*.csv --params parametros.json --saida resultados --workers 8
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+
+from fluxiq_core.lote import EXTENSOES_LOTE, PARAMETROS_PADRAO, executar_lote
+
+
+def listar_arquivos(entradas):
+    """Arquivos de dados a partir de diretórios, padrões glob ou caminhos (ordenados, sem repetição)."""
+    arquivos = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatos = [os.path.join(entrada, nome) for nome in os.listdir(entrada)]
+        else:
+            candidatos = glob.glob(entrada, recursive=True)
+        # Caminho absoluto: o mesmo arquivo citado de duas formas (ex.: dados/x.csv e ./dados/x.csv) entra uma vez só
+        arquivos.update(os.path.abspath(c) for c in candidatos if os.path.isfile(c) and c.lower().endswith(EXTENSOES_LOTE))
+    return sorted(arquivos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FluxIQ: análise em lote de células de Franz (liberação ou permeação).")
+    parser.add_argument('entradas', nargs='+', help="Diretórios, arquivos ou padrões glob (CSV/TXT/XLSX em formato largo).")
+    parser.add_argument('--params', help="Arquivo JSON com os parâmetros (volumes, calibração, doses, unidade de tempo, módulo).")
+    parser.add_argument('--saida', default='resultados_fluxiq', help="Pasta de saída (padrão: resultados_fluxiq).")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Processos em paralelo (padrão: núcleos da CPU).")
+    parser.add_argument('--modulo', choices=['release', 'permeation'], help="Sobrescreve o 'modulo' do arquivo de parâmetros.")
+    args = parser.parse_args(argv)
+
+    parametros = dict(PARAMETROS_PADRAO)
+    if args.params:
+        with open(args.params, encoding='utf-8') as f:
+            parametros.update(json.load(f))
+    if args.modulo:
+        parametros['modulo'] = args.modulo
+    desconhecidos = sorted(set(parametros) - set(PARAMETROS_PADRAO))
+    if desconhecidos:
+        print(f"Aviso: parâmetros ignorados: {', '.join(desconhecidos)}", file=sys.stderr)
+
+    arquivos = listar_arquivos(args.entradas)
+    if not arquivos:
+        print("Nenhum arquivo de dados encontrado.", file=sys.stderr)
+        return 1
+    os.makedirs(args.saida, exist_ok=True)
+    print(f"{len(arquivos)} arquivo(s), módulo '{parametros['modulo']}', {args.workers} processo(s)")
+
+    passo = max(1, len(arquivos) // 20)
+    def progresso(i, caminho, erro):
+        if erro is not None:
+            print(f"  ERRO {caminho}: {erro}", file=sys.stderr)
+        if i % passo == 0 or i == len(arquivos):
+            print(f"  {i}/{len(arquivos)}")
+
+    df_consolidado, df_erros, segundos = executar_lote(arquivos, parametros, args.saida, args.workers, progresso)
+    df_consolidado.to_csv(os.path.join(args.saida, 'resultados_consolidados.csv'), index=False)
+    if len(df_erros):
+        df_erros.to_csv(os.path.join(args.saida, 'erros.csv'), index=False)
+
+    n_ok = len(arquivos) - len(df_erros)
+    print(f"{n_ok} processado(s), {len(df_erros)} com erro em {segundos:.2f} s "
+          f"({len(arquivos) / segundos:.1f} arquivos/s)")
+    print(f"Resultados: {os.path.join(args.saida, 'resultados_consolidados.csv')}")
+    return 0 if n_ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
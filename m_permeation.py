@@ -4,13 +4,18 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from scipy import stats 
-import io 
-import xlsxwriter 
-from scipy.optimize import curve_fit 
 
-# O m_release.py deve estar presente para importar as funções básicas de cálculo
+# Cálculos de permeação vêm do núcleo sem Streamlit; o m_release fornece as telas e helpers compartilhados
+from fluxiq_core.pipeline import PIPELINE_PROCESSAMENTO
+from fluxiq_core.permeacao import (PONTOS_FLUXO_PADRAO, somas_prefixo, regressao_janelas, curvas_medias_perm,
+                                   detectar_janelas_grupos, perfis_fluxo_perm, parametros_permeacao,
+                                   parametros_perm_replicas, parametros_perm_grupos, model_crank, ajustar_crank_perm,
+                                   simular_dose_finita, ajustar_dose_finita_perm)
+
+# O m_release.py deve estar presente para importar as funções compartilhadas das telas
 try:
-    from m_release import calcular_liberacao_replica_v9, load_data, get_download_button
+    from m_release import (obter_df_long_processado, obter_df_agregado, chave_leitura, ler_arquivo_cache, chave_processamento,
+                           exibir_status_pipeline, get_download_button, exibir_post_hoc)
 except ImportError:
     st.error("Erro no módulo de Permeação: Falha ao importar funções básicas de 'm_release.py'. Verifique se 'm_release.py' existe.")
     st.stop()
@@ -62,6 +67,18 @@ TEXT_DICT = {
         'step1_button_process': "Processar Dados",
         'step1_spinner_process': "Processando...",
         'step1_success_process': "Dados processados! Navegue para a 'P-Etapa 2'.",
+        'pipeline_header': "Etapas do processamento (cache)",
+        'pipeline_col_stage': "Etapa",
+        'pipeline_col_status': "Estado",
+        'pipeline_col_time': "Tempo (ms)",
+        'pipeline_stage_matriz': "Matriz réplicas x tempos (leitura da planilha)",
+        'pipeline_stage_concentracao': "Concentração (calibração)",
+        'pipeline_stage_sink': "Correção de sink",
+        'pipeline_stage_percent': "% da dose (por grupo)",
+        'pipeline_stage_agregado': "Média/SD (por grupo)",
+        'pipeline_cached': "Em cache",
+        'pipeline_recomputed': "Recalculada",
+        'pipeline_partial': "Recalculada em {} de {} grupos",
         'step1_error_process': "Erro ao ler ou processar o arquivo:",
         'step1_col_conc_name': "Concentracao",
         'step1_col_q_name': "Q_Acumulada_Corrigida",
@@ -94,6 +111,13 @@ TEXT_DICT = {
 
         'perm_step3_header': "P-Etapa 3: Gráficos de Permeação 📈",
         'perm_step3_info': "Visualize o perfil de permeação acumulada (Média $\pm$ SD) de todos os grupos. Use este gráfico para identificar a região de Steady-State (linear) que será usada na próxima etapa.",
+        'perm_step3_flux_header': "Fluxo Instantâneo ($dQ/dt/A$)",
+        'perm_step3_flux_info': "Fluxo de cada réplica pela derivada de uma regressão quadrática local (Savitzky-Golay para tempos não uniformes), exibido como Média $\pm$ SD por grupo. Em dose finita, o pico de fluxo e o tempo do pico são as principais leituras.",
+        'perm_step3_flux_points': "Pontos na janela de suavização",
+        'perm_step3_flux_title': "Perfil de Fluxo vs. Tempo",
+        'perm_step3_flux_yaxis': "Fluxo",
+        'perm_step3_flux_peaks': "Pico de fluxo e tempo do pico (Média e SD por grupo)",
+        'perm_step3_flux_replicates': "Pico de fluxo por réplica",
         'step3_color_picker_label': "Personalizar Cores",
         'step3_color_picker_group': "Cor para",
         'step3_xaxis_label': "Tempo (horas)",
@@ -112,6 +136,7 @@ TEXT_DICT = {
         'perm_step4_slope': "Inclinação (Slope)",
         'perm_step4_intercept': "Intercepto",
         'perm_step4_error_fit': "Não foi possível realizar o ajuste. Selecione pelo menos 2 pontos.",
+        'perm_step4_auto_window': "Janela de steady-state detectada automaticamente: {:g}–{:g} h (R² = {:.4f}, {} pontos). Ajuste o slider se necessário.",
         'perm_step4_error_points': "Não há dados de média suficientes para este grupo.",
         'perm_step4_methodology_header': "Metodologia de Cálculo", 
         'sequence_analysis': "Sequência de Análise", # <-- NOVO
@@ -129,6 +154,27 @@ TEXT_DICT = {
         'perm_step4_error_no_fit': "Nenhum ajuste linear encontrado. Por favor, ajuste o Steady-State primeiro.",
         'perm_step4_warning_dose': "AVISO: Dose Finita. O cálculo de Kp assume que $C_0$ é a concentração inicial. Se houver depleção significativa do doador, o modelo pode não ser exato.",
         
+        'perm_crank_header': "Ajuste do Perfil Completo (Solução de Crank)",
+        'perm_crank_info': "Ajusta a curva acumulada inteira à solução em série de Crank para dose infinita, $Q(t)/(A C_0) = K h \left[\frac{D t}{h^2} - \frac{1}{6} - \frac{2}{\pi^2}\sum_n \frac{(-1)^n}{n^2} e^{-D n^2 \pi^2 t / h^2}\right]$, estimando $D$ e $K$ diretamente, sem depender da janela escolhida. Todas as réplicas e curvas médias são ajustadas de uma vez.",
+        'perm_crank_button': "Ajustar Todas as Réplicas (Crank)",
+        'perm_crank_spinner': "Ajustando a série de Crank a todas as curvas...",
+        'perm_crank_plot_fit': "Ajuste de Crank",
+        'perm_crank_groups': "Curvas médias dos grupos",
+        'perm_crank_replicates': "Réplicas",
+        'perm_crank_not_converged': "{} curva(s) não convergiram; os valores exibidos são os da última iteração.",
+        'perm_crank_no_lag': "{} curva(s) sem latência mensurável ($T_{{lag}}$ = 0): o perfil é linear desde o início, então $K_p$ e $J_{{ss}}$ são estimados, mas $D$ e $K$ não são identificáveis.",
+        'perm_finite_header': "Dose Finita: Modelo Doador/Membrana/Receptor",
+        'perm_finite_info': "Resolve a difusão na membrana por diferenças finitas com depleção do doador bem misturado (volume aplicado na P-Etapa 1) e receptor em condição sink, ajustando $D$ e $K$ ao perfil acumulado de cada réplica. $K_p = K D / h$; $T_{lag} = h^2/(6D)$ é o equivalente de dose infinita.",
+        'perm_finite_button': "Ajustar Todas as Réplicas (Dose Finita)",
+        'perm_finite_spinner': "Ajustando o modelo de dose finita a todas as curvas...",
+        'perm_finite_missing': "O modelo de dose finita requer área, espessura, $C_0$ e volume/massa aplicado maiores que zero para este grupo.",
+        'perm_finite_simulator': "Simular perfil com D e K",
+        'perm_finite_label_d': "D (cm²/h)",
+        'perm_finite_label_k': "K (partição)",
+        'perm_finite_plot_fit': "Ajuste (Dose Finita)",
+        'perm_finite_plot_sim': "Simulação",
+        'perm_finite_dose_line': "Dose aplicada",
+        'perm_finite_not_converged': "{} curva(s) não convergiram; os valores exibidos são os da busca inicial em grade.",
         'perm_step5_header': "P-Etapa 5: Resumo Comparativo dos Parâmetros de Permeação",
         'perm_step5_info': "Use as abas abaixo para comparar seus grupos.",
         'perm_step5_tab_summary': "Resumo de Parâmetros", 
@@ -140,7 +186,11 @@ TEXT_DICT = {
         'perm_step5_col_kp': "Kp (cm/h)",
         'perm_step5_col_d': "D (cm²/h)",
         'perm_step5_col_r2': "R² (Ajuste)",
-        'perm_step5_empty': "Nenhum resultado salvo ainda. Vá para a P-Etapa 4 para calcular e salvar os parâmetros de cada grupo.",
+        'perm_step5_col_window': "Janela (h)",
+        'perm_step5_col_source': "Origem da Janela",
+        'perm_step5_window_auto': "Detectada",
+        'perm_step5_window_saved': "Salva (P-Etapa 4)",
+        'perm_step5_replicates': "Parâmetros por Réplica",
         
         'perm_stats_header': "Comparação Estatística (ANOVA/t-test)",
         'perm_stats_info': "Esta análise calcula o parâmetro selecionado para **cada réplica** no intervalo de tempo comum para determinar se a diferença entre os grupos é estatisticamente significante (p < 0.05).",
@@ -160,6 +210,12 @@ TEXT_DICT = {
         'perm_stats_conclusion_nonsig': "NÃO SIGNIFICANTE: A diferença entre os grupos não é estatisticamente significante (p >= 0.05).",
         'perm_stats_error_replicas': "Erro: Pelo menos um dos grupos selecionados não possui réplicas suficientes (mínimo 2) ou dados válidos neste intervalo de tempo.",
         'perm_stats_error_no_fit': "Erro: Não foi possível calcular o parâmetro para algumas réplicas. Verifique a linearidade dos dados no intervalo selecionado.",
+        'posthoc_method': "Teste post-hoc (aplicado quando a ANOVA é significante):",
+        'posthoc_tukey': "Tukey HSD (variâncias iguais)",
+        'posthoc_gh': "Games-Howell (variâncias desiguais)",
+        'posthoc_header': "Comparações Post-Hoc de Todos os Pares",
+        'posthoc_summary': "{} de {} pares com diferença significante (p < 0.05).",
+        'posthoc_p_value': "Valor-p",
         'perm_stats_error_no_data': "Erro: Nenhum dado encontrado no intervalo selecionado para um dos grupos.",
         'home_footer': "Retornar à Seleção de Módulo", # <-- CORRIGIDO
     },
@@ -201,6 +257,18 @@ TEXT_DICT = {
         'step1_button_process': "Process Data",
         'step1_spinner_process': "Processing...",
         'step1_success_process': "Data processed! Navigate to 'P-Step 2'.",
+        'pipeline_header': "Processing stages (cache)",
+        'pipeline_col_stage': "Stage",
+        'pipeline_col_status': "Status",
+        'pipeline_col_time': "Time (ms)",
+        'pipeline_stage_matriz': "Replicate x time matrix (sheet reshaping)",
+        'pipeline_stage_concentracao': "Concentration (calibration)",
+        'pipeline_stage_sink': "Sink correction",
+        'pipeline_stage_percent': "% of dose (per group)",
+        'pipeline_stage_agregado': "Mean/SD (per group)",
+        'pipeline_cached': "Cached",
+        'pipeline_recomputed': "Recomputed",
+        'pipeline_partial': "Recomputed for {} of {} groups",
         'step1_error_process': "Error reading or processing file:",
         'step1_col_conc_name': "Concentration",
         'step1_col_q_name': "Q_Accumulated_Corrected",
@@ -233,6 +301,13 @@ TEXT_DICT = {
 
         'perm_step3_header': "P-Step 3: Permeation Plots 📈",
         'perm_step3_info': "Visualize the cumulative permeation profile (Mean $\pm$ SD) of all groups. Use this plot to identify the Steady-State (linear) region, which will be used in the next step.",
+        'perm_step3_flux_header': "Instantaneous Flux ($dQ/dt/A$)",
+        'perm_step3_flux_info': "Flux of each replicate from the derivative of a local quadratic regression (Savitzky-Golay for non-uniform times), shown as Mean $\pm$ SD per group. For finite dose, peak flux and time to peak are the main readouts.",
+        'perm_step3_flux_points': "Points in the smoothing window",
+        'perm_step3_flux_title': "Flux vs. Time Profile",
+        'perm_step3_flux_yaxis': "Flux",
+        'perm_step3_flux_peaks': "Peak flux and time to peak (Mean and SD per group)",
+        'perm_step3_flux_replicates': "Peak flux per replicate",
         'step3_color_picker_label': "Customize Colors",
         'step3_color_picker_group': "Color for",
         'step3_xaxis_label': "Time (hours)",
@@ -251,6 +326,7 @@ TEXT_DICT = {
         'perm_step4_slope': "Slope",
         'perm_step4_intercept': "Intercept",
         'perm_step4_error_fit': "Could not perform fit. Select at least 2 points.",
+        'perm_step4_auto_window': "Automatically detected steady-state window: {:g}–{:g} h (R² = {:.4f}, {} points). Adjust the slider if needed.",
         'perm_step4_error_points': "Not enough mean data points for this group.",
         'perm_step4_methodology_header': "Calculation Methodology", 
         'sequence_analysis': "Analysis Sequence", # <-- NOVO
@@ -268,6 +344,27 @@ TEXT_DICT = {
         'perm_step4_error_no_fit': "No linear fit found. Please adjust the Steady-State first.",
         'perm_step4_warning_dose': "WARNING: Finite Dose. Kp calculation assumes $C_0$ is the initial concentration. If significant donor depletion occurs, the model may be inaccurate.",
         
+        'perm_crank_header': "Full-Profile Fit (Crank Solution)",
+        'perm_crank_info': "Fits the whole cumulative curve to Crank's infinite-dose series solution, $Q(t)/(A C_0) = K h \left[\frac{D t}{h^2} - \frac{1}{6} - \frac{2}{\pi^2}\sum_n \frac{(-1)^n}{n^2} e^{-D n^2 \pi^2 t / h^2}\right]$, estimating $D$ and $K$ directly, independent of the chosen window. All replicates and mean curves are fitted at once.",
+        'perm_crank_button': "Fit All Replicates (Crank)",
+        'perm_crank_spinner': "Fitting Crank's series to all curves...",
+        'perm_crank_plot_fit': "Crank Fit",
+        'perm_crank_groups': "Group mean curves",
+        'perm_crank_replicates': "Replicates",
+        'perm_crank_not_converged': "{} curve(s) did not converge; the values shown are from the last iteration.",
+        'perm_crank_no_lag': "{} curve(s) show no measurable lag ($T_{{lag}}$ = 0): the profile is linear from the start, so $K_p$ and $J_{{ss}}$ are estimated but $D$ and $K$ are not identifiable.",
+        'perm_finite_header': "Finite Dose: Donor/Membrane/Receptor Model",
+        'perm_finite_info': "Solves membrane diffusion by finite differences with depletion of a well-mixed donor (applied volume from P-Step 1) and a sink receptor, fitting $D$ and $K$ to each replicate's cumulative profile. $K_p = K D / h$; $T_{lag} = h^2/(6D)$ is the infinite-dose equivalent.",
+        'perm_finite_button': "Fit All Replicates (Finite Dose)",
+        'perm_finite_spinner': "Fitting the finite-dose model to all curves...",
+        'perm_finite_missing': "The finite-dose model requires area, thickness, $C_0$ and applied volume/mass greater than zero for this group.",
+        'perm_finite_simulator': "Simulate profile with D and K",
+        'perm_finite_label_d': "D (cm²/h)",
+        'perm_finite_label_k': "K (partition)",
+        'perm_finite_plot_fit': "Fit (Finite Dose)",
+        'perm_finite_plot_sim': "Simulation",
+        'perm_finite_dose_line': "Applied dose",
+        'perm_finite_not_converged': "{} curve(s) did not converge; the values shown are from the initial grid search.",
         'perm_step5_header': "P-Step 5: Comparative Summary of Permeation Parameters",
         'perm_step5_info': "Use the tabs below to compare your groups.",
         'perm_step5_tab_summary': "Parameter Summary", 
@@ -279,7 +376,11 @@ TEXT_DICT = {
         'perm_step5_col_kp': "Kp (cm/h)",
         'perm_step5_col_d': "Diffusion Coeff. (D)",
         'perm_step5_col_r2': "R² (Fit)",
-        'perm_step5_empty': "No saved results yet. Go to P-Step 4 to calculate and save parameters for each group.",
+        'perm_step5_col_window': "Window (h)",
+        'perm_step5_col_source': "Window Source",
+        'perm_step5_window_auto': "Detected",
+        'perm_step5_window_saved': "Saved (P-Step 4)",
+        'perm_step5_replicates': "Per-Replicate Parameters",
         
         'perm_stats_header': "Statistical Comparison (ANOVA/t-test)",
         'perm_stats_info': "This analysis calculates the selected parameter for **each replicate** in the common time range to determine if the difference between groups is statistically significant (p < 0.05).",
@@ -299,52 +400,158 @@ TEXT_DICT = {
         'perm_stats_conclusion_nonsig': "NOT SIGNIFICANT: The difference between the groups is not statistically significant (p >= 0.05).",
         'perm_stats_error_replicas': "Error: At least one of the selected groups does not have enough replicates (minimum 2) or valid data in this time range.",
         'perm_stats_error_no_fit': "Error: Could not calculate the parameter for some replicates. Check data linearity in the selected range.",
+        'posthoc_method': "Post-hoc test (applied when the ANOVA is significant):",
+        'posthoc_tukey': "Tukey HSD (equal variances)",
+        'posthoc_gh': "Games-Howell (unequal variances)",
+        'posthoc_header': "Pairwise Post-Hoc Comparisons",
+        'posthoc_summary': "{} of {} pairs with a significant difference (p < 0.05).",
+        'posthoc_p_value': "p-value",
         'perm_stats_error_no_data': "Error: No data found in the selected range for one of the groups.",
         'home_footer': "Return to Module Selection", # <-- CORRIGIDO
     }
 }
 
-# --- Função de Cálculo de Parâmetros por Réplica ---
-def calculate_perm_params_replica(df_replica, area, thickness, c0, y_axis_col):
-    """Calcula Jss, T_lag, Kp, D para uma única réplica (df_replica) usando fit linear."""
+def obter_somas_prefixo_perm():
+    """Somas de prefixo da curva média de cada grupo; montadas uma vez por processamento (Etapa 1) e reutilizadas
+    pela detecção do steady-state e por cada movimento do slider da P-Etapa 4."""
+    if st.session_state.get('somas_prefixo_perm') is None and obter_df_agregado() is not None:
+        config = st.session_state.config
+        curvas = curvas_medias_perm(obter_df_agregado(), config['col_grupo'], config['y_axis_mean'])
+        st.session_state.somas_prefixo_perm = {grupo: somas_prefixo(t, q) for grupo, (t, q) in curvas.items()}
+    return st.session_state.get('somas_prefixo_perm')
+
+def obter_janelas_steady_state():
+    """Janelas detectadas de todos os grupos; recalculadas somente quando os dados são reprocessados (Etapa 1)."""
+    if st.session_state.get('janelas_steady_state') is None and obter_somas_prefixo_perm() is not None:
+        st.session_state.janelas_steady_state = detectar_janelas_grupos(obter_somas_prefixo_perm())
+    return st.session_state.get('janelas_steady_state')
+
+def obter_perfis_fluxo(n_pontos=PONTOS_FLUXO_PADRAO):
+    """Perfis de fluxo por tamanho de janela; calculados uma vez por processamento (Etapa 1)."""
+    if st.session_state.get('matriz_processada') is None:
+        return None
+    if st.session_state.get('perfis_fluxo') is None:
+        st.session_state.perfis_fluxo = {}
+    if n_pontos not in st.session_state.perfis_fluxo:
+        st.session_state.perfis_fluxo[n_pontos] = perfis_fluxo_perm(st.session_state.matriz_processada, st.session_state.config, n_pontos)
+    return st.session_state.perfis_fluxo[n_pontos]
+
+def janelas_em_uso():
+    """Janela de cada grupo: a salva na P-Etapa 4 ou, se não houver, a detectada automaticamente."""
+    janelas = {grupo: janela[:2] for grupo, janela in obter_janelas_steady_state().items() if janela is not None}
+    janelas.update(st.session_state.get('perm_results') or {})
+    return janelas
+
+def exibir_ajuste_crank(T, grupo_selecionado, t_grupo, q_grupo, y_label):
+    """Seção da P-Etapa 4 com o ajuste de Crank (botão para todas as réplicas; tabelas e curva do grupo atual)."""
+    st.markdown("---")
+    st.subheader(T['perm_crank_header'])
+    st.info(T['perm_crank_info'])
+    if st.button(T['perm_crank_button']):
+        with st.spinner(T['perm_crank_spinner']):
+            st.session_state.ajuste_crank = ajustar_crank_perm(st.session_state.matriz_processada, st.session_state.config)
     
-    t_data_rep = df_replica['Tempo']
-    q_data_rep = df_replica[y_axis_col]
+    if st.session_state.get('ajuste_crank') is None:
+        return
+    df_replicas, df_grupos = st.session_state.ajuste_crank
+    col_grupo = st.session_state.config['col_grupo']
+    colunas = [col_grupo, 'D', 'K', 'Kp', 'Jss', 'T_lag', 'R2', 'Convergiu']
+    formato = {'D': "{:.3e}", 'K': "{:.4g}", 'Kp': "{:.4g}", 'Jss': "{:.4f}", 'T_lag': "{:.4f}", 'R2': "{:.4f}"}
     
-    # Mínimo de 2 pontos para regressão linear
-    if len(q_data_rep) < 2:
-        return None
+    linha = df_grupos[df_grupos[col_grupo] == grupo_selecionado]
+    if len(linha) and np.isfinite(linha['s'].iloc[0]):
+        s, t_lag, escala = linha[['s', 'L', 'Escala']].iloc[0]
+        t_curva = np.linspace(0, float(t_grupo[-1]), 200)
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=t_grupo, y=q_grupo, mode='markers', name=T['perm_step4_plot_data'], marker=dict(color='blue', size=10)))
+        fig.add_trace(go.Scatter(x=t_curva, y=escala * model_crank(t_curva, s, t_lag), mode='lines', name=T['perm_crank_plot_fit'],
+                                 line=dict(color='green')))
+        fig.update_layout(
+            title=f"{T['perm_crank_plot_fit']}: {grupo_selecionado}",
+            xaxis_title=T['step3_xaxis_label'], yaxis_title=y_label,
+            template="plotly_white",
+            legend=dict(orientation="h", yanchor="top", y=-0.2, xanchor="center", x=0.5)
+        )
+        st.plotly_chart(fig, use_container_width=True, config=PLOTLY_CONFIG)
+    
+    # Só falhas reais do otimizador; curvas puladas por falta de dados têm Convergiu = <NA>
+    n_falhas = int(df_replicas['Convergiu'].eq(False).sum() + df_grupos['Convergiu'].eq(False).sum())
+    if n_falhas:
+        st.warning(T['perm_crank_not_converged'].format(n_falhas))
+    n_sem_lag = int((df_replicas['T_lag'] == 0).sum() + (df_grupos['T_lag'] == 0).sum())
+    if n_sem_lag:
+        st.info(T['perm_crank_no_lag'].format(n_sem_lag))
+    st.markdown(f"**{T['perm_crank_groups']}**")
+    st.dataframe(df_grupos[colunas].style.format(formato, na_rep="-"), width='stretch', hide_index=True)
+    st.markdown(f"**{T['perm_crank_replicates']}**")
+    colunas_rep = colunas[:1] + [st.session_state.config['col_amostra_nome']] + colunas[1:]
+    st.dataframe(df_replicas[colunas_rep].style.format(formato, na_rep="-"), width='stretch', hide_index=True)
+    get_download_button(df_replicas[colunas_rep], T, "ajuste_crank_replicas.csv", "ajuste_crank_replicas.xlsx")
 
-    try:
-        # Tenta a regressão linear
-        fit = stats.linregress(t_data_rep, q_data_rep)
-        slope = fit.slope
-        intercept = fit.intercept
-        
-        # 1. Jss (Fluxo)
-        jss = slope / area if area > 0 else 0.0
-        
-        # 2. T_lag (Tempo de Latência)
-        t_lag = -intercept / slope if slope != 0 else 0.0
-        t_lag = max(t_lag, 0)
-        
-        # 3. Kp (Coef. Permeabilidade)
-        kp = jss / c0 if c0 > 0 and jss != 0 else 0.0
-        
-        # 4. D (Coef. Difusão)
-        d_coeff = (thickness**2) / (6 * t_lag) if t_lag > 0 and thickness > 0 else 0.0
-        
-        return {
-            'Jss': jss,
-            'T_lag': t_lag,
-            'Kp': kp,
-            'D': d_coeff,
-            'R2': fit.rvalue**2
-        }
-    except Exception:
-        # Se linregress falhar (e.g., todos os pontos são iguais)
-        return None
+def exibir_ajuste_dose_finita(T, grupo_selecionado, t_grupo, q_grupo, y_label):
+    """Seção da P-Etapa 4 para dose finita: ajuste de D e K por réplica e simulador do perfil do grupo atual."""
+    config = st.session_state.config
+    st.markdown("---")
+    st.subheader(T['perm_finite_header'])
+    st.info(T['perm_finite_info'])
+    if st.button(T['perm_finite_button']):
+        with st.spinner(T['perm_finite_spinner']):
+            st.session_state.ajuste_dose_finita = ajustar_dose_finita_perm(st.session_state.matriz_processada, config)
+
+    col_grupo = config['col_grupo']
+    area, espessura = config.get('membrane_area', 0.0), config.get('membrane_thickness', 0.0)
+    c0 = config.get('c0_dict', {}).get(grupo_selecionado, 0.0)
+    vol_doador = config.get('vol_doador_dict', {}).get(grupo_selecionado, 0.0)
+    if min(area, espessura, c0, vol_doador) <= 0:
+        st.warning(T['perm_finite_missing'])
+        return
+
+    # Simulador: parte dos valores ajustados para o grupo (quando houver) e aceita D e K manuais
+    resultado = st.session_state.get('ajuste_dose_finita')
+    ajuste_grupo = None
+    if resultado is not None:
+        linha = resultado[1][resultado[1][col_grupo] == grupo_selecionado]
+        if len(linha) and np.isfinite(linha['D'].iloc[0]):
+            ajuste_grupo = (float(linha['D'].iloc[0]), float(linha['K'].iloc[0]))
+    D_ini, K_ini = ajuste_grupo if ajuste_grupo is not None else (1e-4, 1.0)
+    with st.expander(T['perm_finite_simulator']):
+        c1, c2 = st.columns(2)
+        D_sim = c1.number_input(T['perm_finite_label_d'], min_value=0.0, value=D_ini, format="%.3e", key=f"perm_finite_d_{grupo_selecionado}")
+        K_sim = c2.number_input(T['perm_finite_label_k'], min_value=0.0, value=K_ini, format="%.4g", key=f"perm_finite_k_{grupo_selecionado}")
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=t_grupo, y=q_grupo, mode='markers', name=T['perm_step4_plot_data'], marker=dict(color='blue', size=10)))
+    t_curva = np.linspace(0, float(t_grupo[-1]), 200)
+    if ajuste_grupo is not None:
+        fig.add_trace(go.Scatter(x=t_curva, y=simular_dose_finita(t_curva, *ajuste_grupo, espessura, area, vol_doador, c0), mode='lines',
+                                 name=T['perm_finite_plot_fit'], line=dict(color='green')))
+    if D_sim > 0 and K_sim > 0:
+        fig.add_trace(go.Scatter(x=t_curva, y=simular_dose_finita(t_curva, D_sim, K_sim, espessura, area, vol_doador, c0), mode='lines',
+                                 name=T['perm_finite_plot_sim'], line=dict(color='orange', dash='dash')))
+    fig.add_hline(y=c0 * vol_doador, line_dash="dot", line_color="gray", annotation_text=T['perm_finite_dose_line'])
+    fig.update_layout(
+        title=f"{T['perm_finite_header']}: {grupo_selecionado}",
+        xaxis_title=T['step3_xaxis_label'], yaxis_title=y_label,
+        template="plotly_white",
+        legend=dict(orientation="h", yanchor="top", y=-0.2, xanchor="center", x=0.5)
+    )
+    st.plotly_chart(fig, use_container_width=True, config=PLOTLY_CONFIG)
 
+    if resultado is None:
+        return
+    df_replicas, df_grupos = resultado
+    colunas = [col_grupo, 'D', 'K', 'Kp', 'T_lag', 'R2', 'Convergiu']
+    formato = {'D': "{:.3e}", 'K': "{:.4g}", 'Kp': "{:.4g}", 'T_lag': "{:.4f}", 'R2': "{:.4f}"}
+    # Só falhas reais do otimizador; curvas puladas por falta de dados têm Convergiu = <NA>
+    n_falhas = int(df_replicas['Convergiu'].eq(False).sum() + df_grupos['Convergiu'].eq(False).sum())
+    if n_falhas:
+        st.warning(T['perm_finite_not_converged'].format(n_falhas))
+    st.markdown(f"**{T['perm_crank_groups']}**")
+    st.dataframe(df_grupos[colunas].style.format(formato, na_rep="-"), width='stretch', hide_index=True)
+    st.markdown(f"**{T['perm_crank_replicates']}**")
+    colunas_rep = colunas[:1] + [config['col_amostra_nome']] + colunas[1:]
+    st.dataframe(df_replicas[colunas_rep].style.format(formato, na_rep="-"), width='stretch', hide_index=True)
+    get_download_button(df_replicas[colunas_rep], T, "ajuste_dose_finita_replicas.csv", "ajuste_dose_finita_replicas.xlsx")
 
 # --- Funções de Renderização de Página ---
 
@@ -401,11 +608,9 @@ def render_perm_step1(T):
             st.error(T['step1_error_calib_a'])
             return
         try:
-            # Reutiliza load_data do m_release
-            if uploaded_file.name.endswith('.csv') or uploaded_file.name.endswith('.txt'):
-                df_wide = load_data(uploaded_file, sep=sep, decimal=decimal)
-            else:
-                df_wide = pd.read_excel(uploaded_file)
+            # Reutiliza a leitura em cache do m_release (hash do conteúdo + opções de leitura)
+            chave_arquivo = chave_leitura(uploaded_file, sep, decimal)
+            df_wide = ler_arquivo_cache(chave_arquivo, uploaded_file.getvalue())
             
             if df_wide is None: 
                 return
@@ -436,6 +641,7 @@ def render_perm_step1(T):
             unique_groups = df_wide[col_grupo].unique()
             doses_dict = {} 
             c0_dict = {} 
+            vol_doador_dict = {}
 
             st.markdown("---")
 
@@ -456,6 +662,7 @@ def render_perm_step1(T):
                     
                     # Cálculo da Dose Total Q_initial
                     dose_total_grupo = conc_form * vol_or_mass_form
+                    vol_doador_dict[grupo] = vol_or_mass_form
                     
                 else: 
                     # Dose Infinita: campo oculto, Dose Total irrelevante
@@ -468,41 +675,27 @@ def render_perm_step1(T):
             st.markdown("---")
             if st.button(T['step1_button_process'], type="primary", key="perm_process"):
                 with st.spinner(T['step1_spinner_process']):
-                    df_long = df_wide.melt(id_vars=[col_amostra_nome, col_grupo], value_vars=cols_tempo, var_name='Tempo', value_name='Area')
-                    df_long['Tempo'] = pd.to_numeric(df_long['Tempo'], errors='coerce')
-                    df_long['Area'] = pd.to_numeric(df_long['Area'], errors='coerce')
-                    df_long = df_long.dropna(subset=['Tempo', 'Area'], how='any')
-                    
-                    if unidade_tempo == T['step1_time_minutes']:
-                        df_long['Tempo'] = df_long['Tempo'] / 60
-                    
                     col_conc_nome = f"{T['step1_col_conc_name']} ({unidade_conc})"
                     col_q_acumulada_nome = f"{T['step1_col_q_name']} ({unidade_massa})"
                     col_percent_nome = T['step1_col_pct_name'] 
 
-                    # Reutiliza calcular_liberacao_replica_v9 do m_release
-                    df_long_processado = df_long.groupby(col_amostra_nome).apply(
-                        calcular_liberacao_replica_v9,
-                        include_groups=False, 
-                        col_grupo=col_grupo, vol_celula=vol_celula,
-                        vol_amostra=vol_amostra, cal_a=cal_a, cal_b=cal_b,
-                        doses_dict=doses_dict, col_conc=col_conc_nome,
-                        col_q_acumulada=col_q_acumulada_nome,
-                        col_percent=col_percent_nome
-                    )
-                    
-                    df_long_processado = df_long_processado.reset_index()
-                    
-                    df_agregado = df_long_processado.groupby([col_grupo, 'Tempo']).agg(
-                        Média_Q_Acumulada=(col_q_acumulada_nome, 'mean'),
-                        SD_Q_Acumulada=(col_q_acumulada_nome, 'std'),
-                        Média_Percent=(col_percent_nome, 'mean'),
-                        SD_Percent=(col_percent_nome, 'std')
-                    ).reset_index()
-                    
-                    df_agregado = df_agregado.fillna(0)
-                    st.session_state.df_long_processado = df_long_processado
-                    st.session_state.df_agregado = df_agregado
+                    # Pipeline incremental compartilhado com o m_release (tabelas longas montadas sob demanda)
+                    parametros = dict(vol_celula=vol_celula, vol_amostra=vol_amostra, cal_a=cal_a, cal_b=cal_b,
+                                      doses_dict=doses_dict, tempo_em_minutos=(unidade_tempo == T['step1_time_minutes']))
+                    st.session_state.chave_processamento = chave_processamento(chave_arquivo, **parametros)
+                    st.session_state.matriz_processada, st.session_state.status_pipeline = PIPELINE_PROCESSAMENTO.processar(
+                        df_wide, chave_arquivo=chave_arquivo, **parametros)
+                    st.session_state.df_long_processado = None
+                    st.session_state.df_agregado = None
+                    st.session_state.matriz_f2 = None
+                    st.session_state.metricas_replicas = None
+                    st.session_state.param_replicas = None
+                    st.session_state.somas_prefixo_perm = None
+                    st.session_state.janelas_steady_state = None
+                    st.session_state.ajuste_crank = None
+                    st.session_state.ajuste_dose_finita = None
+                    st.session_state.perfis_fluxo = None
+                    st.session_state.perm_results = {}
                     
                     config_dict = {
                         'unidade_massa': unidade_massa,
@@ -518,6 +711,7 @@ def render_perm_step1(T):
                         'membrane_area': membrane_area,
                         'membrane_thickness': membrane_thickness,
                         'c0_dict': c0_dict, 
+                        'vol_doador_dict': vol_doador_dict,
                         'dose_type': dose_type, 
                         'unidade_aplicada': unidade_aplicada, 
                         'y_label': f"{T['perm_y_label_q']} ({unidade_massa})",
@@ -528,34 +722,37 @@ def render_perm_step1(T):
                     
                     st.session_state.config = config_dict
                     st.success(T['step1_success_process'])
+            exibir_status_pipeline(T)
         except Exception as e:
             st.error(f"{T['step1_error_process']} {e}")
 
 def render_perm_step2(T):
     st.header(T['perm_step2_header'])
-    if st.session_state.df_long_processado is None:
+    df_long_processado = obter_df_long_processado()
+    if df_long_processado is None:
         st.warning(T['step2_warning_process'])
         return
+    df_agregado = obter_df_agregado()
     st.info(T['perm_step2_info'])
     
     st.subheader(T['step2_subheader_raw'])
     # FIX V62: width='stretch'
-    st.dataframe(st.session_state.df_long_processado, width='stretch')
-    get_download_button(st.session_state.df_long_processado, T, "dados_permeacao_replicas.csv", "dados_permeacao_replicas.xlsx")
+    st.dataframe(df_long_processado, width='stretch')
+    get_download_button(df_long_processado, T, "dados_permeacao_replicas.csv", "dados_permeacao_replicas.xlsx")
 
     st.subheader(T['step2_subheader_agg'])
     # FIX V62: width='stretch'
-    st.dataframe(st.session_state.df_agregado, width='stretch')
-    get_download_button(st.session_state.df_agregado, T, "dados_permeacao_agregados.csv", "dados_permeacao_agregados.xlsx")
+    st.dataframe(df_agregado, width='stretch')
+    get_download_button(df_agregado, T, "dados_permeacao_agregados.csv", "dados_permeacao_agregados.xlsx")
 
 def render_perm_step3(T):
     st.header(T['perm_step3_header'])
     
-    if st.session_state.df_agregado is None:
+    if obter_df_agregado() is None:
         st.warning(T['step2_warning_process'])
         return
 
-    df_agg = st.session_state.df_agregado
+    df_agg = obter_df_agregado()
     config = st.session_state.config
     col_grupo = config['col_grupo']
     grupos_disponiveis = df_agg[col_grupo].unique()
@@ -613,16 +810,56 @@ def render_perm_step3(T):
     # CORREÇÃO: Substitui width='stretch' por use_container_width=True e usa config
     st.plotly_chart(fig_comparativo, use_container_width=True, config=PLOTLY_CONFIG)
 
+    # --- Fluxo instantâneo por réplica ---
+    st.markdown("---")
+    st.subheader(T['perm_step3_flux_header'])
+    st.info(T['perm_step3_flux_info'])
+    n_pontos = st.select_slider(T['perm_step3_flux_points'], options=[3, 5, 7, 9], value=PONTOS_FLUXO_PADRAO, key="perm_flux_points")
+    df_fluxo, df_picos = obter_perfis_fluxo(n_pontos)
+    unidade_fluxo = f"{config['unidade_massa']}/cm²/h" if config.get('membrane_area', 0.0) > 0 else f"{config['unidade_massa']}/h"
+
+    fig_fluxo = go.Figure()
+    for grupo in grupos_disponiveis:
+        df_grupo = df_fluxo[df_fluxo[col_grupo] == grupo]
+        fig_fluxo.add_trace(go.Scatter(
+            x=df_grupo['Tempo'], y=df_grupo['Média_Fluxo'],
+            mode='lines+markers', name=grupo,
+            line=dict(color=color_map.get(grupo), width=2),
+            marker=dict(size=8),
+            error_y=dict(type='data', array=df_grupo['SD_Fluxo'].fillna(0), visible=True, thickness=1.5, width=3)
+        ))
+    fig_fluxo.update_layout(
+        title=T['perm_step3_flux_title'],
+        xaxis_title=T['step3_xaxis_label'], yaxis_title=f"{T['perm_step3_flux_yaxis']} ({unidade_fluxo})",
+        template="plotly_white",
+        height=450,
+        xaxis_mirror=True, yaxis_mirror=True,
+        xaxis_linewidth=1, yaxis_linewidth=1,
+        xaxis_linecolor='black', yaxis_linecolor='black',
+        legend=dict(orientation="h", yanchor="top", y=-0.2, xanchor="center", x=0.5),
+        margin=dict(l=50, r=50, t=50, b=150)
+    )
+    st.plotly_chart(fig_fluxo, use_container_width=True, config=PLOTLY_CONFIG)
+
+    # Pico de fluxo e tempo do pico: resumo por grupo (Média ± SD) e tabela por réplica
+    resumo = df_picos.groupby(col_grupo, sort=False)[['Fluxo_Pico', 'T_Pico']].agg(['mean', 'std'])
+    resumo.columns = ['Fluxo_Pico', 'SD_Fluxo_Pico', 'T_Pico', 'SD_T_Pico']
+    st.markdown(f"**{T['perm_step3_flux_peaks']}** ({unidade_fluxo})")
+    st.dataframe(resumo.reset_index().style.format("{:.4g}", subset=list(resumo.columns), na_rep="-"), width='stretch', hide_index=True)
+    with st.expander(T['perm_step3_flux_replicates']):
+        st.dataframe(df_picos.style.format({'Fluxo_Pico': "{:.4g}", 'T_Pico': "{:.4g}"}, na_rep="-"), width='stretch', hide_index=True)
+    get_download_button(df_picos, T, "fluxo_pico_replicas.csv", "fluxo_pico_replicas.xlsx")
+
 def render_perm_step4(T):
     st.header(T['perm_step4_header'])
     
-    if st.session_state.df_agregado is None:
+    if obter_df_agregado() is None:
         st.warning(T['step2_warning_process'])
         return
         
     st.info(T['perm_step4_info'])
 
-    df_agg = st.session_state.df_agregado
+    df_agg = obter_df_agregado()
     config = st.session_state.config
     col_grupo = config['col_grupo']
     grupos_disponiveis = df_agg[col_grupo].unique()
@@ -636,7 +873,7 @@ def render_perm_step4(T):
     1.  **{T['perm_step4_selectbox_group']}**
     2.  **{T['adjust_slider_label']}** to isolate the **linear phase** (Steady-State) of the permeation profile.
     3.  Observe the **{T['perm_step4_r2']}** of the fit and the {T['perm_param_jss']} calculated.
-    4.  Click on **"{T['perm_step4_button_save']}"** to store the parameters for P-Step 5 ({T['perm_step5_tab_summary']} and {T['perm_step5_tab_stats']}).
+    4.  Click on **"{T['perm_step4_button_save']}"** to use this window in P-Step 5 ({T['perm_step5_tab_summary']}); groups without a saved window use the detected one.
     """)
     st.markdown("---")
     # --- FIM DAS INSTRUÇÕES ---
@@ -648,39 +885,42 @@ def render_perm_step4(T):
         st.warning(T['perm_step4_warning_dose'], icon="⚠️")
 
     if grupo_selecionado:
-        df_grupo = df_agg[df_agg[col_grupo] == grupo_selecionado].copy()
-        df_grupo = df_grupo[df_grupo[y_axis_mean] >= 0] 
-        
-        if len(df_grupo) < 2:
+        # Curva média e somas de prefixo do grupo (cache): cada posição do slider é uma consulta O(1)
+        prefixo = obter_somas_prefixo_perm().get(grupo_selecionado)
+        if prefixo is None or len(prefixo['tempos']) < 2:
             st.error(T['perm_step4_error_points'])
             return
+        t_grupo, q_grupo = prefixo['tempos'], prefixo['valores']
 
-        min_time = float(df_grupo['Tempo'].min())
-        max_time = float(df_grupo['Tempo'].max())
+        min_time = float(t_grupo[0])
+        max_time = float(t_grupo[-1])
         
-        default_range = (min_time, max_time)
-        if len(df_grupo['Tempo']) >= 3:
-             default_range = (df_grupo['Tempo'].iloc[1], max_time) if len(df_grupo['Tempo']) > 1 else (min_time, max_time)
+        # Posição inicial do slider: janela de steady-state detectada automaticamente
+        janela_auto = obter_janelas_steady_state().get(grupo_selecionado)
+        if janela_auto is not None:
+            default_range = (janela_auto[0], janela_auto[1])
+            st.caption(T['perm_step4_auto_window'].format(janela_auto[0], janela_auto[1], janela_auto[2], janela_auto[3]))
+        else:
+            default_range = (min_time, max_time)
+            if len(t_grupo) >= 3:
+                 default_range = (t_grupo[1], max_time)
         
         # CORREÇÃO: Removendo o argumento 'step' do st.select_slider
         time_range = st.select_slider(
             T['perm_step4_slider_label'],
-            options=list(df_grupo['Tempo']),
+            options=t_grupo.tolist(),
             value=default_range,
-            key="perm_time_slider"
+            key=f"perm_time_slider_{grupo_selecionado}" # Um slider por grupo: cada um parte da sua janela detectada
         )
         
-        df_fit = df_grupo[
-            (df_grupo['Tempo'] >= time_range[0]) & 
-            (df_grupo['Tempo'] <= time_range[1])
-        ]
-        
-        t_data_fit = df_fit['Tempo']
-        q_data_fit = df_fit[y_axis_mean]
+        i_ini = int(np.searchsorted(t_grupo, time_range[0], side='left'))
+        i_fim = int(np.searchsorted(t_grupo, time_range[1], side='right')) - 1
+        t_data_fit = t_grupo[i_ini:i_fim + 1]
+        q_data_fit = q_grupo[i_ini:i_fim + 1]
         
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=df_grupo['Tempo'], y=df_grupo[y_axis_mean],
+            x=t_grupo, y=q_grupo,
             mode='markers', name=T['perm_step4_plot_data'],
             marker=dict(color='blue', size=10)
         ))
@@ -689,53 +929,41 @@ def render_perm_step4(T):
         slope, intercept, r2, t_lag, jss, kp, d_coeff = 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
         fit_success = False
 
-        if len(df_fit) >= 2:
-            try:
-                fit_results = stats.linregress(t_data_fit, q_data_fit)
-                
-                slope = fit_results.slope
-                intercept = fit_results.intercept
-                r2 = fit_results.rvalue**2
-                
-                # --- Cálculo dos Parâmetros ---
-                area = config.get('membrane_area', 0.0)
-                thickness = config.get('membrane_thickness', 0.0)
-                c0 = config.get('c0_dict', {}).get(grupo_selecionado, 0.0)
-                massa_unit = config.get('unidade_massa', 'unid.')
-                conc_unit = config.get('unidade_conc', 'unid./mL')
-
-                jss = slope / area if area > 0 else 0.0
-                t_lag = -intercept / slope if slope != 0 else 0.0
-                t_lag = max(t_lag, 0)
-                kp = jss / c0 if c0 > 0 and jss != 0 else 0.0
-                d_coeff = (thickness**2) / (6 * t_lag) if t_lag > 0 and thickness > 0 else 0.0
-                
-                # Salva resultados no estado para uso posterior
-                st.session_state.fit_results = fit_results
-                st.session_state.current_perm_group = grupo_selecionado
-                st.session_state.current_time_range = time_range 
-                
-                fit_success = True
-                
-                # Extrapolação da linha (do tempo 0 até o tempo final)
-                t_extrapol = np.array([0, max_time]) 
-                q_extrapol = intercept + slope * t_extrapol
-                
-                fig.add_trace(go.Scatter(
-                    x=t_extrapol, y=q_extrapol,
-                    mode='lines', name=T['perm_step4_plot_fit'],
-                    line=dict(color='red', dash='dash')
-                ))
-                
-                fig.add_trace(go.Scatter(
-                    x=t_data_fit, y=q_data_fit,
-                    mode='markers', name=T.get('pontos_usados', "Pontos Usados"), 
-                    marker=dict(color='red', size=12, symbol='cross')
-                ))
-
-            except Exception as e:
-                st.error(f"{T['perm_step4_error_fit']} (Erro: {e})")
-                st.session_state.fit_results = None
+        if len(t_data_fit) >= 2:
+            slope, intercept, r2 = (float(v) for v in regressao_janelas(prefixo, i_ini, i_fim))
+            
+            # --- Cálculo dos Parâmetros ---
+            area = config.get('membrane_area', 0.0)
+            thickness = config.get('membrane_thickness', 0.0)
+            c0 = config.get('c0_dict', {}).get(grupo_selecionado, 0.0)
+            massa_unit = config.get('unidade_massa', 'unid.')
+            conc_unit = config.get('unidade_conc', 'unid./mL')
+
+            parametros = parametros_permeacao(slope, intercept, area, thickness, c0)
+            jss, t_lag, kp, d_coeff = (float(parametros[nome]) for nome in ('Jss', 'T_lag', 'Kp', 'D'))
+            
+            # Salva resultados no estado para uso posterior
+            st.session_state.fit_results = {'slope': slope, 'intercept': intercept, 'r2': r2}
+            st.session_state.current_perm_group = grupo_selecionado
+            st.session_state.current_time_range = time_range 
+            
+            fit_success = True
+            
+            # Extrapolação da linha (do tempo 0 até o tempo final)
+            t_extrapol = np.array([0, max_time]) 
+            q_extrapol = intercept + slope * t_extrapol
+            
+            fig.add_trace(go.Scatter(
+                x=t_extrapol, y=q_extrapol,
+                mode='lines', name=T['perm_step4_plot_fit'],
+                line=dict(color='red', dash='dash')
+            ))
+            
+            fig.add_trace(go.Scatter(
+                x=t_data_fit, y=q_data_fit,
+                mode='markers', name=T.get('pontos_usados', "Pontos Usados"), 
+                marker=dict(color='red', size=12, symbol='cross')
+            ))
         else:
             st.warning(T['perm_step4_error_fit'])
             st.session_state.fit_results = None
@@ -787,25 +1015,24 @@ def render_perm_step4(T):
             """)
 
             if st.button(T['perm_step4_button_save'], type="primary"):
-                if 'perm_results' not in st.session_state:
+                if not st.session_state.get('perm_results'):
                     st.session_state.perm_results = {}
-                    
-                results_to_save = {
-                    T['perm_step5_col_jss']: jss,
-                    T['perm_step5_col_lag']: t_lag,
-                    T['perm_step5_col_kp']: kp,
-                    T['perm_step5_col_d']: d_coeff,
-                    T['perm_step5_col_r2']: r2
-                }
                 
-                st.session_state.perm_results[grupo_selecionado] = results_to_save
+                # Salva a janela; os parâmetros do resumo são recalculados pelo motor a partir dela
+                st.session_state.perm_results[grupo_selecionado] = (float(time_range[0]), float(time_range[1]))
                 st.success(f"{T['perm_step4_save_success']} **{grupo_selecionado}**")
 
+        # Ajuste do perfil completo (a série de Crank vale para C0 constante no doador)
+        if dose_type != T['perm_step1_type_finite']:
+            exibir_ajuste_crank(T, grupo_selecionado, t_grupo, q_grupo, y_label)
+        else:
+            exibir_ajuste_dose_finita(T, grupo_selecionado, t_grupo, q_grupo, y_label)
+
 
 def render_perm_step5(T):
     st.header(T['perm_step5_header'])
     
-    if st.session_state.df_agregado is None:
+    if obter_df_agregado() is None:
         st.warning(T['step2_warning_process'])
         return
 
@@ -815,8 +1042,8 @@ def render_perm_step5(T):
         T['perm_step5_tab_stats']
     ])
 
-    df_agg = st.session_state.df_agregado
-    df_long = st.session_state.df_long_processado
+    df_agg = obter_df_agregado()
+    df_long = obter_df_long_processado()
     config = st.session_state.config
     col_grupo = config['col_grupo']
     y_axis_col = config['y_axis_col']
@@ -828,12 +1055,22 @@ def render_perm_step5(T):
     with tab_summary:
         st.info(T['perm_step5_info'])
         
-        if 'perm_results' not in st.session_state or not st.session_state.perm_results:
-            st.info(T['perm_step5_empty'])
-            return
+        # Todos os grupos de uma vez, cada um na janela salva na P-Etapa 4 ou na detectada automaticamente
+        matriz = st.session_state.matriz_processada
+        janelas = janelas_em_uso()
+        salvas = st.session_state.get('perm_results') or {}
+        df_grupos = parametros_perm_grupos(matriz, config, janelas)
         
-        df_resumo_perm = pd.DataFrame.from_dict(st.session_state.perm_results, orient='index')
-        df_resumo_perm.index.name = T['perm_step5_col_group']
+        df_resumo_perm = pd.DataFrame({
+            T['perm_step5_col_group']: df_grupos[col_grupo],
+            T['perm_step5_col_window']: [f"{a:g}–{b:g}" if np.isfinite(a) else "-" for a, b in zip(df_grupos['T_Inicial'], df_grupos['T_Final'])],
+            T['perm_step5_col_source']: [T['perm_step5_window_saved'] if g in salvas else T['perm_step5_window_auto'] for g in df_grupos[col_grupo]],
+            T['perm_step5_col_jss']: df_grupos['Jss'],
+            T['perm_step5_col_lag']: df_grupos['T_lag'],
+            T['perm_step5_col_kp']: df_grupos['Kp'],
+            T['perm_step5_col_d']: df_grupos['D'],
+            T['perm_step5_col_r2']: df_grupos['R2'],
+        }).set_index(T['perm_step5_col_group'])
         
         format_dict = {
             T['perm_step5_col_jss']: "{:.4f}",
@@ -850,6 +1087,14 @@ def render_perm_step5(T):
         )
         
         get_download_button(df_resumo_perm, T, "resumo_permeacao.csv", "resumo_permeacao.xlsx")
+        
+        st.subheader(T['perm_step5_replicates'])
+        df_replicas = parametros_perm_replicas(matriz, config, janelas)
+        st.dataframe(
+            df_replicas.style.format({'Jss': "{:.4f}", 'T_lag': "{:.4f}", 'Kp': "{:.4f}", 'D': "{:.2e}", 'R2': "{:.4f}"}, na_rep="-"),
+            width='stretch', hide_index=True
+        )
+        get_download_button(df_replicas, T, "parametros_permeacao_replicas.csv", "parametros_permeacao_replicas.xlsx")
 
     with tab_stats:
         st.subheader(T['perm_stats_header'])
@@ -890,7 +1135,11 @@ def render_perm_step5(T):
             st.warning("Dados insuficientes no eixo do tempo para análise estatística.")
             return
 
-        # 4. Botão de Análise
+        # 4. Teste post-hoc usado se a ANOVA for significante
+        opcoes_post_hoc = {T['posthoc_tukey']: "tukey", T['posthoc_gh']: "games-howell"}
+        metodo_post_hoc = st.radio(T['posthoc_method'], list(opcoes_post_hoc), horizontal=True, key="perm_posthoc_metodo")
+
+        # 5. Botão de Análise
         if st.button(T['perm_stats_button'], type="primary"):
             if len(grupos_selecionados_stats) < 2:
                 st.error("Selecione pelo menos 2 grupos para comparar.")
@@ -900,40 +1149,20 @@ def render_perm_step5(T):
             grupos_validos = True
 
             with st.spinner(f"Calculando {param_key} das réplicas e rodando teste estatístico..."):
+                # Todas as réplicas dos grupos selecionados numa chamada, no intervalo comum
+                df_replicas_stats = parametros_perm_replicas(
+                    st.session_state.matriz_processada, config,
+                    {grupo: time_range_stats for grupo in grupos_selecionados_stats}
+                )
                 for grupo in grupos_selecionados_stats:
-                    replicas_param = []
-                    c0_grupo = config.get('c0_dict', {}).get(grupo, 0.0)
-                    
-                    replicas_do_grupo = df_long[df_long[col_grupo] == grupo][col_amostra].unique()
-                    
-                    for replica_id in replicas_do_grupo:
-                        df_replica = df_long[
-                            (df_long[col_amostra] == replica_id) &
-                            (df_long['Tempo'] >= time_range_stats[0]) & 
-                            (df_long['Tempo'] <= time_range_stats[1])
-                        ].sort_values(by='Tempo')
-                        
-                        if len(df_replica) >= 2:
-                            params = calculate_perm_params_replica(df_replica, area, thickness, c0_grupo, y_axis_col)
-                            
-                            if params and params[param_key] is not None:
-                                replicas_param.append(params[param_key])
-                            else:
-                                pass 
-                        else:
-                            pass 
+                    replicas_param = df_replicas_stats.loc[df_replicas_stats[col_grupo] == grupo, param_key].dropna().to_numpy()
                     
                     if len(replicas_param) < 2:
                         grupos_validos = False
                         st.error(f"{T['perm_stats_error_replicas']} (Grupo: {grupo}). Apenas {len(replicas_param)} réplicas válidas encontradas.")
                         break
                     
-                    if len(replicas_param) > 0:
-                        dados_param_replicas.append(np.array(replicas_param))
-                    else:
-                        grupos_validos = False
-                        st.error(f"{T['perm_stats_error_no_data']} (Grupo: {grupo})")
-                        break
+                    dados_param_replicas.append(replicas_param)
 
 
             if grupos_validos:
@@ -961,6 +1190,9 @@ def render_perm_step5(T):
                     st.success(f"**{T['perm_stats_conclusion_sig']}** {p_valor_formatado_desc}")
                 else:
                     st.info(f"**{T['perm_stats_conclusion_nonsig']}** {p_valor_formatado_desc}")
+                
+                if len(dados_param_replicas) > 2 and p_value < 0.05:
+                    exibir_post_hoc(dados_param_replicas, grupos_selecionados_stats, opcoes_post_hoc[metodo_post_hoc], T, f"post_hoc_{param_key}")
 
 
 # --- MÓDULO DE PERMEAÇÃO - App Principal ---
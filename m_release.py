@@ -3,11 +3,21 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-from scipy.optimize import curve_fit
-from sklearn.metrics import r2_score
-from scipy import stats 
-import warnings
+from scipy import stats
 import io 
+import os
+import hashlib
+
+# Cálculos (processamento, modelos cinéticos e estatística) vêm do núcleo sem Streamlit
+from fluxiq_core.processamento import (montar_df_long_processado, montar_df_agregado,
+                                       montar_metricas_replicas, matriz_y_replicas)
+from fluxiq_core.cinetica import (MODELOS_V12, CACHE_AJUSTES, model_zero_order, model_first_order, model_higuchi,
+                                  model_korsmeyer_peppas, model_hixson_crowell, model_weibull, model_peppas_sahlin,
+                                  rodar_modelagem_v12, rodar_modelagem_lote_v12, rodar_modelagem_replicas_v12,
+                                  resumir_parametros_replicas, matriz_replicas_grupo, bootstrap_parametros_v12)
+from fluxiq_core.pipeline import PIPELINE_PROCESSAMENTO
+from fluxiq_core.estatistica import (testar_todos_tempos, comparacoes_post_hoc, calcular_f2, calcular_matriz_f2,
+                                     calcular_f2_bootstrap)
 # Não precisamos do xlsxwriter aqui, pois o Pandas Streamlit já o utiliza internamente para o download.
 
 # --- Dicionário de Tradução (i18n) - MÓDULO RELEASE ---
@@ -57,6 +67,18 @@ TEXT_DICT = {
         'step1_button_process': "Processar Dados",
         'step1_spinner_process': "Processando...",
         'step1_success_process': "Dados processados! Navegue para a 'Etapa 2'.",
+        'pipeline_header': "Etapas do processamento (cache)",
+        'pipeline_col_stage': "Etapa",
+        'pipeline_col_status': "Estado",
+        'pipeline_col_time': "Tempo (ms)",
+        'pipeline_stage_matriz': "Matriz réplicas x tempos (leitura da planilha)",
+        'pipeline_stage_concentracao': "Concentração (calibração)",
+        'pipeline_stage_sink': "Correção de sink",
+        'pipeline_stage_percent': "% da dose (por grupo)",
+        'pipeline_stage_agregado': "Média/SD (por grupo)",
+        'pipeline_cached': "Em cache",
+        'pipeline_recomputed': "Recalculada",
+        'pipeline_partial': "Recalculada em {} de {} grupos",
         'step1_error_process': "Erro ao ler ou processar o arquivo:",
         'step1_col_conc_name': "Concentracao",
         'step1_col_q_name': "Q_Acumulada_Corrigida",
@@ -110,6 +132,13 @@ TEXT_DICT = {
         'step4_glossary_complex': "Significado: A liberação não segue um único mecanismo claro, but sim uma combinação de vários processos (ex: difusão, erosão, inchaço) de forma simultânea.",
         'step4_glossary_select': "Selecione um grupo para ver a interpretação do mecanismo.",
 
+        'boot_header': "Intervalos de Confiança Bootstrap (Reamostragem de Réplicas)",
+        'boot_info': "As réplicas do grupo são reamostradas com reposição; cada reamostragem gera uma curva média que é ajustada por todos os modelos. O IC é o intervalo percentil de 95%. N_Validos = reamostragens com ajuste válido (R² acima do limite).",
+        'boot_n': "Número de reamostragens",
+        'boot_button': "Calcular IC Bootstrap",
+        'boot_button_all': "Calcular IC Bootstrap (todos os grupos)",
+        'boot_progress': "Reamostragens ajustadas: {:.0%}",
+        'boot_error_replicas': "O grupo '{}' precisa de pelo menos 2 réplicas para o bootstrap.",
         'step5_header': "Etapa 5: Análise Comparativa",
         'step5_info': "Use as abas abaixo para comparar seus grupos usando diferentes métodos.",
         'step5_tab_summary': "Resumo Cinético e AUC", 
@@ -120,6 +149,10 @@ TEXT_DICT = {
         'step5_col_group': "Grupo",
         'step5_col_auc': "AUC", 
         'step5_col_release_final': "Liberacao_Final", 
+        'step5_col_ed': "ED",
+        'step5_col_mdt': "MDT",
+        'step5_col_t50': "t50",
+        'step5_col_t80': "t80",
         'step5_col_model': "Melhor_Modelo",
         'step5_col_r2': "R2",
         'step5_col_k': "Constante_1 (k ou a)",
@@ -135,6 +168,10 @@ TEXT_DICT = {
         'step5_stats_select_time': "Selecione o parâmetro para comparar:",
         'step5_stats_time_final': "Último ponto de tempo",
         'step5_stats_auc': "AUC (Área Sob a Curva)",
+        'step5_stats_ed': "ED (Eficiência de Dissolução)",
+        'step5_stats_mdt': "MDT (Tempo Médio de Dissolução)",
+        'step5_stats_t50': "t50 (tempo para 50%)",
+        'step5_stats_t80': "t80 (tempo para 80%)",
         'step5_stats_button': "Rodar Análise Estatística",
         'step5_stats_results': "Resultados da Análise",
         'step5_stats_ttest': "Teste t (2 Grupos)",
@@ -143,6 +180,30 @@ TEXT_DICT = {
         'step5_stats_conclusion_sig': "SIGNIFICANTE: A diferença entre os grupos é estatisticamente significante (p < 0.05).",
         'step5_stats_conclusion_nonsig': "NÃO SIGNIFICANTE: A diferença entre os grupos não é estatisticamente significante (p >= 0.05).",
         'step5_stats_error_replicas': "Erro: Pelo menos um dos grupos selecionados não possui réplicas suficientes (mínimo 2) para um teste estatístico.",
+        'step5_tab_replicates': "Parâmetros por Réplica",
+        'step5_replicates_info': "Cada modelo é ajustado a cada réplica (não à curva média). A tabela de resumo mostra média, DP e IC 95% de cada parâmetro por grupo; ajustes com R² abaixo do limite não entram na estatística.",
+        'step5_replicates_summary': "Resumo por Grupo (Média, DP e IC 95%)",
+        'step5_replicates_table': "Parâmetros de Cada Réplica",
+        'step5_replicates_none': "Nenhuma réplica com pontos suficientes (mínimo 3) para a modelagem.",
+        'step5_replicates_spinner': "Ajustando os modelos a todas as réplicas...",
+        'step5_stats_param': "Parâmetro por réplica: {} · {}",
+        'step5_stats_error_param': "O grupo '{}' tem menos de 2 réplicas com ajuste válido para {} · {}.",
+        'posthoc_method': "Teste post-hoc (aplicado quando a ANOVA é significante):",
+        'posthoc_tukey': "Tukey HSD (variâncias iguais)",
+        'posthoc_gh': "Games-Howell (variâncias desiguais)",
+        'posthoc_header': "Comparações Post-Hoc de Todos os Pares",
+        'posthoc_summary': "{} de {} pares com diferença significante (p < 0.05).",
+        'posthoc_p_value': "Valor-p",
+        'step5_stats_all_header': "Todos os Tempos (correção para múltiplos testes)",
+        'step5_stats_all_info': "Testa os grupos selecionados em cada ponto de tempo numa única passada (teste t de Welch para 2 grupos, ANOVA para mais) e ajusta os valores-p pelo número de tempos testados.",
+        'step5_stats_all_correction': "Correção dos valores-p:",
+        'step5_stats_all_holm': "Holm (controle do FWER)",
+        'step5_stats_all_bh': "Benjamini-Hochberg (controle do FDR)",
+        'step5_stats_all_button': "Testar Todos os Tempos",
+        'step5_stats_all_summary': "{} de {} tempos testados com diferença significante (p ajustado < 0.05).",
+        'step5_stats_all_none': "Nenhum tempo pôde ser testado (são necessárias ao menos 2 réplicas por grupo e variância não nula).",
+        'step5_stats_all_plot': "Perfis médios com os tempos significantes destacados",
+        'step5_stats_all_band': "p ajustado < 0.05",
         'step5_f2_header': "Cálculo do Fator de Similaridade (f₂)",
         'step5_f2_info': "O fator f₂ é um método da FDA/EMA para comparar perfis. Um valor de f₂ entre 50 e 100 sugere que os dois perfis são similares.",
         'step5_f2_ref': "Selecione o Grupo de Referência (R):",
@@ -153,6 +214,18 @@ TEXT_DICT = {
         'step5_f2_error': "Erro: Os grupos devem ser diferentes.",
         'step5_f2_error_points': "Erro: Não há pontos de tempo em comum (excluindo t=0) entre os grupos.",
         'step5_f2_warning_rules': "Aviso: O cálculo padrão do f₂ tem regras estritas (ex: apenas um ponto > 85% de liberação). Este cálculo usa todos os pontos de tempo comuns (t>0) para uma estimativa.",
+        'step5_f2_matrix_header': "Matriz f₂ de Todos os Pares",
+        'step5_f2_matrix_info': "f₂ das médias para cada par (linha = Referência, coluna = Teste), usando os tempos em comum (t > 0). Valores ≥ 50 sugerem perfis similares.",
+        'step5_f2_mode': "Modo de cálculo:",
+        'step5_f2_mode_mean': "f₂ das médias",
+        'step5_f2_mode_boot': "f₂ bootstrap (réplicas)",
+        'step5_f2_boot_info': "Os perfis de réplica de R e T são reamostrados com reposição e o f₂ é recalculado em cada reamostragem. Critério: os perfis são considerados similares se o percentil 5 do f₂ bootstrap for ≥ 50. Também são reportados o f₂ esperado (soma a variância das médias) e o f₂ com correção de viés (subtrai a variância; indefinido quando ela supera a diferença entre os perfis).",
+        'step5_f2_boot_n': "Número de reamostragens",
+        'step5_f2_boot_p5': "f₂ bootstrap (P5)",
+        'step5_f2_boot_result_sim': "SIMILARES: P5 do f₂ bootstrap = {:.2f} (≥ 50)",
+        'step5_f2_boot_result_nonsim': "NÃO SIMILARES: P5 do f₂ bootstrap = {:.2f} (< 50)",
+        'step5_f2_boot_hist': "Distribuição do f₂ bootstrap",
+        'step5_f2_boot_error_replicas': "Erro: O bootstrap requer pelo menos 2 réplicas em cada grupo.",
 
         'model_zero_order': "Ordem Zero",
         'model_first_order': "Primeira Ordem",
@@ -201,6 +274,9 @@ TEXT_DICT = {
         'prompt_task_1': "1. **Redação de Metodologia:** Com base nos parâmetros, escreva uma seção de 'Metodologia' em formato de artigo científico para o ensaio de liberação *in vitro*.",
         'prompt_task_2': "2. **Pesquisa e Tabela de Literatura:** Com base no Fármaco e Sistema, pesquise na literatura por estudos semelhantes. Crie uma tabela comparando os resultados da literatura (especialmente o mecanismo e a % de liberação) com os meus 'Resultado da Modelagem Cinética' (Tabela 4). **Importante: Inclua o DOI ou Link para cada artigo na tabela.**", 
         'prompt_task_3': "3. **Discussão dos Resultados:** Escreva uma 'Discussão' em formato de artigo. Analise os dados das Tabelas 3 e 4, explique o que o 'Melhor Modelo' (ex: Higuchi, Peppas-Sahlin) significa para cada formulação e compare os grupos entre si (e com a literatura da Tarefa 2), focando no 'Objetivo Principal'.",
+        'fit_cache_stats': "Cache de ajustes: {hits} acertos / {misses} falhas ({itens}/{max_itens} ajustes armazenados)",
+        'fit_workers': "Processos para ajustes (Etapas 5 e 6)",
+        'fit_workers_help': "1 = execução no processo do app. Valores maiores distribuem os ajustes (grupo × modelo) num pool de processos; os resultados são idênticos.",
         'home_footer': "Retornar à Seleção de Módulo", # <-- CORRIGIDO
     },
     'en': {
@@ -247,6 +323,18 @@ TEXT_DICT = {
         'step1_button_process': "Process Data",
         'step1_spinner_process': "Processing...",
         'step1_success_process': "Data processed! Navigate to 'Step 2'.",
+        'pipeline_header': "Processing stages (cache)",
+        'pipeline_col_stage': "Stage",
+        'pipeline_col_status': "Status",
+        'pipeline_col_time': "Time (ms)",
+        'pipeline_stage_matriz': "Replicate x time matrix (sheet reshaping)",
+        'pipeline_stage_concentracao': "Concentration (calibration)",
+        'pipeline_stage_sink': "Sink correction",
+        'pipeline_stage_percent': "% of dose (per group)",
+        'pipeline_stage_agregado': "Mean/SD (per group)",
+        'pipeline_cached': "Cached",
+        'pipeline_recomputed': "Recomputed",
+        'pipeline_partial': "Recomputed for {} of {} groups",
         'step1_error_process': "Error reading or processing file:",
         'step1_col_conc_name': "Concentration",
         'step1_col_q_name': "Q_Accumulated_Corrected",
@@ -301,6 +389,13 @@ TEXT_DICT = {
         'step4_glossary_complex': "Meaning: The release does not follow a single clear mechanism, but rather a combination of several processes (e.g., diffusion, erosion, swelling) simultaneously.",
         'step4_glossary_select': "Select a group to see the mechanism interpretation.",
         
+        'boot_header': "Bootstrap Confidence Intervals (Replicate Resampling)",
+        'boot_info': "The group's replicates are resampled with replacement; each resample gives a mean curve that is fitted by every model. The CI is the 95% percentile interval. N_Validos = resamples with a valid fit (R² above the threshold).",
+        'boot_n': "Number of resamples",
+        'boot_button': "Calculate Bootstrap CI",
+        'boot_button_all': "Calculate Bootstrap CI (all groups)",
+        'boot_progress': "Resamples fitted: {:.0%}",
+        'boot_error_replicas': "Group '{}' needs at least 2 replicates for the bootstrap.",
         'step5_header': "Step 5: Comparative Analysis 🏆",
         'step5_info': "Use the tabs below to compare your groups using different methods.",
         'step5_tab_summary': "Kinetic Summary & AUC",
@@ -311,6 +406,10 @@ TEXT_DICT = {
         'step5_col_group': "Group",
         'step5_col_auc': "AUC",
         'step5_col_release_final': "Final_Release",
+        'step5_col_ed': "DE",
+        'step5_col_mdt': "MDT",
+        'step5_col_t50': "t50",
+        'step5_col_t80': "t80",
         'step5_col_model': "Best_Model",
         'step5_col_r2': "R2",
         'step5_col_k': "Constant_1 (k or a)",
@@ -326,6 +425,10 @@ TEXT_DICT = {
         'step5_stats_select_time': "Select parameter to compare:",
         'step5_stats_time_final': "Last time point",
         'step5_stats_auc': "AUC (Area Under the Curve)",
+        'step5_stats_ed': "DE (Dissolution Efficiency)",
+        'step5_stats_mdt': "MDT (Mean Dissolution Time)",
+        'step5_stats_t50': "t50 (time to 50%)",
+        'step5_stats_t80': "t80 (time to 80%)",
         'step5_stats_button': "Run Statistical Analysis",
         'step5_stats_results': "Analysis Results",
         'step5_stats_ttest': "t-test (2 Groups)",
@@ -334,6 +437,30 @@ TEXT_DICT = {
         'step5_stats_conclusion_sig': "SIGNIFICANT: The difference between the groups is statistically significant (p < 0.05).",
         'step5_stats_conclusion_nonsig': "NOT SIGNIFICANT: The difference between the groups is not statistically significant (p >= 0.05).",
         'step5_stats_error_replicas': "Error: At least one of the selected groups does not have enough replicates (minimum 2) for a statistical test.",
+        'step5_tab_replicates': "Per-Replicate Parameters",
+        'step5_replicates_info': "Every model is fitted to every replicate (not to the mean curve). The summary table shows the mean, SD and 95% CI of each parameter per group; fits with R² below the threshold are left out of the statistics.",
+        'step5_replicates_summary': "Group Summary (Mean, SD and 95% CI)",
+        'step5_replicates_table': "Parameters of Each Replicate",
+        'step5_replicates_none': "No replicate has enough points (minimum 3) for modeling.",
+        'step5_replicates_spinner': "Fitting the models to every replicate...",
+        'step5_stats_param': "Per-replicate parameter: {} · {}",
+        'step5_stats_error_param': "Group '{}' has fewer than 2 replicates with a valid fit for {} · {}.",
+        'posthoc_method': "Post-hoc test (applied when the ANOVA is significant):",
+        'posthoc_tukey': "Tukey HSD (equal variances)",
+        'posthoc_gh': "Games-Howell (unequal variances)",
+        'posthoc_header': "Pairwise Post-Hoc Comparisons",
+        'posthoc_summary': "{} of {} pairs with a significant difference (p < 0.05).",
+        'posthoc_p_value': "p-value",
+        'step5_stats_all_header': "All Timepoints (multiple-testing correction)",
+        'step5_stats_all_info': "Tests the selected groups at every timepoint in a single pass (Welch's t-test for 2 groups, ANOVA for more) and adjusts the p-values for the number of timepoints tested.",
+        'step5_stats_all_correction': "p-value correction:",
+        'step5_stats_all_holm': "Holm (controls FWER)",
+        'step5_stats_all_bh': "Benjamini-Hochberg (controls FDR)",
+        'step5_stats_all_button': "Test All Timepoints",
+        'step5_stats_all_summary': "{} of {} tested timepoints with a significant difference (adjusted p < 0.05).",
+        'step5_stats_all_none': "No timepoint could be tested (at least 2 replicates per group and non-zero variance are required).",
+        'step5_stats_all_plot': "Mean profiles with significant timepoints highlighted",
+        'step5_stats_all_band': "adjusted p < 0.05",
         'step5_f2_header': "Similarity Factor (f₂) Calculation",
         'step5_f2_info': "The f₂ factor is an FDA/EMA method for comparing profiles. An f₂ value between 50 and 100 suggests the two profiles are similar.",
         'step5_f2_ref': "Select Reference Group (R):",
@@ -344,6 +471,18 @@ TEXT_DICT = {
         'step5_f2_error': "Error: Groups must be different.",
         'step5_f2_error_points': "Error: No common time points (excluding t=0) between groups.",
         'step5_f2_warning_rules': "Warning: Standard f₂ calculation has strict rules (e.g., only one point > 85% release). This calculation uses all common time points (t>0) for an estimation.",
+        'step5_f2_matrix_header': "All-Pairs f₂ Matrix",
+        'step5_f2_matrix_info': "f₂ of the means for every pair (row = Reference, column = Test), using the common time points (t > 0). Values ≥ 50 suggest similar profiles.",
+        'step5_f2_mode': "Calculation mode:",
+        'step5_f2_mode_mean': "f₂ of the means",
+        'step5_f2_mode_boot': "Bootstrap f₂ (replicates)",
+        'step5_f2_boot_info': "The replicate profiles of R and T are resampled with replacement and f₂ is recomputed for every resample. Criterion: the profiles are considered similar if the 5th percentile of the bootstrap f₂ is ≥ 50. The expected f₂ (adds the variance of the means) and the bias-corrected f₂ (subtracts it; undefined when the variance exceeds the profile difference) are also reported.",
+        'step5_f2_boot_n': "Number of resamples",
+        'step5_f2_boot_p5': "Bootstrap f₂ (P5)",
+        'step5_f2_boot_result_sim': "SIMILAR: bootstrap f₂ P5 = {:.2f} (≥ 50)",
+        'step5_f2_boot_result_nonsim': "NOT SIMILAR: bootstrap f₂ P5 = {:.2f} (< 50)",
+        'step5_f2_boot_hist': "Bootstrap f₂ distribution",
+        'step5_f2_boot_error_replicas': "Error: The bootstrap requires at least 2 replicates in each group.",
 
         'model_zero_order': "Zero-Order",
         'model_first_order': "First-Order",
@@ -392,6 +531,9 @@ TEXT_DICT = {
         'prompt_task_1': "1. **Methodology Write-up:** Based on the parameters, write a scientific article-style 'Methodology' section for the *in vitro* release assay.",
         'prompt_task_2': "2. **Literature Research & Table:** Based on the Drug and System, search the literature for similar studies. Create a table comparing the literature results (especially mechanism and % release) with my 'Kinetic Modeling Results' (Table 4). **Important: Include the DOI or Link for each article in the table.**",
         'prompt_task_3': "3. **Results Discussion:** Write an article-style 'Discussion'. Analyze the data from Tables 3 and 4, explain what the 'Best Model' (e.g., Higuchi, Peppas-Sahlin) means for each formulation, and compare the groups against each other (and with the literature from Task 2), focusing on the 'Main Objective'.",
+        'fit_cache_stats': "Fit cache: {hits} hits / {misses} misses ({itens}/{max_itens} fits stored)",
+        'fit_workers': "Fitting processes (Steps 5 and 6)",
+        'fit_workers_help': "1 = run inside the app process. Higher values spread the (group × model) fits over a process pool; results are identical.",
         'home_footer': "Return to Module Selection", # <-- CORRIGIDO
     }
 }
@@ -409,176 +551,107 @@ def load_data(uploaded_file, sep, decimal):
         st.error(f"Unexpected error reading file: {e}")
         return None
 
-# --- Funções dos Modelos Cinéticos ---
-def model_zero_order(t, k0): return k0 * t
-def model_first_order(t, Q_inf, k1): return Q_inf * (1 - np.exp(-k1 * t))
-def model_higuchi(t, kH): return kH * np.sqrt(t)
-def model_korsmeyer_peppas(t, kKP, n): return kKP * (t**n)
-def model_hixson_crowell(t, Q_inf, kHC):
-    termo = 1 - kHC * t
-    termo = np.where(termo < 0, 0, termo)
-    return Q_inf * (1 - (termo)**3)
-def model_weibull(t, Q_inf, a, b):
-    t_a = t / a
-    t_a = np.where(t_a <= 0, 1e-9, t_a)
-    return Q_inf * (1 - np.exp(-(t_a**b)))
-def model_peppas_sahlin(t, k_diff, k_relax):
-    return (k_diff * np.sqrt(t)) + (k_relax * t)
-
-# --- Função de Cálculo V9 (Liberação/Permeação) ---
-def calcular_liberacao_replica_v9(df_group, col_grupo, vol_celula, vol_amostra, cal_a, cal_b, doses_dict, col_conc, col_q_acumulada, col_percent):
-    df_group = df_group.sort_values(by='Tempo')
-    grupo_da_replica = df_group[col_grupo].iloc[0]
-    dose_total = doses_dict.get(grupo_da_replica, {}).get('dose_total', 0.0)
-    df_group[col_conc] = (df_group['Area'] - cal_b) / cal_a
-    
-    df_group[col_conc] = df_group[col_conc].fillna(0)
-
-    correcao_acumulada = 0
-    q_acumulada_corrigida = []
-    
-    for i in range(len(df_group)):
-        conc_atual = df_group.iloc[i][col_conc]
-        
-        if pd.isna(conc_atual):
-            conc_atual = 0.0
-
-        q_no_recipiente = conc_atual * vol_celula
-        q_corrigida = q_no_recipiente + correcao_acumulada
-        q_acumulada_corrigida.append(q_corrigida)
-        correcao_acumulada += (conc_atual * vol_amostra)
-        
-    df_group[col_q_acumulada] = q_acumulada_corrigida
-    
-    if dose_total > 0:
-        df_group[col_percent] = (df_group[col_q_acumulada] / dose_total) * 100
-        df_group[col_percent] = df_group[col_percent].clip(lower=0)
-        
-        idx_100_series = (df_group[col_percent] > 99.9999)
-        if idx_100_series.any():
-            first_idx_100 = idx_100_series.idxmax()
-            df_group.loc[first_idx_100:, col_percent] = 100.0
-            
-    else:
-        df_group[col_percent] = 0.0
-        
-    return df_group
-
-# --- Função de Modelagem V12 ---
-def rodar_modelagem_v12(t_data, q_data, df_model, y_axis_mean, has_dose_info):
-    resultados_df_list = []
-    modeling_messages = []
-    
-    R2_THRESHOLD = 0.05
-    q_max = q_data.max()
-    if q_max == 0: q_max = 1.0
-    t_data = np.array(t_data)
-    q_data = np.array(q_data)
-    
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        
-        limite_kp = 60.0 if has_dose_info else q_max * 0.6
-        df_kp = df_model[df_model[y_axis_mean] <= limite_kp]
-        t_data_kp = df_kp["Tempo"]
-        q_data_kp = df_kp[y_axis_mean]
-
-        # Modelo 4: Korsmeyer-Peppas
-        if len(t_data_kp) >= 3:
-            try:
-                popt_kp, _ = curve_fit(model_korsmeyer_peppas, t_data_kp, q_data_kp, 
-                                       p0=[q_max*0.1, 0.5], maxfev=5000,
-                                       bounds=([0, 0], [np.inf, 2.0]))
-                r2_kp = r2_score(q_data_kp, model_korsmeyer_peppas(t_data_kp, *popt_kp))
-                if r2_kp >= R2_THRESHOLD:
-                    resultados_df_list.append({"Modelo": "Korsmeyer-Peppas", "R2": r2_kp, "kKP": popt_kp[0], "n": popt_kp[1]})
-                else:
-                    resultados_df_list.append({"Modelo": "Korsmeyer-Peppas", "R2": np.nan, "kKP": np.nan, "n": np.nan})
-            except (RuntimeError, ValueError) as e:
-                resultados_df_list.append({"Modelo": "Korsmeyer-Peppas", "R2": np.nan, "kKP": np.nan, "n": np.nan})
+# --- Cache de Leitura e Processamento (st.cache_data) ---
+# Chaveados pelo hash do conteúdo do arquivo, e não pelo objeto do upload: reenviar o mesmo arquivo, voltar à Etapa 1
+# ou mudar um widget que não entra na chave não relê nem reprocessa. Memória limitada (max_entries) e expiração (TTL).
+CACHE_MAX_ENTRADAS = 16
+CACHE_TTL_S = 3600
+
+def chave_leitura(uploaded_file, sep, decimal):
+    """Chave da leitura: SHA-256 do conteúdo + opções de leitura (as opções de CSV não se aplicam ao Excel)."""
+    texto = uploaded_file.name.endswith('.csv') or uploaded_file.name.endswith('.txt')
+    if not texto:
+        sep, decimal = None, None
+    return (hashlib.sha256(uploaded_file.getvalue()).hexdigest(), texto, sep, decimal)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, ttl=CACHE_TTL_S, show_spinner=False)
+def ler_arquivo_cache(chave, _conteudo):
+    """Planilha larga do arquivo enviado; lida de novo só quando o conteúdo ou as opções de leitura mudam."""
+    _, texto, sep, decimal = chave
+    if texto:
+        return load_data(io.BytesIO(_conteudo), sep=sep, decimal=decimal)
+    return pd.read_excel(io.BytesIO(_conteudo))
+
+def chave_processamento(chave_arquivo, vol_celula, vol_amostra, cal_a, cal_b, doses_dict, tempo_em_minutos):
+    """Hash de (arquivo, volumes, calibração, doses, unidade de tempo): identifica a matriz processada (chave das tabelas)."""
+    doses = sorted((str(g), float(d['dose_total'])) for g, d in doses_dict.items())
+    parametros = (chave_arquivo, float(vol_celula), float(vol_amostra), float(cal_a), float(cal_b), doses, bool(tempo_em_minutos))
+    return hashlib.sha256(repr(parametros).encode()).hexdigest()
+
+def _colunas_tabelas(config):
+    """Nomes de coluna das tabelas longas (dependem do idioma e das unidades, por isso entram na chave)."""
+    return tuple(config[c] for c in ('col_amostra_nome', 'col_grupo', 'col_conc', 'col_q_acumulada', 'col_percent'))
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, ttl=CACHE_TTL_S, show_spinner=False)
+def montar_df_long_cache(chave, colunas, _matriz, _config):
+    """montar_df_long_processado em cache, por chave de processamento e nomes de coluna."""
+    return montar_df_long_processado(_matriz, _config)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, ttl=CACHE_TTL_S, show_spinner=False)
+def montar_df_agregado_cache(chave, colunas, _matriz, _config):
+    """montar_df_agregado em cache, por chave de processamento e nomes de coluna."""
+    return montar_df_agregado(_matriz, _config)
+
+def exibir_status_pipeline(T):
+    """Estado de cada etapa do pipeline no último processamento (em cache, recalculada ou recalculada em parte dos grupos)."""
+    status = st.session_state.get('status_pipeline')
+    if not status:
+        return
+    linhas = []
+    for registro in status:
+        if registro['recalculadas'] == 0:
+            estado = T['pipeline_cached']
+        elif registro['recalculadas'] == registro['total']:
+            estado = T['pipeline_recomputed']
         else:
-            pass # Pular silenciosamente
-        
-        # Modelo 1: Ordem Zero
-        try:
-            popt_zo, _ = curve_fit(model_zero_order, t_data, q_data, bounds=([0], [np.inf]), maxfev=10000)
-            r2_zo = r2_score(q_data, model_zero_order(t_data, *popt_zo))
-            if r2_zo >= R2_THRESHOLD:
-                resultados_df_list.append({"Modelo": "Zero-Order", "R2": r2_zo, "k0": popt_zo[0]})
-            else:
-                resultados_df_list.append({"Modelo": "Zero-Order", "R2": np.nan, "k0": np.nan})
-        except (RuntimeError, ValueError) as e:
-            resultados_df_list.append({"Modelo": "Zero-Order", "R2": np.nan, "k0": np.nan})
-
-        # Modelo 2: Primeira Ordem
-        try:
-            popt_fo, _ = curve_fit(model_first_order, t_data, q_data, 
-                                   p0=[q_max, 0.1], bounds=([0, 0], [np.inf, np.inf]), maxfev=10000)
-            r2_fo = r2_score(q_data, model_first_order(t_data, *popt_fo))
-            if r2_fo >= R2_THRESHOLD:
-                resultados_df_list.append({"Modelo": "First-Order", "R2": r2_fo, "k1": popt_fo[1]})
-            else:
-                resultados_df_list.append({"Modelo": "First-Order", "R2": np.nan, "k1": np.nan})
-        except (RuntimeError, ValueError) as e:
-            resultados_df_list.append({"Modelo": "First-Order", "R2": np.nan, "k1": np.nan})
-
-        # Modelo 3: Higuchi
-        try:
-            popt_h, _ = curve_fit(model_higuchi, t_data, q_data, bounds=([0], [np.inf]), maxfev=10000)
-            r2_h = r2_score(q_data, model_higuchi(t_data, *popt_h))
-            if r2_h >= R2_THRESHOLD:
-                resultados_df_list.append({"Modelo": "Higuchi", "R2": r2_h, "kH": popt_h[0]})
-            else:
-                resultados_df_list.append({"Modelo": "Higuchi", "R2": np.nan, "kH": np.nan})
-        except (RuntimeError, ValueError) as e:
-            resultados_df_list.append({"Modelo": "Higuchi", "R2": np.nan, "kH": np.nan})
-
-        # Modelo 5: Hixson-Crowell
-        try:
-            popt_hc, _ = curve_fit(model_hixson_crowell, t_data, q_data, 
-                                   p0=[q_max, 0.01], maxfev=10000,
-                                   bounds=([0, 0], [np.inf, np.inf])) 
-            r2_hc = r2_score(q_data, model_hixson_crowell(t_data, *popt_hc))
-            if r2_hc >= R2_THRESHOLD:
-                resultados_df_list.append({"Modelo": "Hixson-Crowell", "R2": r2_hc, "kHC": popt_hc[1]})
-            else:
-                resultados_df_list.append({"Modelo": "Hixson-Crowell", "R2": np.nan, "kHC": np.nan})
-        except (RuntimeError, ValueError) as e:
-            resultados_df_list.append({"Modelo": "Hixson-Crowell", "R2": np.nan, "kHC": np.nan})
-
-        # Modelo 6: Weibull
-        try:
-            popt_w, _ = curve_fit(model_weibull, t_data, q_data, 
-                                  p0=[q_max, 2, 1], maxfev=10000,
-                                  bounds=([0, 1e-9, 1e-9], [np.inf, np.inf, np.inf])) 
-            r2_w = r2_score(q_data, model_weibull(t_data, *popt_w))
-            if r2_w >= R2_THRESHOLD:
-                resultados_df_list.append({"Modelo": "Weibull", "R2": r2_w, "a": popt_w[1], "b": popt_w[2]})
-            else:
-                resultados_df_list.append({"Modelo": "Weibull", "R2": np.nan, "a": np.nan, "b": np.nan})
-        except (RuntimeError, ValueError) as e:
-            resultados_df_list.append({"Modelo": "Weibull", "R2": np.nan, "a": np.nan, "b": np.nan})
-
-        # Modelo 7: Peppas-Sahlin
-        try:
-            popt_ps, _ = curve_fit(model_peppas_sahlin, t_data, q_data, 
-                                  p0=[q_max*0.1, q_max*0.1], maxfev=10000,
-                                  bounds=([0, 0], [np.inf, np.inf])) 
-            r2_ps = r2_score(q_data, model_peppas_sahlin(t_data, *popt_ps))
-            if r2_ps >= R2_THRESHOLD:
-                resultados_df_list.append({"Modelo": "Peppas-Sahlin", "R2": r2_ps, "k_diff": popt_ps[0], "k_relax": popt_ps[1]})
-            else:
-                resultados_df_list.append({"Modelo": "Peppas-Sahlin", "R2": np.nan, "k_diff": np.nan, "k_relax": np.nan})
-        except (RuntimeError, ValueError) as e:
-            resultados_df_list.append({"Modelo": "Peppas-Sahlin", "R2": np.nan, "k_diff": np.nan, "k_relax": np.nan})
-
-
-    if not resultados_df_list:
-        return pd.DataFrame(), modeling_messages
-        
-    df_resultados = pd.DataFrame(resultados_df_list).set_index("Modelo").fillna(np.nan)
-    
-    return df_resultados, modeling_messages
+            estado = T['pipeline_partial'].format(registro['recalculadas'], registro['total'])
+        linhas.append({T['pipeline_col_stage']: T[f"pipeline_stage_{registro['etapa']}"], T['pipeline_col_status']: estado,
+                       T['pipeline_col_time']: round(registro['segundos'] * 1000, 2)})
+    with st.expander(T['pipeline_header']):
+        st.dataframe(pd.DataFrame(linhas), hide_index=True, width='stretch')
+
+# --- Acesso Preguiçoso às Tabelas Processadas ---
+def obter_df_long_processado():
+    """Retorna df_long_processado, montando-o da matriz processada somente quando uma tela precisa dele."""
+    if st.session_state.get('df_long_processado') is None and st.session_state.get('matriz_processada') is not None:
+        config = st.session_state.config
+        if st.session_state.get('chave_processamento') is None:
+            st.session_state.df_long_processado = montar_df_long_processado(st.session_state.matriz_processada, config)
+        else:
+            st.session_state.df_long_processado = montar_df_long_cache(
+                st.session_state.chave_processamento, _colunas_tabelas(config), st.session_state.matriz_processada, config)
+    return st.session_state.get('df_long_processado')
+
+def obter_df_agregado():
+    """Retorna df_agregado, montando-o da matriz processada somente quando uma tela precisa dele."""
+    if st.session_state.get('df_agregado') is None and st.session_state.get('matriz_processada') is not None:
+        config = st.session_state.config
+        if st.session_state.get('chave_processamento') is None:
+            st.session_state.df_agregado = montar_df_agregado(st.session_state.matriz_processada, config)
+        else:
+            st.session_state.df_agregado = montar_df_agregado_cache(
+                st.session_state.chave_processamento, _colunas_tabelas(config), st.session_state.matriz_processada, config)
+    return st.session_state.get('df_agregado')
+
+def obter_metricas_replicas():
+    """Métricas por réplica dos dados atuais; recalculadas somente quando os dados são reprocessados (Etapa 1)."""
+    if st.session_state.get('metricas_replicas') is None and st.session_state.get('matriz_processada') is not None:
+        st.session_state.metricas_replicas = montar_metricas_replicas(st.session_state.matriz_processada, st.session_state.config)
+    return st.session_state.get('metricas_replicas')
+
+def obter_param_replicas():
+    """Ajuste dos 7 modelos a cada réplica (Etapa 5); calculado uma vez por processamento e por opção de t = 0."""
+    if st.session_state.get('matriz_processada') is None:
+        return None
+    if st.session_state.get('param_replicas') is None:
+        st.session_state.param_replicas = {}
+    excluir_t_zero = st.session_state.excluir_t_zero
+    if excluir_t_zero not in st.session_state.param_replicas:
+        config = st.session_state.config
+        st.session_state.param_replicas[excluir_t_zero] = rodar_modelagem_replicas_v12(
+            obter_df_long_processado(), config['col_amostra_nome'], config['col_grupo'], config['y_axis_col'],
+            config.get('has_dose_info', False), excluir_t_zero, n_workers=st.session_state.n_workers_ajuste)
+    return st.session_state.param_replicas[excluir_t_zero]
 
 # --- Função de Interpretação V12 ---
 def interpretar_resultados_v12(df_resultados, y_label, lang_key):
@@ -791,26 +864,97 @@ def plotar_modelos_ajustados(df_model_exp, df_resultados, t_data, q_data, y_labe
     )
     st.plotly_chart(fig, use_container_width=True)
 
-# --- Função de Cálculo f2 ---
-def calcular_f2(df_agg, grupo_R, grupo_T, col_grupo, y_axis_mean):
-    """Calcula o Fator de Similaridade f2 entre dois grupos."""
-    
-    df_R = df_agg[df_agg[col_grupo] == grupo_R][['Tempo', y_axis_mean]].rename(columns={y_axis_mean: 'R'})
-    df_T = df_agg[df_agg[col_grupo] == grupo_T][['Tempo', y_axis_mean]].rename(columns={y_axis_mean: 'T'})
+# --- Gráfico com Faixas de Significância por Tempo ---
+def plotar_faixas_significancia(df_agg, grupos, col_grupo, y_axis_mean, y_axis_sd, df_testes, y_label, T):
+    """Perfis médios (± SD) dos grupos com faixas sombreadas nos tempos em que a diferença é significante."""
+    fig = go.Figure()
+    for grupo in grupos:
+        df_grupo = df_agg[df_agg[col_grupo] == grupo]
+        fig.add_trace(go.Scatter(
+            x=df_grupo['Tempo'], y=df_grupo[y_axis_mean],
+            mode='lines+markers', name=str(grupo),
+            error_y=dict(type='data', array=df_grupo[y_axis_sd], visible=True, thickness=1.5, width=3)
+        ))
     
-    df_merged = pd.merge(df_R, df_T, on='Tempo')
-    df_merged = df_merged[df_merged['Tempo'] > 0]
+    # Cada faixa vai até a metade do intervalo para os tempos vizinhos
+    tempos = df_testes["Tempo"].to_numpy(dtype=float)
+    if len(tempos):
+        meios = (tempos[1:] + tempos[:-1]) / 2
+        meia_lacuna = (np.diff(tempos).min() if len(tempos) > 1 else 1.0) / 2
+        esquerda = np.r_[tempos[0] - meia_lacuna, meios]
+        direita = np.r_[meios, tempos[-1] + meia_lacuna]
+        for i, j in enumerate(np.flatnonzero(df_testes["Significante"].to_numpy())):
+            fig.add_vrect(x0=esquerda[j], x1=direita[j], fillcolor="red", opacity=0.12, line_width=0, layer="below",
+                          annotation_text=T['step5_stats_all_band'] if i == 0 else None, annotation_position="top left")
     
-    if df_merged.empty:
-        return None
-        
-    n = len(df_merged)
-    sum_sq_diff = np.sum((df_merged['R'] - df_merged['T'])**2)
+    fig.update_layout(
+        title=T['step5_stats_all_plot'],
+        xaxis_title=T['step3_xaxis_label'], yaxis_title=y_label,
+        template="plotly_white", height=500,
+        xaxis_mirror=True, yaxis_mirror=True,
+        xaxis_linewidth=1, yaxis_linewidth=1,
+        xaxis_linecolor='black', yaxis_linecolor='black',
+        legend=dict(orientation="h", yanchor="top", y=-0.2, xanchor="center", x=0.5),
+        margin=dict(l=50, r=50, t=50, b=150)
+    )
+    return fig
+
+# --- Exibição das Comparações Post-Hoc ---
+def exibir_post_hoc(amostras, nomes, metodo, T, nome_arquivo):
+    """Matriz compacta de valores-p (mapa de calor) e tabela dos pares do teste post-hoc (Tukey HSD ou Games-Howell)."""
+    df_pares, matriz_p = comparacoes_post_hoc(amostras, nomes, metodo)
+    st.subheader(f"{T['posthoc_header']} · {'Tukey HSD' if metodo == 'tukey' else 'Games-Howell'}")
+    st.markdown(T['posthoc_summary'].format(int(df_pares["Significante"].sum()), len(df_pares)))
     
-    f2_termo_interno = 1 + (1 / n) * sum_sq_diff
-    f2 = 50 * np.log10(100 / np.sqrt(f2_termo_interno))
+    # Valores no mapa apenas enquanto couberem; com dezenas de grupos a cor (p < 0.1) carrega a informação
+    fig_matriz = px.imshow(
+        matriz_p, text_auto=".3f" if len(nomes) <= 15 else False, zmin=0, zmax=0.1, color_continuous_scale="RdYlBu",
+        aspect="auto", labels={'color': T['posthoc_p_value']}
+    )
+    fig_matriz.update_layout(height=max(400, 20 * len(nomes)))
+    st.plotly_chart(fig_matriz, use_container_width=True)
     
-    return f2
+    st.dataframe(
+        df_pares.style.format({"Diferenca": "{:.4g}", "EP": "{:.4g}", "q": "{:.3f}", "GL": "{:.2f}", "p": "{:.5f}"}, na_rep="-"),
+        use_container_width=True, hide_index=True
+    )
+    get_download_button(df_pares, T, f"{nome_arquivo}.csv", f"{nome_arquivo}.xlsx")
+
+# --- Exibição do Bootstrap ---
+def exibir_bootstrap_grupos(grupos, df_long, config, T, n_boot, chave_widget):
+    """Roda bootstrap_parametros_v12 para cada grupo com barra de progresso e exibe a tabela de ICs."""
+    col_grupo = config['col_grupo']
+    col_amostra = config['col_amostra_nome']
+    barra = st.progress(0.0, text=T['boot_progress'].format(0.0))
+    tabelas = []
+    for i, grupo in enumerate(grupos):
+        t, Y = matriz_replicas_grupo(df_long, col_amostra, col_grupo, config['y_axis_col'], grupo)
+        if Y.shape[0] < 2:
+            st.error(T['boot_error_replicas'].format(grupo))
+            continue
+        def atualizar(fracao, i=i):
+            total = (i + fracao) / len(grupos)
+            barra.progress(total, text=T['boot_progress'].format(total))
+        df_boot = bootstrap_parametros_v12(t, Y, config.get('has_dose_info', False), st.session_state.excluir_t_zero,
+                                           n_boot=n_boot, n_workers=st.session_state.n_workers_ajuste, progresso=atualizar)
+        df_boot.insert(0, col_grupo, grupo)
+        tabelas.append(df_boot)
+    barra.empty()
+    if not tabelas:
+        return
+    df_ic = pd.concat(tabelas, ignore_index=True)
+    st.dataframe(
+        df_ic.style.format({"Estimativa": "{:.4f}", "IC_Inf": "{:.4f}", "IC_Sup": "{:.4f}"}, na_rep="-"),
+        use_container_width=True, hide_index=True
+    )
+    get_download_button(df_ic, T, f"bootstrap_{chave_widget}.csv", f"bootstrap_{chave_widget}.xlsx")
+
+def obter_matriz_f2():
+    """Matriz f2 do df_agregado atual; recalculada somente quando os dados são reprocessados (Etapa 1)."""
+    if st.session_state.get('matriz_f2') is None and obter_df_agregado() is not None:
+        config = st.session_state.config
+        st.session_state.matriz_f2 = calcular_matriz_f2(obter_df_agregado(), config['col_grupo'], config['y_axis_mean'])
+    return st.session_state.get('matriz_f2')
 
 # --- Funções de Renderização de Página ---
 
@@ -865,10 +1009,9 @@ def render_step1(T):
             st.error(T['step1_error_calib_a'])
             return
         try:
-            if uploaded_file.name.endswith('.csv') or uploaded_file.name.endswith('.txt'):
-                df_wide = load_data(uploaded_file, sep=sep, decimal=decimal)
-            else:
-                df_wide = pd.read_excel(uploaded_file)
+            # Leitura em cache pelo hash do conteúdo: widgets da Etapa 1 não relêem o arquivo a cada rerun
+            chave_arquivo = chave_leitura(uploaded_file, sep, decimal)
+            df_wide = ler_arquivo_cache(chave_arquivo, uploaded_file.getvalue())
             
             if df_wide is None: 
                 return
@@ -897,40 +1040,27 @@ def render_step1(T):
             st.markdown("---")
             if st.button(T['step1_button_process'], type="primary"):
                 with st.spinner(T['step1_spinner_process']):
-                    df_long = df_wide.melt(id_vars=[col_amostra_nome, col_grupo], value_vars=cols_tempo, var_name='Tempo', value_name='Area')
-                    df_long['Tempo'] = pd.to_numeric(df_long['Tempo'], errors='coerce')
-                    df_long['Area'] = pd.to_numeric(df_long['Area'], errors='coerce')
-                    df_long = df_long.dropna(subset=['Tempo', 'Area'], how='any')
-                    
-                    if unidade_tempo == T['step1_time_minutes']:
-                        df_long['Tempo'] = df_long['Tempo'] / 60
-                    
                     col_conc_nome = f"{T['step1_col_conc_name']} ({unidade_conc})"
                     col_q_acumulada_nome = f"{T['step1_col_q_name']} ({unidade_massa})"
                     col_percent_nome = T['step1_col_pct_name']
 
-                    df_long_processado = df_long.groupby(col_amostra_nome).apply(
-                        calcular_liberacao_replica_v9,
-                        include_groups=False, 
-                        col_grupo=col_grupo, vol_celula=vol_celula,
-                        vol_amostra=vol_amostra, cal_a=cal_a, cal_b=cal_b,
-                        doses_dict=doses_dict, col_conc=col_conc_nome,
-                        col_q_acumulada=col_q_acumulada_nome,
-                        col_percent=col_percent_nome
-                    )
-                    
-                    df_long_processado = df_long_processado.reset_index()
-                    
-                    df_agregado = df_long_processado.groupby([col_grupo, 'Tempo']).agg(
-                        Média_Q_Acumulada=(col_q_acumulada_nome, 'mean'),
-                        SD_Q_Acumulada=(col_q_acumulada_nome, 'std'),
-                        Média_Percent=(col_percent_nome, 'mean'),
-                        SD_Percent=(col_percent_nome, 'std')
-                    ).reset_index()
-                    
-                    df_agregado = df_agregado.fillna(0)
-                    st.session_state.df_long_processado = df_long_processado
-                    st.session_state.df_agregado = df_agregado
+                    # Pipeline incremental (só as etapas com entradas alteradas): df_long_processado/df_agregado só são montados quando uma tela precisar
+                    parametros = dict(vol_celula=vol_celula, vol_amostra=vol_amostra, cal_a=cal_a, cal_b=cal_b,
+                                      doses_dict=doses_dict, tempo_em_minutos=(unidade_tempo == T['step1_time_minutes']))
+                    st.session_state.chave_processamento = chave_processamento(chave_arquivo, **parametros)
+                    st.session_state.matriz_processada, st.session_state.status_pipeline = PIPELINE_PROCESSAMENTO.processar(
+                        df_wide, chave_arquivo=chave_arquivo, **parametros)
+                    st.session_state.df_long_processado = None
+                    st.session_state.df_agregado = None
+                    st.session_state.matriz_f2 = None
+                    st.session_state.metricas_replicas = None
+                    st.session_state.param_replicas = None
+                    st.session_state.somas_prefixo_perm = None
+                    st.session_state.janelas_steady_state = None
+                    st.session_state.ajuste_crank = None
+                    st.session_state.ajuste_dose_finita = None
+                    st.session_state.perfis_fluxo = None
+                    st.session_state.perm_results = {}
                     
                     config_dict = {
                         'unidade_massa': unidade_massa, 'has_dose_info': has_any_dose,
@@ -957,32 +1087,35 @@ def render_step1(T):
                     
                     st.session_state.config = config_dict
                     st.success(T['step1_success_process'])
+            exibir_status_pipeline(T)
         except Exception as e:
             st.error(f"{T['step1_error_process']} {e}")
             
 def render_step2(T):
     st.header(T['step2_header'])
-    if st.session_state.df_long_processado is None:
+    df_long_processado = obter_df_long_processado()
+    if df_long_processado is None:
         st.warning(T['step2_warning_process'])
         return
+    df_agregado = obter_df_agregado()
     st.info(T['step2_info'])
     
     st.subheader(T['step2_subheader_raw'])
-    st.dataframe(st.session_state.df_long_processado, use_container_width=True) 
-    get_download_button(st.session_state.df_long_processado, T, "dados_processados_replicas.csv", "dados_processados_replicas.xlsx")
+    st.dataframe(df_long_processado, use_container_width=True) 
+    get_download_button(df_long_processado, T, "dados_processados_replicas.csv", "dados_processados_replicas.xlsx")
 
     st.subheader(T['step2_subheader_agg'])
-    st.dataframe(st.session_state.df_agregado, use_container_width=True) 
-    get_download_button(st.session_state.df_agregado, T, "dados_agregados_media_sd.csv", "dados_agregados_media_sd.xlsx")
+    st.dataframe(df_agregado, use_container_width=True) 
+    get_download_button(df_agregado, T, "dados_agregados_media_sd.csv", "dados_agregados_media_sd.xlsx")
 
 def render_step3(T):
     st.header(T['step3_header'])
     
-    if st.session_state.df_agregado is None:
+    if obter_df_agregado() is None:
         st.warning(T['step2_warning_process'])
         return
 
-    df_agg = st.session_state.df_agregado
+    df_agg = obter_df_agregado()
     config = st.session_state.config
     col_grupo = config['col_grupo']
     grupos_disponiveis = df_agg[col_grupo].unique()
@@ -1070,11 +1203,11 @@ def render_step4(T):
     st.header(T['step4_header'])
     
     # 1. Pré-requisito: Verifica se os dados foram processados
-    if st.session_state.df_agregado is None:
+    if obter_df_agregado() is None:
         st.warning(T['step2_warning_process'])
         return
 
-    df_agg = st.session_state.df_agregado
+    df_agg = obter_df_agregado()
     config = st.session_state.config
     col_grupo = config['col_grupo']
     grupos_disponiveis = df_agg[col_grupo].unique()
@@ -1118,7 +1251,7 @@ def render_step4(T):
             return
 
         # 6. Modelagem
-        df_resultados, mensagens_modelagem = rodar_modelagem_v12(t_data, q_data, df_model, y_axis_mean, config.get('has_dose_info', False))
+        df_resultados, mensagens_modelagem = rodar_modelagem_v12(t_data, q_data, df_model, y_axis_mean, config.get('has_dose_info', False), st.session_state.excluir_t_zero)
 
         for msg in mensagens_modelagem:
             st.warning(msg) 
@@ -1148,6 +1281,13 @@ def render_step4(T):
         
         plotar_modelos_ajustados(df_plot, df_resultados, t_data, q_data, y_axis_mean, T)
 
+        st.markdown("---")
+        st.subheader(T['boot_header'])
+        st.info(T['boot_info'])
+        n_boot_grupo = st.number_input(T['boot_n'], min_value=200, max_value=20000, value=2000, step=500, key="boot_n_step4")
+        if st.button(T['boot_button'], key="boot_button_step4"):
+            exibir_bootstrap_grupos([grupo_selecionado_modelagem], obter_df_long_processado(), config, T, int(n_boot_grupo), "grupo")
+
         st.markdown("---")
         st.subheader(T['step4_subheader_interp'])
         
@@ -1177,14 +1317,14 @@ def render_step4(T):
 def render_step5(T):
     st.header(T['step5_header'])
     
-    if st.session_state.df_agregado is None:
+    if obter_df_agregado() is None:
         st.warning(T['step2_warning_process'])
         return
         
     st.info(T['step5_info'])
 
-    df_agg = st.session_state.df_agregado
-    df_long = st.session_state.df_long_processado
+    df_agg = obter_df_agregado()
+    df_long = obter_df_long_processado()
     config = st.session_state.config
     col_grupo = config['col_grupo']
     grupos_disponiveis = df_agg[col_grupo].unique()
@@ -1192,8 +1332,13 @@ def render_step5(T):
     y_axis_mean = config['y_axis_mean']
     col_amostra = config['col_amostra_nome'] # <-- Nome dinâmico da coluna de réplica/amostra
     
-    tab_summary, tab_stats, tab_f2 = st.tabs([
+    # Métricas independentes de modelo por réplica (AUC, ED, MDT, t50/t80), usadas no resumo e nos testes
+    df_metricas = obter_metricas_replicas()
+    medias_metricas = df_metricas.groupby(col_grupo, sort=False)[['AUC', 'ED', 'MDT', 't50', 't80']].mean()
+    
+    tab_summary, tab_replicates, tab_stats, tab_f2 = st.tabs([
         T['step5_tab_summary'], 
+        T['step5_tab_replicates'], 
         T['step5_tab_stats'], 
         T['step5_tab_f2']
     ])
@@ -1201,6 +1346,7 @@ def render_step5(T):
     with tab_summary:
         st.info(T['step5_summary_info'])
         resumo_list = []
+        dados_modelagem = {}
 
         with st.spinner(T['step5_spinner']):
             y_unit_base = config['y_label'].split('(')[-1].replace(')', '')
@@ -1209,16 +1355,19 @@ def render_step5(T):
                 df_grupo_agg = df_agg[df_agg[col_grupo] == grupo].copy()
                 
                 df_grupo_agg = df_grupo_agg.sort_values(by='Tempo')
-                tempos = df_grupo_agg['Tempo']
                 valores_medios = df_grupo_agg[y_axis_mean]
                 
-                auc_val = np.trapezoid(valores_medios, x=tempos)
                 release_final = valores_medios.iloc[-1]
+                metricas_grupo = medias_metricas.loc[grupo] if grupo in medias_metricas.index else pd.Series(np.nan, index=medias_metricas.columns)
                 
                 resumo_dict = {
                     T['step5_col_group']: grupo,
-                    f"{T['step5_col_auc']} ({y_unit_base}⋅h)": auc_val,
+                    f"{T['step5_col_auc']} ({y_unit_base}⋅h)": metricas_grupo['AUC'],
                     f"{T['step5_col_release_final']} ({y_unit_base})": release_final,
+                    f"{T['step5_col_ed']} (%)": metricas_grupo['ED'],
+                    f"{T['step5_col_mdt']} (h)": metricas_grupo['MDT'],
+                    f"{T['step5_col_t50']} (h)": metricas_grupo['t50'],
+                    f"{T['step5_col_t80']} (h)": metricas_grupo['t80'],
                     T['step5_col_model']: "N/A",
                     T['step5_col_r2']: 0.0,
                     T['step5_col_k']: np.nan, T['step5_col_k_unit']: "-",
@@ -1236,11 +1385,19 @@ def render_step5(T):
                 t_data = df_model["Tempo"]
                 q_data = df_model[y_axis_mean] 
 
-                if len(q_data) < 3:
-                    resumo_list.append(resumo_dict) 
+                resumo_list.append(resumo_dict)
+                if len(q_data) >= 3:
+                    dados_modelagem[grupo] = (t_data.to_numpy(dtype=float), q_data.to_numpy(dtype=float))
+
+            # Todos os grupos ajustados de uma vez (um lote por modelo)
+            df_resultados_todos = rodar_modelagem_lote_v12(dados_modelagem, config.get('has_dose_info', False), st.session_state.excluir_t_zero,
+                                                           n_workers=st.session_state.n_workers_ajuste)
+
+            for resumo_dict in resumo_list:
+                grupo = resumo_dict[T['step5_col_group']]
+                if grupo not in dados_modelagem:
                     continue
-                
-                df_resultados_grupo, _ = rodar_modelagem_v12(t_data, q_data, df_model, y_axis_mean, config.get('has_dose_info', False))
+                df_resultados_grupo = df_resultados_todos.xs(grupo, level="Grupo") if not df_resultados_todos.empty else pd.DataFrame()
                 
                 (melhor_modelo, r2_melhor, 
                  k_val, k_unit, k2_val, k2_unit, n_val, 
@@ -1256,8 +1413,6 @@ def render_step5(T):
                     T['step5_col_n']: n_val,
                     T['step5_col_interp']: interpretacao
                 })
-                
-                resumo_list.append(resumo_dict)
         
         df_resumo = pd.DataFrame(resumo_list).set_index(T['step5_col_group'])
         
@@ -1270,7 +1425,11 @@ def render_step5(T):
             T['step5_col_k2']: "{:.4f}",
             T['step5_col_n']: "{:.3f}",
             f"{T['step5_col_auc']} ({y_unit_base}⋅h)": "{:.2f}",
-            f"{T['step5_col_release_final']} ({y_unit_base})": "{:.2f}"
+            f"{T['step5_col_release_final']} ({y_unit_base})": "{:.2f}",
+            f"{T['step5_col_ed']} (%)": "{:.2f}",
+            f"{T['step5_col_mdt']} (h)": "{:.3f}",
+            f"{T['step5_col_t50']} (h)": "{:.3f}",
+            f"{T['step5_col_t80']} (h)": "{:.3f}"
         }
         
         st.dataframe(
@@ -1278,7 +1437,33 @@ def render_step5(T):
             use_container_width=True
         )
         get_download_button(df_resumo_display, T, "resumo_cinetico_completo.csv", "resumo_cinetico_completo.xlsx")
+
+        st.markdown("---")
+        st.subheader(T['boot_header'])
+        st.info(T['boot_info'])
+        n_boot_todos = st.number_input(T['boot_n'], min_value=200, max_value=20000, value=2000, step=500, key="boot_n_step5")
+        if st.button(T['boot_button_all'], key="boot_button_step5"):
+            exibir_bootstrap_grupos(list(grupos_disponiveis), df_long, config, T, int(n_boot_todos), "todos_grupos")
     
+    with tab_replicates:
+        st.info(T['step5_replicates_info'])
+        with st.spinner(T['step5_replicates_spinner']):
+            df_param_replicas = obter_param_replicas()
+        if df_param_replicas.empty:
+            st.warning(T['step5_replicates_none'])
+        else:
+            st.subheader(T['step5_replicates_summary'])
+            df_resumo_replicas = resumir_parametros_replicas(df_param_replicas, col_grupo)
+            st.dataframe(
+                df_resumo_replicas.style.format({"Media": "{:.4f}", "DP": "{:.4f}", "IC_Inf": "{:.4f}", "IC_Sup": "{:.4f}"}, na_rep="-"),
+                use_container_width=True, hide_index=True
+            )
+            get_download_button(df_resumo_replicas, T, "parametros_replicas_resumo.csv", "parametros_replicas_resumo.xlsx")
+            
+            st.subheader(T['step5_replicates_table'])
+            st.dataframe(df_param_replicas.style.format(precision=4, na_rep="-"), use_container_width=True, hide_index=True)
+            get_download_button(df_param_replicas, T, "parametros_replicas.csv", "parametros_replicas.xlsx")
+
     with tab_stats:
         st.subheader(T['step5_stats_header'])
         st.info(T['step5_stats_info'])
@@ -1288,11 +1473,21 @@ def render_step5(T):
             grupos_selecionados_stats = st.multiselect(T['step5_stats_select_groups'], grupos_disponiveis)
         
         with col_stats2:
+            df_param_replicas = obter_param_replicas()
             tempos_disponiveis = df_long['Tempo'].unique()
             tempos_disponiveis.sort()
-            opcoes_tempo = [T['step5_stats_auc'], T['step5_stats_time_final']] + [f"{t} h" for t in tempos_disponiveis if t > 0]
+            opcoes_param = {T['step5_stats_param'].format(modelo, nome): (modelo, nome)
+                            for modelo, spec in MODELOS_V12.items() for nome in spec['saida']
+                            if not df_param_replicas.empty and nome in df_param_replicas.columns}
+            opcoes_metricas = {T['step5_stats_auc']: 'AUC', T['step5_stats_ed']: 'ED', T['step5_stats_mdt']: 'MDT',
+                               T['step5_stats_t50']: 't50', T['step5_stats_t80']: 't80'}
+            opcoes_tempo = [T['step5_stats_auc'], T['step5_stats_time_final']] + [f"{t} h" for t in tempos_disponiveis if t > 0] \
+                           + [op for op in opcoes_metricas if op != T['step5_stats_auc']] + list(opcoes_param)
             tempo_selecionado_str = st.selectbox(T['step5_stats_select_time'], options=opcoes_tempo)
         
+        opcoes_post_hoc = {T['posthoc_tukey']: "tukey", T['posthoc_gh']: "games-howell"}
+        metodo_post_hoc = st.radio(T['posthoc_method'], list(opcoes_post_hoc), horizontal=True, key="posthoc_metodo")
+        
         if st.button(T['step5_stats_button'], type="primary"):
             if len(grupos_selecionados_stats) < 2:
                 st.error("Please select at least 2 groups to compare.")
@@ -1300,35 +1495,43 @@ def render_step5(T):
                 dados_para_teste = []
                 grupos_validos = True
                 
-                if tempo_selecionado_str == T['step5_stats_auc']:
-                    st.markdown(f"**Comparing Groups:** `{', '.join(grupos_selecionados_stats)}` by **{T['step5_stats_auc']}**")
+                if tempo_selecionado_str in opcoes_metricas:
+                    metrica_sel = opcoes_metricas[tempo_selecionado_str]
+                    st.markdown(f"**Comparing Groups:** `{', '.join(grupos_selecionados_stats)}` by **{tempo_selecionado_str}**")
 
                     for grupo in grupos_selecionados_stats:
-                        
-                        # --- V51: CORREÇÃO do KeyError ('Sample_Name') ---
-                        replicas_do_grupo = df_long[df_long[col_grupo] == grupo][col_amostra].unique()
+                        replicas_do_grupo = df_metricas[df_metricas[col_grupo] == grupo]
                         
                         if len(replicas_do_grupo) < 2:
                             grupos_validos = False
-                            st.error(f"Group '{grupo}' has less than 2 replicates for AUC statistical calculation.")
+                            st.error(f"Group '{grupo}' has less than 2 replicates for {tempo_selecionado_str} statistical calculation.")
                             break
                         
-                        aucs_grupo = []
-                        for replica_id in replicas_do_grupo:
-                            df_replica = df_long[df_long[col_amostra] == replica_id].sort_values(by='Tempo')
-                            tempos_replica = df_replica['Tempo']
-                            valores_replica = df_replica[y_axis_col]
-                            
-                            if len(tempos_replica) > 1:
-                                auc_replica = np.trapezoid(valores_replica, x=tempos_replica)
-                                aucs_grupo.append(auc_replica)
+                        valores_metrica = replicas_do_grupo[metrica_sel].dropna().reset_index(drop=True)
                         
-                        if len(aucs_grupo) < 2: 
+                        if len(valores_metrica) < 2: 
                             grupos_validos = False
-                            st.error(f"Could not calculate AUC for sufficient replicates in group '{grupo}'. (N={len(aucs_grupo)})")
+                            st.error(f"Could not calculate {tempo_selecionado_str} for sufficient replicates in group '{grupo}'. (N={len(valores_metrica)})")
                             break
                             
-                        dados_para_teste.append(pd.Series(aucs_grupo))
+                        dados_para_teste.append(valores_metrica)
+                
+                elif tempo_selecionado_str in opcoes_param:
+                    modelo_sel, param_sel = opcoes_param[tempo_selecionado_str]
+                    st.markdown(f"**Comparing Groups:** `{', '.join(grupos_selecionados_stats)}` by **{modelo_sel} · {param_sel}**")
+                    
+                    for grupo in grupos_selecionados_stats:
+                        valores_param = df_param_replicas[
+                            (df_param_replicas[col_grupo] == grupo) &
+                            (df_param_replicas["Modelo"] == modelo_sel)
+                        ][param_sel].dropna().reset_index(drop=True)
+                        
+                        if len(valores_param) < 2:
+                            grupos_validos = False
+                            st.error(T['step5_stats_error_param'].format(grupo, modelo_sel, param_sel))
+                            break
+                        
+                        dados_para_teste.append(valores_param)
                 
                 else: 
                     if tempo_selecionado_str == T['step5_stats_time_final']:
@@ -1380,6 +1583,38 @@ def render_step5(T):
                             st.success(f"**{T['step5_stats_conclusion_sig']}** {p_valor_formatado_desc}")
                         else:
                             st.info(f"**{T['step5_stats_conclusion_nonsig']}** {p_valor_formatado_desc}")
+                        
+                        if len(dados_para_teste) > 2 and p_value < 0.05:
+                            exibir_post_hoc(dados_para_teste, grupos_selecionados_stats, opcoes_post_hoc[metodo_post_hoc], T, "post_hoc_pares")
+        
+        st.markdown("---")
+        st.subheader(T['step5_stats_all_header'])
+        st.info(T['step5_stats_all_info'])
+        opcoes_correcao = {T['step5_stats_all_holm']: "holm", T['step5_stats_all_bh']: "bh"}
+        correcao_sel = st.radio(T['step5_stats_all_correction'], list(opcoes_correcao), horizontal=True, key="stats_correcao")
+        
+        if st.button(T['step5_stats_all_button'], key="stats_todos_tempos"):
+            if len(grupos_selecionados_stats) < 2:
+                st.error("Please select at least 2 groups to compare.")
+            else:
+                matriz = st.session_state.matriz_processada
+                Y_replicas, _ = matriz_y_replicas(matriz, config)
+                df_testes = testar_todos_tempos(matriz['tempos'], Y_replicas, matriz['grupos'], grupos_selecionados_stats,
+                                                metodo=opcoes_correcao[correcao_sel])
+                n_testados = int(df_testes["p"].notna().sum())
+                if n_testados == 0:
+                    st.warning(T['step5_stats_all_none'])
+                else:
+                    st.markdown(T['step5_stats_all_summary'].format(int(df_testes["Significante"].sum()), n_testados))
+                    st.dataframe(
+                        df_testes.style.format({"Tempo": "{:g}", "Estatistica": "{:.4f}", "GL_Num": "{:.0f}", "GL_Den": "{:.2f}",
+                                                "p": "{:.5f}", "p_Ajustado": "{:.5f}"}, na_rep="-"),
+                        use_container_width=True, hide_index=True
+                    )
+                    get_download_button(df_testes, T, "testes_todos_tempos.csv", "testes_todos_tempos.xlsx")
+                    fig_faixas = plotar_faixas_significancia(df_agg, grupos_selecionados_stats, col_grupo, y_axis_mean, config['y_axis_sd'],
+                                                             df_testes, config['y_label'], T)
+                    st.plotly_chart(fig_faixas, use_container_width=True)
 
     with tab_f2:
         st.subheader(T['step5_f2_header'])
@@ -1391,10 +1626,46 @@ def render_step5(T):
             grupo_R = st.selectbox(T['step5_f2_ref'], grupos_disponiveis, key="f2_R")
         with col_f2_2:
             grupo_T = st.selectbox(T['step5_f2_test'], grupos_disponiveis, key="f2_T", index=min(1, len(grupos_disponiveis)-1))
+        
+        modo_f2 = st.radio(T['step5_f2_mode'], [T['step5_f2_mode_mean'], T['step5_f2_mode_boot']], horizontal=True, key="f2_modo")
+        if modo_f2 == T['step5_f2_mode_boot']:
+            st.info(T['step5_f2_boot_info'])
+            n_boot_f2 = st.number_input(T['step5_f2_boot_n'], min_value=1000, max_value=200000, value=10000, step=1000, key="f2_n_boot")
             
         if st.button(T['step5_f2_button'], type="primary"):
             if grupo_R == grupo_T:
                 st.error(T['step5_f2_error'])
+            elif modo_f2 == T['step5_f2_mode_boot']:
+                t_R, Y_R = matriz_replicas_grupo(df_long, col_amostra, col_grupo, y_axis_col, grupo_R)
+                t_T, Y_T = matriz_replicas_grupo(df_long, col_amostra, col_grupo, y_axis_col, grupo_T)
+                if Y_R.shape[0] < 2 or Y_T.shape[0] < 2:
+                    st.error(T['step5_f2_boot_error_replicas'])
+                else:
+                    resultado_f2 = calcular_f2_bootstrap(t_R, Y_R, t_T, Y_T, n_boot=int(n_boot_f2))
+                    if resultado_f2 is None:
+                        st.error(T['step5_f2_error_points'])
+                    else:
+                        df_f2_resumo = resultado_f2['resumo'].set_index("Variante")
+                        p5 = df_f2_resumo.loc["f2", "P5"]
+                        
+                        col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+                        col_m1.metric("f₂", f"{resultado_f2['observado']['f2']:.2f}")
+                        col_m2.metric(T['step5_f2_boot_p5'], f"{p5:.2f}")
+                        col_m3.metric("f₂ (exp)", f"{resultado_f2['observado']['f2_esperado']:.2f}")
+                        col_m4.metric("f₂ (bc)", f"{resultado_f2['observado']['f2_corrigido']:.2f}" if np.isfinite(resultado_f2['observado']['f2_corrigido']) else "-")
+                        
+                        if p5 >= 50:
+                            st.success(T['step5_f2_boot_result_sim'].format(p5))
+                        else:
+                            st.error(T['step5_f2_boot_result_nonsim'].format(p5))
+                        
+                        st.dataframe(df_f2_resumo.style.format(precision=2, na_rep="-"), use_container_width=True)
+                        
+                        fig_f2 = px.histogram(x=resultado_f2['amostras']['f2'], nbins=60, title=T['step5_f2_boot_hist'], labels={'x': 'f₂'})
+                        fig_f2.add_vline(x=50, line_dash="dash", line_color="red")
+                        fig_f2.add_vline(x=p5, line_dash="dot", line_color="black", annotation_text="P5")
+                        st.plotly_chart(fig_f2, use_container_width=True)
+                        get_download_button(df_f2_resumo.reset_index(), T, f"f2_bootstrap_{grupo_R}_vs_{grupo_T}.csv", f"f2_bootstrap_{grupo_R}_vs_{grupo_T}.xlsx")
             else:
                 f2_valor = calcular_f2(df_agg, grupo_R, grupo_T, col_grupo, y_axis_mean)
                 if f2_valor is None:
@@ -1405,10 +1676,22 @@ def render_step5(T):
                     else:
                         st.error(T['step5_f2_result_nonsim'].format(f2_valor))
         
+        st.markdown("---")
+        st.subheader(T['step5_f2_matrix_header'])
+        st.info(T['step5_f2_matrix_info'])
+        df_matriz_f2 = obter_matriz_f2()
+        fig_matriz = px.imshow(
+            df_matriz_f2, text_auto=".1f", zmin=0, zmax=100, color_continuous_scale="RdYlGn", aspect="auto",
+            labels={'x': T['step5_f2_test'], 'y': T['step5_f2_ref'], 'color': "f₂"}
+        )
+        fig_matriz.update_layout(height=max(400, 28 * len(df_matriz_f2)))
+        st.plotly_chart(fig_matriz, use_container_width=True)
+        get_download_button(df_matriz_f2, T, "matriz_f2.csv", "matriz_f2.xlsx")
+        
 def render_step6(T):
     st.header(T['step6_header'])
     
-    if st.session_state.df_agregado is None or st.session_state.config == {}:
+    if obter_df_agregado() is None or st.session_state.config == {}:
         st.warning(T['step2_warning_process'])
         return
         
@@ -1428,12 +1711,13 @@ def render_step6(T):
     
     if st.button(T['step6_button_generate'], type="primary"):
         with st.spinner("Analisando e gerando Prompt..."):
-            df_agg = st.session_state.df_agregado
+            df_agg = obter_df_agregado()
             config = st.session_state.config
             col_grupo = config['col_grupo']
             grupos_disponiveis = df_agg[col_grupo].unique()
             y_axis_mean = config['y_axis_mean']
             resumo_list = []
+            dados_modelagem = {}
             
             for grupo in grupos_disponiveis:
                 df_grupo_agg = df_agg[df_agg[col_grupo] == grupo].copy()
@@ -1447,8 +1731,13 @@ def render_step6(T):
                 t_data = df_model["Tempo"]
                 q_data = df_model[y_axis_mean]
                 if len(q_data) < 3: continue
-                
-                df_resultados_grupo, _ = rodar_modelagem_v12(t_data, q_data, df_model, y_axis_mean, config.get('has_dose_info', False))
+                dados_modelagem[grupo] = (t_data.to_numpy(dtype=float), q_data.to_numpy(dtype=float))
+
+            df_resultados_todos = rodar_modelagem_lote_v12(dados_modelagem, config.get('has_dose_info', False), st.session_state.excluir_t_zero,
+                                                           n_workers=st.session_state.n_workers_ajuste)
+
+            for grupo in dados_modelagem:
+                df_resultados_grupo = df_resultados_todos.xs(grupo, level="Grupo")
                 
                 (melhor_modelo, r2_melhor, 
                  k_val, k_unit, k2_val, k2_unit, n_val, 
@@ -1523,6 +1812,9 @@ def render_release_app():
         st.rerun()
 
     st.sidebar.markdown("---") # Linha divisória após o botão de retorno
+    st.session_state.n_workers_ajuste = int(st.sidebar.number_input(
+        T['fit_workers'], min_value=1, max_value=os.cpu_count() or 1,
+        value=min(st.session_state.get('n_workers_ajuste', 1), os.cpu_count() or 1), step=1, help=T['fit_workers_help']))
     
     if pagina == T['nav_step1']:
         render_step1(T)
@@ -1535,4 +1827,7 @@ def render_release_app():
     elif pagina == T['nav_step5']:
         render_step5(T)
     elif pagina == T['nav_step6']:
-        render_step6(T)
\ No newline at end of file
+        render_step6(T)
+
+    # Contadores do cache de ajustes (atualizados após a renderização da etapa atual)
+    st.sidebar.caption(T['fit_cache_stats'].format(**CACHE_AJUSTES.stats()))
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""Orçamento de inicialização a frio do FluxIQ: tempo até a primeira pintura da Home em processos novos.
+
+Cada rodada abre um interpretador Python novo (como um contêiner recém-iniciado, sem nada importado), executa o
+app_main.py com o AppTest do Streamlit e mede:
+  - primeira pintura: do início do processo até a Home desenhada (import do Streamlit + execução do script);
+  - script da Home: só a execução do app_main.py até o fim de render_home;
+  - abrir módulo: o primeiro clique em Liberação/Permeação (onde os módulos pesados passam a ser importados).
+Também lista quais bibliotecas pesadas o app importou antes de desenhar a Home (além das que o Streamlit já traz).
+
+Exemplo:
+    python medir_inicializacao.py --rodadas 5
+Retorna código 1 se a mediana da primeira pintura passar do orçamento.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Mediana medida num contêiner de 1 vCPU: ~0,85 s (antes do carregamento preguiçoso: ~2,3 s)
+ORCAMENTO_PRIMEIRA_PINTURA_S = 1.5
+
+MODULOS_PESADOS = ('plotly', 'scipy', 'sklearn', 'xlsxwriter', 'openpyxl', 'm_release', 'm_permeation', 'fluxiq_core')
+
+# Executado em cada processo novo; imprime uma linha JSON com as medições
+_RODADA = r"""
+import json, sys, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+ja_carregados = set(sys.modules)  # o próprio Streamlit já traz alguns (ex.: plotly)
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+pintura = time.perf_counter() - inicio
+resultado = {
+    'primeira_pintura': pintura,
+    'script_home': at.session_state['tempo_primeira_pintura'],
+    'carregados': [m for m in json.loads(sys.argv[2]) if m in sys.modules and m not in ja_carregados],
+    'erros': [e.value for e in at.exception],
+}
+if sys.argv[3] == '1':
+    for chave in range(2):
+        t0 = time.perf_counter()
+        at.button[chave].click().run()
+        resultado[at.session_state['app_mode']] = time.perf_counter() - t0
+        at.session_state['app_mode'] = 'home'
+        at.run()
+print(json.dumps(resultado))
+"""
+
+def medir_rodada(caminho_app, abrir_modulos):
+    """Uma inicialização a frio em subprocesso; retorna o dicionário de medições."""
+    saida = subprocess.run([sys.executable, '-c', _RODADA, caminho_app, json.dumps(MODULOS_PESADOS),
+                            '1' if abrir_modulos else '0'],
+                           capture_output=True, text=True, check=True, cwd=os.path.dirname(caminho_app))
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo até a primeira pintura do FluxIQ em processos novos.")
+    parser.add_argument('--rodadas', type=int, default=5, help="Inicializações a frio (padrão: 5).")
+    parser.add_argument('--orcamento', type=float, default=ORCAMENTO_PRIMEIRA_PINTURA_S,
+                        help=f"Orçamento da primeira pintura em segundos (padrão: {ORCAMENTO_PRIMEIRA_PINTURA_S}).")
+    parser.add_argument('--sem-modulos', action='store_true', help="Não mede a abertura de Liberação/Permeação.")
+    args = parser.parse_args(argv)
+
+    caminho_app = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app_main.py')
+    rodadas = [medir_rodada(caminho_app, not args.sem_modulos) for _ in range(args.rodadas)]
+    erros = [e for r in rodadas for e in r['erros']]
+    if erros:
+        print(f"Erros na Home: {erros}", file=sys.stderr)
+        return 1
+
+    def linha(rotulo, valores):
+        print(f"  {rotulo:<22} mediana {statistics.median(valores):.3f} s  (mín {min(valores):.3f}, máx {max(valores):.3f})")
+
+    print(f"{args.rodadas} inicialização(ões) a frio")
+    linha("primeira pintura", [r['primeira_pintura'] for r in rodadas])
+    linha("script da Home", [r['script_home'] for r in rodadas])
+    if not args.sem_modulos:
+        linha("abrir Liberação", [r['release'] for r in rodadas])
+        linha("abrir Permeação", [r['permeation'] for r in rodadas])
+    carregados = sorted({m for r in rodadas for m in r['carregados']})
+    print(f"  módulos pesados na Home: {', '.join(carregados) if carregados else 'nenhum'}")
+
+    mediana = statistics.median(r['primeira_pintura'] for r in rodadas)
+    dentro = mediana <= args.orcamento
+    print(f"Orçamento da primeira pintura: {args.orcamento:.2f} s -> {'OK' if dentro else 'EXCEDIDO'} ({mediana:.3f} s)")
+    return 0 if dentro else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())